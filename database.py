@@ -3,12 +3,17 @@ import logging
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from dataclasses import dataclass
-from firebase_admin import credentials, firestore, initialize_app, auth
-from google.cloud.firestore_v1.base_query import FieldFilter
-import firebase_admin
+import threading
 from enum import Enum
 
 from utils import convert_numpy_types, generate_uuid_28
+from startup_profile import LazyModule, startup_profiler
+
+# Firebase Admin is imported on first database use, not at process start
+firebase_admin = LazyModule("firebase_admin")
+credentials = LazyModule("firebase_admin.credentials")
+firestore = LazyModule("firebase_admin.firestore")
+auth = LazyModule("firebase_admin.auth")
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -17,6 +22,11 @@ logger = logging.getLogger(__name__)
 # Firebase configuration
 FIREBASE_CREDENTIALS_PATH = os.getenv("FIREBASE_CREDENTIALS_PATH")
 FIREBASE_PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID")
+FIRESTORE_BATCH_LIMIT = 500
+
+# Firestore client, created by the first get_firestore_client() call
+_firestore_client = None
+_FIRESTORE_CLIENT_LOCK = threading.Lock()
     
 # Initialize Firebase Admin SDK
 def initialize_firebase():
@@ -49,28 +59,25 @@ def initialize_firebase():
                 
             # Initialize with service account
             cred = credentials.Certificate(cred_path)
-            initialize_app(cred)
+            firebase_admin.initialize_app(cred)
             logger.info("Firebase Admin SDK initialized successfully")
         else:
             logger.info("Firebase Admin SDK already initialized")
         
-        # Test Firebase Admin connection
-        try:
-            # Test with a non-existent user to verify connection
-            auth.get_user_by_email("test@nonexistent.example.com")
-        except auth.UserNotFoundError:
-            logger.info("Firebase Admin SDK connection test passed (user not found as expected)")
-        except Exception as e:
-            logger.error(f"Firebase Admin SDK connection test failed: {type(e).__name__}: {str(e)}")
-            # Don't raise here, let the app continue but log the issue
-        
         return firestore.client()
     except Exception as e:
         logger.error(f"Firebase initialization failed: {e}")
         raise e
 
-# Initialize Firestore client
-db = initialize_firebase()
+def get_firestore_client():
+    """Firestore client, initializing Firebase on first use"""
+    global _firestore_client
+    if _firestore_client is None:
+        with _FIRESTORE_CLIENT_LOCK:
+            if _firestore_client is None:
+                with startup_profiler.measure("firebase", "init"):
+                    _firestore_client = initialize_firebase()
+    return _firestore_client
 
 # Enums for user roles
 class UserRole(Enum):
@@ -164,6 +171,7 @@ class ClassificationEntry:
     second_confidence: Optional[float] = None
     third_class: Optional[str] = None
     third_confidence: Optional[float] = None
+    detection_count: Optional[int] = None
 
     def __post_init__(self):
         if self.created_at is None:
@@ -208,6 +216,7 @@ class ClassificationEntry:
             "secondConfidence": convert_numpy_types(self.second_confidence) if self.second_confidence is not None else None,
             "thirdClass": self.third_class,
             "thirdConfidence": convert_numpy_types(self.third_confidence) if self.third_confidence is not None else None,
+            "detectionCount": self.detection_count,
         }
             
         # Convert entire dict to ensure no numpy types remain
@@ -238,29 +247,81 @@ class ClassificationEntry:
                 second_confidence=float(data.get("secondConfidence")) if data.get("secondConfidence") is not None else None,
                 third_class=data.get("thirdClass"),
                 third_confidence=float(data.get("thirdConfidence")) if data.get("thirdConfidence") is not None else None,
+                detection_count=data.get("detectionCount"),
             )
         except Exception as e:
             logger.error(f"Error creating ClassificationEntry from dict: {e}")
             return None
 
+@dataclass
+class DetectionEntry:
+    """Model for one detected organism inside a classified field image"""
+    id: str
+    classification_id: str
+    index: int
+    bbox: List[int]
+    classification_result: str
+    confidence: float
+    second_class: Optional[str] = None
+    second_confidence: Optional[float] = None
+    third_class: Optional[str] = None
+    third_confidence: Optional[float] = None
+
+    def __post_init__(self):
+        # Convert numpy types to Python native types
+        self.bbox = [int(value) for value in self.bbox]
+        self.confidence = convert_numpy_types(self.confidence)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for Firestore"""
+        return convert_numpy_types({
+            "id": self.id,
+            "classificationId": self.classification_id,
+            "index": self.index,
+            "bbox": self.bbox,
+            "classificationResult": self.classification_result,
+            "confidence": self.confidence,
+            "secondClass": self.second_class,
+            "secondConfidence": self.second_confidence,
+            "thirdClass": self.third_class,
+            "thirdConfidence": self.third_confidence,
+        })
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], doc_id: str = None) -> Optional['DetectionEntry']:
+        """Create instance from Firestore document"""
+        try:
+            return cls(
+                id=data.get("id", doc_id),
+                classification_id=data.get("classificationId"),
+                index=int(data.get("index", 0)),
+                bbox=data.get("bbox", [0, 0, 0, 0]),
+                classification_result=data.get("classificationResult"),
+                confidence=float(data.get("confidence", 0.0)),
+                second_class=data.get("secondClass"),
+                second_confidence=data.get("secondConfidence"),
+                third_class=data.get("thirdClass"),
+                third_confidence=data.get("thirdConfidence"),
+            )
+        except Exception as e:
+            logger.error(f"Error creating DetectionEntry from dict: {e}")
+            return None
+
 # Database operations
 class FirestoreDB:
     """Firestore database operations"""
-    def __init__(self):
-        """Initialize Firestore client"""
-        try:
-            # Initialize Firebase using the dedicated function
-            self.db = initialize_firebase()
-            
-            # Collections
-            self.users_collection = self.db.collection('users')
-            self.classifications_collection = self.db.collection('classifications')
-            
-            logger.info("Firestore database connection established")
-            
-        except Exception as e:
-            logger.error(f"Failed to initialize Firestore: {str(e)}")
-            raise
+    @property
+    def db(self):
+        """Firestore client (Firebase is initialized by the first database call)"""
+        return get_firestore_client()
+    
+    @property
+    def users_collection(self):
+        return self.db.collection('users')
+    
+    @property
+    def classifications_collection(self):
+        return self.db.collection('classifications')
 
     def verify_firebase_token(self, id_token: str) -> Optional[Dict[str, Any]]:
         """Verify Firebase ID token and return user claims"""
@@ -539,6 +600,55 @@ class FirestoreDB:
             logger.error(f"Failed to save classification to database: {e}")
             raise e
 
+    def save_classifications_batch(self, entries: List[ClassificationEntry]) -> List[str]:
+        """Save many classification results with batched Firestore commits"""
+        try:
+            # Firestore allows at most 500 writes per batch
+            for start in range(0, len(entries), FIRESTORE_BATCH_LIMIT):
+                batch = self.db.batch()
+                for entry in entries[start:start + FIRESTORE_BATCH_LIMIT]:
+                    batch.set(self.classifications_collection.document(entry.id), entry.to_dict())
+                batch.commit()
+            
+            logger.info(f"Saved {len(entries)} classifications to database in batched commits")
+            return [entry.id for entry in entries]
+        except Exception as e:
+            logger.error(f"Failed to save classification batch to database: {e}")
+            raise e
+
+    def save_classification_with_detections(self, entry: ClassificationEntry, detections: List[DetectionEntry]) -> str:
+        """Save a parent classification and its detections (subcollection) with batched commits"""
+        try:
+            parent_ref = self.classifications_collection.document(entry.id)
+            writes = [(parent_ref, entry.to_dict())]
+            writes.extend(
+                (parent_ref.collection('detections').document(detection.id), detection.to_dict())
+                for detection in detections
+            )
+
+            # Firestore allows at most 500 writes per batch
+            for start in range(0, len(writes), FIRESTORE_BATCH_LIMIT):
+                batch = self.db.batch()
+                for doc_ref, data in writes[start:start + FIRESTORE_BATCH_LIMIT]:
+                    batch.set(doc_ref, data)
+                batch.commit()
+
+            logger.info(f"Classification saved to database: {entry.id} with {len(detections)} detections")
+            return entry.id
+        except Exception as e:
+            logger.error(f"Failed to save classification with detections to database: {e}")
+            raise e
+
+    def get_detections_by_classification_id(self, classification_id: str) -> List[DetectionEntry]:
+        """Get the detections stored under a classification, in detection order"""
+        try:
+            docs = self.classifications_collection.document(classification_id).collection('detections').order_by("index").stream()
+            detections = [DetectionEntry.from_dict(doc.to_dict(), doc.id) for doc in docs]
+            return [detection for detection in detections if detection is not None]
+        except Exception as e:
+            logger.error(f"Error getting detections for {classification_id}: {e}")
+            return []
+
     def get_classification_by_id(self, classification_id: str) -> Optional[ClassificationEntry]:
         """Get single classification by ID"""
         try:
@@ -737,7 +847,7 @@ def get_db():
 def get_database_info():
     """Get database information"""
     try:
-        project_id = db._client.project
+        project_id = get_firestore_client()._client.project
         return {
             "database_type": "Firestore",
             "project_id": project_id,
@@ -752,12 +862,18 @@ def get_database_info():
         }
 
 def init_database():
-    """Initialize Firestore (connection test)"""
+    """Initialize Firestore and check the connection (read-only)"""
     try:
-        # Test connection
-        test_ref = db.collection('test').document('connection_test')
-        test_ref.set({'timestamp': datetime.utcnow()})
-        test_ref.delete()
+        client = get_firestore_client()
+        
+        # Test Firebase Admin connection with a non-existent user
+        try:
+            auth.get_user_by_email("test@nonexistent.example.com")
+        except auth.UserNotFoundError:
+            logger.info("Firebase Admin SDK connection test passed (user not found as expected)")
+        
+        # Test connection with a read, so checks never write to production data
+        client.collection('test').document('connection_test').get()
         logger.info("Firestore connection test successful!")
         return True
     except Exception as e:
@@ -0,0 +1,31 @@
+"""Gunicorn configuration for production deployments.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+Every worker loads its own models, but their weights can still be shared through
+the page cache: TFLite models (MODEL_BACKENDS=...=tflite-*) are memory-mapped
+read-only, and SHARED_WEIGHTS=true serves the other models from their ONNX export
+with memory-mapped weights (see shared_weights.py). Otherwise Keras and SavedModel
+weights are private to each worker. Models are not loaded in the master:
+TensorFlow starts its thread pools as soon as a model is loaded, and workers
+forked after that can deadlock.
+
+GET /api/memory-report shows the shared and private memory of every worker.
+"""
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+# Lets each worker size its thread pools for its share of the CPUs
+os.environ.setdefault("WEB_CONCURRENCY", str(workers))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("WORKER_TIMEOUT", "300"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "60"))
+
+def on_starting(server):
+    # Lets workers find their siblings for the memory report
+    os.environ["WEB_MASTER_PID"] = str(os.getpid())
+
+def post_fork(server, worker):
+    # Slot used for CPU affinity (INFERENCE_CPU_AFFINITY); ages start at 1
+    os.environ["WEB_WORKER_INDEX"] = str((worker.age - 1) % workers)
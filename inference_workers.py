@@ -0,0 +1,364 @@
+import os
+import queue
+import logging
+import itertools
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from concurrent.futures import Future
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# "thread" runs inference in the web process, "process" uses the worker pool below
+INFERENCE_MODE = os.getenv("INFERENCE_MODE", "thread").lower()
+PROCESS_WORKERS = int(os.getenv("INFERENCE_PROCESS_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+WORKER_TASK_TIMEOUT = float(os.getenv("INFERENCE_PROCESS_TIMEOUT", "300"))
+WORKER_STARTUP_TIMEOUT = 120.0
+
+# ============================================================================
+# WORKER PROCESS
+# ============================================================================
+
+def _worker_main(worker_id: int, task_queue, result_queue):
+    """Entry point of a long-lived inference worker process"""
+    global INFERENCE_MODE
+
+    # Workers always run inference in-process; never spawn a nested pool
+    INFERENCE_MODE = "thread"
+    os.environ["INFERENCE_MODE"] = "thread"
+
+    # Picked up by the thread layout when utils is imported below
+    os.environ["INFERENCE_WORKER_INDEX"] = str(worker_id)
+
+    # Each worker imports utils itself and therefore owns its ModelCacheManager
+    import utils
+
+    result_queue.put(("ready", worker_id, None, os.getpid()))
+    logger.info(f"Inference worker {worker_id} ready (pid {os.getpid()})")
+
+    while True:
+        message = task_queue.get()
+        if message is None:
+            break
+
+        kind, task_id, payload = message
+        try:
+            if kind == "predict":
+                model_option, shm_name, shape, dtype = payload
+                shm = shared_memory.SharedMemory(name=shm_name)
+                try:
+                    tensor = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+                    result = utils.predict_preprocessed(model_option, tensor, use_batching=False)
+                    del tensor
+                finally:
+                    shm.close()
+            elif kind == "predict_raw":
+                model_option, shm_name, shape, dtype = payload
+                shm = shared_memory.SharedMemory(name=shm_name)
+                try:
+                    tensor = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+                    result = utils.predict_raw(model_option, tensor, use_batching=False)
+                    del tensor
+                finally:
+                    shm.close()
+            elif kind == "predict_batch":
+                model_option, shm_name, shape, dtype = payload
+                shm = shared_memory.SharedMemory(name=shm_name)
+                try:
+                    tensor = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+                    result = utils.predict_preprocessed_batch(model_option, tensor)
+                    del tensor
+                finally:
+                    shm.close()
+            elif kind == "stats":
+                result = utils.get_cache_info()
+            elif kind == "clear":
+                utils.clear_model_cache()
+                result = True
+            elif kind == "preload":
+                result = utils.preload_models_async()
+            else:
+                raise ValueError(f"Unknown task type: {kind}")
+
+            result_queue.put(("result", worker_id, task_id, result))
+
+        except Exception as e:
+            result_queue.put(("error", worker_id, task_id, f"{type(e).__name__}: {str(e)}"))
+
+    logger.info(f"Inference worker {worker_id} stopped")
+
+# ============================================================================
+# WORKER POOL
+# ============================================================================
+
+class InferenceWorkerPool:
+    """Pool of long-lived inference processes fed through shared memory"""
+    def __init__(self, num_workers=2):
+        self.num_workers = max(1, int(num_workers))
+        self._ctx = mp.get_context("spawn")
+        self._lock = threading.Lock()
+        self._task_ids = itertools.count()
+        self._result_queue = None
+        self._task_queues: List[Any] = []
+        self._processes: List[Any] = []
+        self._pids: Dict[int, int] = {}
+        self._inflight: List[int] = []
+        self._pending: Dict[int, tuple] = {}
+        self._ready = threading.Event()
+        self._collector = None
+        self.started = False
+        self.stats = {
+            'tasks': 0,
+            'failed': 0,
+            'restarts': 0,
+            'shared_bytes': 0
+        }
+
+    def start(self):
+        """Start the worker processes and the result collector thread"""
+        if self.started:
+            return
+
+        with self._lock:
+            if self.started:
+                return
+
+            logger.info(f"Starting {self.num_workers} inference worker processes...")
+            self._result_queue = self._ctx.Queue()
+            for worker_id in range(self.num_workers):
+                self._task_queues.append(self._ctx.Queue())
+                self._processes.append(None)
+                self._inflight.append(0)
+                self._spawn_worker(worker_id)
+
+            self.started = True
+            self._collector = threading.Thread(target=self._collect_results, name="inference-pool-collector", daemon=True)
+            self._collector.start()
+
+        if not self._ready.wait(timeout=WORKER_STARTUP_TIMEOUT):
+            logger.warning("Not all inference workers reported ready in time")
+
+    def _spawn_worker(self, worker_id: int):
+        """Start (or restart) one worker process"""
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self._task_queues[worker_id], self._result_queue),
+            name=f"inference-worker-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        self._processes[worker_id] = process
+
+    def _collect_results(self):
+        """Resolve pending futures as results come back from the workers"""
+        while self.started or self._pending:
+            try:
+                status, worker_id, task_id, payload = self._result_queue.get(timeout=1.0)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            except (EOFError, OSError):
+                break
+
+            if status == "ready":
+                with self._lock:
+                    self._pids[worker_id] = payload
+                    if len(self._pids) >= self.num_workers:
+                        self._ready.set()
+                continue
+
+            with self._lock:
+                entry = self._pending.pop(task_id, None)
+                self._inflight[worker_id] = max(0, self._inflight[worker_id] - 1)
+
+            if entry is None:
+                continue
+
+            future = entry[0]
+            if status == "result":
+                future.set_result(payload)
+            else:
+                self.stats['failed'] += 1
+                future.set_exception(RuntimeError(f"Inference worker {worker_id} failed: {payload}"))
+
+    def _check_workers(self):
+        """Fail tasks of crashed workers and restart them"""
+        if not self.started:
+            return
+
+        with self._lock:
+            for worker_id, process in enumerate(self._processes):
+                if process is None or process.is_alive():
+                    continue
+
+                logger.error(f"Inference worker {worker_id} died (exit code {process.exitcode}), restarting")
+                for task_id, (future, owner) in list(self._pending.items()):
+                    if owner == worker_id:
+                        del self._pending[task_id]
+                        future.set_exception(RuntimeError(f"Inference worker {worker_id} crashed"))
+
+                self._inflight[worker_id] = 0
+                self._pids.pop(worker_id, None)
+                self.stats['restarts'] += 1
+                self._spawn_worker(worker_id)
+
+    def _submit(self, worker_id: int, kind: str, payload) -> Future:
+        """Send a task to a specific worker"""
+        future = Future()
+        with self._lock:
+            task_id = next(self._task_ids)
+            self._pending[task_id] = (future, worker_id)
+            self._inflight[worker_id] += 1
+            self.stats['tasks'] += 1
+        self._task_queues[worker_id].put((kind, task_id, payload))
+        return future
+
+    def _least_loaded_worker(self) -> int:
+        with self._lock:
+            return min(range(self.num_workers), key=lambda i: self._inflight[i])
+
+    def predict(self, model_option: str, processed_img: np.ndarray) -> Dict[str, Any]:
+        """Run inference in a worker; the tensor travels through shared memory"""
+        result = self._run_shared("predict", model_option, processed_img)
+        result.setdefault('performance_metrics', {})['worker_id'] = result.pop('_worker_id')
+        return result
+
+    def predict_raw(self, model_option: str, processed_img: np.ndarray):
+        """Run inference in a worker and return (probabilities, metrics) like utils.predict_raw"""
+        result = self._run_shared("predict_raw", model_option, processed_img)
+        predictions, metrics = result['value']
+        metrics['worker_id'] = result['_worker_id']
+        return predictions, metrics
+
+    def predict_batch(self, model_option: str, batch_tensor: np.ndarray):
+        """Run a whole batch in one worker; returns (results, metrics) like predict_preprocessed_batch"""
+        result = self._run_shared("predict_batch", model_option, batch_tensor)
+        results, metrics = result['value']
+        metrics['worker_id'] = result['_worker_id']
+        return results, metrics
+
+    def _run_shared(self, kind: str, model_option: str, processed_img: np.ndarray) -> Dict[str, Any]:
+        """Copy a tensor into shared memory and run a task on the least loaded worker"""
+        if not self.started:
+            self.start()
+
+        tensor = np.ascontiguousarray(processed_img, dtype=np.float32)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, tensor.nbytes))
+        try:
+            shared = np.ndarray(tensor.shape, dtype=tensor.dtype, buffer=shm.buf)
+            shared[...] = tensor
+            del shared
+            self.stats['shared_bytes'] += tensor.nbytes
+
+            worker_id = self._least_loaded_worker()
+            future = self._submit(worker_id, kind, (model_option, shm.name, tensor.shape, tensor.dtype.str))
+            result = future.result(timeout=WORKER_TASK_TIMEOUT)
+            if not isinstance(result, dict):
+                result = {'value': result}
+            result['_worker_id'] = worker_id
+            return result
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def broadcast(self, kind: str, payload=None, timeout: float = WORKER_TASK_TIMEOUT) -> List[Dict[str, Any]]:
+        """Send the same task to every worker and gather per-worker results"""
+        if not self.started:
+            return []
+
+        futures = [(worker_id, self._submit(worker_id, kind, payload)) for worker_id in range(self.num_workers)]
+        results = []
+        for worker_id, future in futures:
+            try:
+                results.append({"worker_id": worker_id, "pid": self._pids.get(worker_id), "result": future.result(timeout=timeout)})
+            except Exception as e:
+                results.append({"worker_id": worker_id, "pid": self._pids.get(worker_id), "error": str(e)})
+        return results
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Cheap pool counters that do not round-trip to the workers"""
+        with self._lock:
+            inflight = list(self._inflight)
+
+        return {
+            "mode": "process",
+            "num_workers": self.num_workers,
+            "started": self.started,
+            "tasks_submitted": self.stats['tasks'],
+            "tasks_failed": self.stats['failed'],
+            "worker_restarts": self.stats['restarts'],
+            "shared_memory_mb": f"{self.stats['shared_bytes'] / (1024 * 1024):.1f}",
+            "inflight_per_worker": inflight
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Aggregate cache status across all workers"""
+        workers = self.broadcast("stats", timeout=10.0)
+
+        cached_paths = set()
+        total_cached = 0
+        for worker in workers:
+            info = worker.get("result") or {}
+            total_cached += info.get("cached_models", 0)
+            cached_paths.update(model["path"] for model in info.get("models", []))
+
+        return {
+            **self.get_summary(),
+            "total_cached_models": total_cached,
+            "distinct_cached_models": sorted(cached_paths),
+            "workers": workers
+        }
+
+    def shutdown(self, timeout: float = 10.0):
+        """Stop all workers"""
+        if not self.started:
+            return
+
+        logger.info("Shutting down inference worker processes...")
+        for task_queue in self._task_queues:
+            task_queue.put(None)
+        for process in self._processes:
+            if process is not None:
+                process.join(timeout=timeout)
+                if process.is_alive():
+                    process.terminate()
+        self.started = False
+
+# ============================================================================
+# PUBLIC API
+# ============================================================================
+
+_worker_pool: Optional[InferenceWorkerPool] = None
+_pool_lock = threading.Lock()
+
+def get_worker_pool(start: bool = True) -> Optional[InferenceWorkerPool]:
+    """Get the worker pool, or None when running in thread mode.
+
+    With start=False the pool is only returned if it is already running.
+    """
+    global _worker_pool
+    if INFERENCE_MODE != "process":
+        return None
+
+    if not start:
+        return _worker_pool if _worker_pool is not None and _worker_pool.started else None
+
+    with _pool_lock:
+        if _worker_pool is None:
+            _worker_pool = InferenceWorkerPool(num_workers=PROCESS_WORKERS)
+    _worker_pool.start()
+    return _worker_pool
+
+def shutdown_worker_pool():
+    """Stop the worker pool if it was started"""
+    if _worker_pool is not None:
+        _worker_pool.shutdown()
@@ -1,6 +1,9 @@
 import os
+import sys
+import importlib.util
 import uvicorn
 import asyncio
+import signal
 import logging
 import psutil 
 import gc
@@ -12,12 +15,19 @@ load_dotenv()
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 
-from routers import api
-from utils import preload_models_async, get_cache_info, clear_model_cache
+from startup_profile import startup_profiler
+
+# Timed one by one: each import excludes the modules already imported before it
+with startup_profiler.measure("utils", "import"):
+    from utils import preload_models_async, preload_progress, get_cache_info, clear_model_cache, inference_executor, shutdown_worker_pool, get_worker_memory_report, get_thread_layout
+with startup_profiler.measure("database", "import"):
+    import database
+with startup_profiler.measure("routers.api", "import"):
+    from routers import api
 
 # ============================================================================
 # LOGGING CONFIGURATION
@@ -44,16 +54,38 @@ if missing_vars:
 
 logger.info("Environment variables validated successfully")
 
+# ============================================================================
+# SERVER CONFIGURATION
+# ============================================================================
+
+APP_ENV = os.getenv("APP_ENV", "development").lower()
+HOST = os.getenv("HOST", "127.0.0.1" if APP_ENV == "development" else "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "2"))
+
+# Warm models during startup so a worker only accepts traffic once they are loaded
+PRELOAD_BEFORE_SERVING = os.getenv("PRELOAD_BEFORE_SERVING", "false").lower() == "true"
+
+# How long shutdown waits for in-flight inferences before releasing the models
+DRAIN_TIMEOUT = float(os.getenv("DRAIN_TIMEOUT", "30"))
+
+# Seconds /ready reports "draining" after SIGTERM before the server stops accepting
+# connections, so load balancers notice and stop routing here first
+READINESS_DRAIN_DELAY = float(os.getenv("READINESS_DRAIN_DELAY", "5" if APP_ENV == "production" else "0"))
+
+# Read-only Firebase connection check at startup (one Auth lookup and one Firestore read per worker)
+DATABASE_STARTUP_CHECK = os.getenv("DATABASE_STARTUP_CHECK", "false").lower() == "true"
+
 # ============================================================================
 # BACKGROUND TASKS
 # ============================================================================
 
-async def background_model_preload():
-    """Enhanced background model preloading"""
+async def background_model_preload(app: FastAPI, delay: float = 3):
+    """Enhanced background model preloading; marks the app ready when done"""
     logger.info("Starting enhanced background model preloading...")
     
     # Wait for server to fully start
-    await asyncio.sleep(3)
+    await asyncio.sleep(delay)
     
     try:
         # Log initial system state
@@ -63,9 +95,10 @@ async def background_model_preload():
         logger.info(f"System memory usage before preloading: {memory_before:.1f}%")
         logger.info(f"Cache before preloading: {cache_before['cached_models']} models")
         
-        # Run enhanced preloading
-        preload_start = asyncio.get_event_loop().time()
-        preload_results = preload_models_async()
+        # Run enhanced preloading off the event loop so requests are served meanwhile
+        loop = asyncio.get_event_loop()
+        preload_start = loop.time()
+        preload_results = await loop.run_in_executor(None, preload_models_async)
         preload_duration = asyncio.get_event_loop().time() - preload_start
         
         # Log final status
@@ -103,11 +136,50 @@ async def background_model_preload():
         
     except Exception as e:
         logger.error(f"Error in enhanced background preloading: {str(e)}")
+    
+    finally:
+        # Models that failed to preload are loaded on first use, so serve either way
+        app.state.ready = not app.state.draining
 
 # ============================================================================
 # APPLICATION LIFECYCLE
 # ============================================================================
 
+def install_drain_signal_handler(app: FastAPI):
+    """Fail readiness on SIGTERM and only then let the server stop accepting connections.
+
+    Uvicorn installs its exit handler before the lifespan starts; it is wrapped here and
+    called READINESS_DRAIN_DELAY seconds later. A second SIGTERM exits immediately.
+    """
+    previous = signal.getsignal(signal.SIGTERM)
+    if not callable(previous):
+        return
+    loop = asyncio.get_running_loop()
+
+    def handle_sigterm(signum, frame):
+        if app.state.draining:
+            previous(signum, frame)
+            return
+        app.state.ready = False
+        app.state.draining = True
+        logger.info(f"SIGTERM received, draining for {READINESS_DRAIN_DELAY:.0f}s before shutting down")
+        loop.call_soon_threadsafe(loop.call_later, READINESS_DRAIN_DELAY, previous, signum, frame)
+
+    try:
+        signal.signal(signal.SIGTERM, handle_sigterm)
+    except ValueError:
+        # Not the main thread (e.g. under a test client), nothing to wrap
+        pass
+
+def _log_database_check(future):
+    """Report the outcome of the startup database check, nobody awaits it"""
+    if future.cancelled():
+        return
+    if future.exception() is not None:
+        logger.error(f"Database connection check failed: {future.exception()}")
+    elif not future.result():
+        logger.error("Database connection check failed, see the Firestore errors above")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handle startup and shutdown events"""
@@ -127,11 +199,28 @@ async def lifespan(app: FastAPI):
         os.makedirs("static/uploads/results", exist_ok=True)
         logger.info("Upload directories initialized")
         
-        # Start background preloading (non-blocking)
-        preload_task = asyncio.create_task(background_model_preload())
+        app.state.ready = False
+        app.state.draining = False
+        install_drain_signal_handler(app)
+        
+        if DATABASE_STARTUP_CHECK:
+            # Off the event loop so it does not delay binding
+            app.state.database_check = asyncio.get_event_loop().run_in_executor(None, database.init_database)
+            app.state.database_check.add_done_callback(_log_database_check)
+        
+        if PRELOAD_BEFORE_SERVING:
+            # Uvicorn accepts connections only after startup, so traffic waits for warm models
+            await background_model_preload(app, delay=0)
+        else:
+            # Start background preloading (non-blocking)
+            preload_task = asyncio.create_task(background_model_preload(app))
         
         startup_duration = asyncio.get_event_loop().time() - startup_time
         logger.info(f"Application startup completed in {startup_duration:.2f}s")
+        
+        # Uvicorn binds its socket right after startup completes
+        startup_profiler.mark("serving")
+        logger.info(f"Serving {startup_profiler.marks['serving']:.2f}s after process start")
 
         yield
     
@@ -144,6 +233,10 @@ async def lifespan(app: FastAPI):
         shutdown_time = asyncio.get_event_loop().time()
         logger.info("Shutting down PlanktoScan Application...")
         
+        # Usually already failed by the SIGTERM handler; other shutdown paths land here
+        app.state.ready = False
+        app.state.draining = True
+        
         try:
             # Cancel background tasks
             if 'preload_task' in locals() and not preload_task.done():
@@ -153,6 +246,12 @@ async def lifespan(app: FastAPI):
                 except asyncio.CancelledError:
                     logger.info("Background preload task cancelled")
             
+            # Let in-flight inferences finish before the models are released
+            drained = await inference_executor.drain(DRAIN_TIMEOUT)
+            logger.info("In-flight inferences drained" if drained else f"Drain incomplete after {DRAIN_TIMEOUT:.0f}s")
+            inference_executor.shutdown(wait=True)
+            shutdown_worker_pool()
+
             # Cache cleanup
             logger.info("Cleaning up model cache...")
             cache_before_cleanup = get_cache_info()
@@ -234,9 +333,15 @@ async def health_check():
             "timestamp": asyncio.get_event_loop().time(),
             "cache": {
                 "models_cached": cache_info["cached_models"],
-                "max_cache_size": cache_info.get("max_cache_size", "unknown"),
+                "cache_used_mb": cache_info.get("cache_used_mb", "unknown"),
+                "cache_budget_mb": cache_info.get("cache_budget_mb", "unknown"),
                 "system_memory_usage": cache_info.get("system_memory_usage", "unknown")
             },
+            "inference": {
+                "queue_depth": cache_info["inference_executor"]["queue_depth"],
+                "running": cache_info["inference_executor"]["running"],
+                "average_wait_ms": cache_info["inference_executor"]["average_wait_ms"]
+            },
             "system":{
                 "memory_percent": f"{memory.percent:.1f}%",
                 "memory_available_gb": f"{memory.available // (1024**3):.1f}GB"
@@ -254,6 +359,24 @@ async def health_check():
             "timestamp": asyncio.get_event_loop().time()
         }
     
+# Readiness probe (unlike /health, fails until preloading has finished and while draining)
+@app.get("/ready", include_in_schema=False)
+async def readiness_check():
+    """Readiness endpoint for load balancers and orchestrators"""
+    preload = preload_progress.snapshot()
+    preload_summary = {"running": preload["running"], "counts": preload["counts"]}
+    
+    if getattr(app.state, "ready", False):
+        return {"status": "ready", "preload": preload_summary}
+    
+    status = "draining" if getattr(app.state, "draining", False) else "starting"
+    return JSONResponse(status_code=503, content={"status": status, "preload": preload_summary})
+    
+@app.get("/api/startup-profile")
+async def startup_profile_report():
+    """Import and initialization time per module, including deferred imports"""
+    return startup_profiler.report()
+
 @app.get("/api/system-info")
 async def system_info():
     """Detailed system information endpoint"""
@@ -267,7 +390,8 @@ async def system_info():
                     "total_gb": f"{memory.total // (1024**3):.1f}",
                     "available_gb": f"{memory.available // (1024**3):.1f}",
                     "used_percent": f"{memory.percent:.1f}%"
-                }
+                },
+                "thread_layout": get_thread_layout()
             },
             "cache": cache_info,
             "environment": {
@@ -282,18 +406,57 @@ async def system_info():
     except Exception as e:
         return {"error": str(e)}
 
+@app.get("/api/memory-report")
+async def memory_report():
+    """Shared vs. private memory of every server worker process"""
+    try:
+        # Reading /proc/<pid>/smaps is slow for large processes, keep it off the event loop
+        return await asyncio.get_event_loop().run_in_executor(None, get_worker_memory_report)
+    except Exception as e:
+        return {"error": str(e)}
+
 # Include API router
 app.include_router(api.router)
 
 # ============================================================================
 # APPLICATION ENTRY POINT
 # ============================================================================
-if __name__ == "__main__":
+
+def run_production():
+    """Multi-worker server without reload; each worker preloads models before serving"""
+    # Inherited by the worker processes, which import this module again
+    os.environ.setdefault("PRELOAD_BEFORE_SERVING", "true")
+    os.environ.setdefault("WEB_CONCURRENCY", str(WEB_CONCURRENCY))
+    os.environ["WEB_MASTER_PID"] = str(os.getpid())
+    
+    # uvloop and httptools ship with uvicorn[standard] (uvloop is unavailable on Windows)
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "auto"
+    http = "httptools" if importlib.util.find_spec("httptools") else "auto"
+    
+    logger.info(f"Starting production server on {HOST}:{PORT} with {WEB_CONCURRENCY} workers ({loop}/{http})")
     uvicorn.run(
         "main:app",
-        host="127.0.0.1",
-        port=8000,
-        reload=True,
+        host=HOST,
+        port=PORT,
+        workers=WEB_CONCURRENCY,
+        loop=loop,
+        http=http,
+        reload=False,
+        proxy_headers=True,
+        timeout_graceful_shutdown=int(DRAIN_TIMEOUT),
         log_level="info",
         access_log=True
-    )
\ No newline at end of file
+    )
+
+if __name__ == "__main__":
+    if APP_ENV == "production" or "--production" in sys.argv:
+        run_production()
+    else:
+        uvicorn.run(
+            "main:app",
+            host=HOST,
+            port=PORT,
+            reload=True,
+            log_level="info",
+            access_log=True
+        )
@@ -0,0 +1,221 @@
+"""Model registry: the catalogue of classification models.
+
+Every model option is described once in MODEL_REGISTRY_PATH (model/registry.json):
+
+    "efficientnetv2b0": {
+        "path": "model/classification/EfficientNetV2B0500DataReplicated.keras",
+        "display_name": "EfficientNetV2B0",
+        "format": "keras",
+        "input_size": 224,
+        "preprocessing": "efficientnet_v2",   # tf_keras.applications module, or "default"
+        "labels": "model/labels.json",
+        "version": "1",
+        "checksum": "sha256 of the model file"  # optional, see scripts/update_registry.py
+    }
+
+The file is scanned at startup and re-read when it changes, so models can be added
+or removed without a deploy. Lookups go through in-memory indexes by option,
+display name, path and file stem.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_FORMATS = ("keras", "savedmodel", "tflite", "onnx")
+DEFAULT_INPUT_SIZE = 224
+DEFAULT_PREPROCESSING = "default"
+DEFAULT_LABELS_PATH = "model/labels.json"
+
+class ModelRegistryError(ValueError):
+    """The registry file or one of its entries is invalid"""
+
+def model_stem(path: str) -> str:
+    """File name without directories and extensions (shared by converted variants of a model)"""
+    return os.path.basename(path.rstrip('/')).split('.')[0]
+
+def infer_format(path: str) -> str:
+    """Model format from the file extension, a directory being a SavedModel"""
+    if os.path.isdir(path) or not os.path.splitext(path)[1]:
+        return "savedmodel"
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+    return extension if extension in REGISTRY_FORMATS else "keras"
+
+def file_checksum(path: str) -> str:
+    """sha256 of a model file, or of every file in a SavedModel directory"""
+    digest = hashlib.sha256()
+    files = [path] if os.path.isfile(path) else sorted(
+        os.path.join(root, name) for root, _, names in os.walk(path) for name in names
+    )
+    for file_path in files:
+        digest.update(os.path.relpath(file_path, path).encode() if file_path != path else b"")
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+def _validate_entry(option: str, raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize one registry entry, raising ModelRegistryError when it is unusable"""
+    if not isinstance(raw, dict) or not raw.get('path'):
+        raise ModelRegistryError(f"{option}: 'path' is required")
+
+    path = raw['path']
+    input_size = raw.get('input_size', DEFAULT_INPUT_SIZE)
+    if not isinstance(input_size, int) or input_size <= 0:
+        raise ModelRegistryError(f"{option}: input_size must be a positive integer, got {input_size!r}")
+
+    model_format = raw.get('format') or infer_format(path)
+    if model_format not in REGISTRY_FORMATS:
+        raise ModelRegistryError(f"{option}: unknown format {model_format!r}")
+
+    return {
+        'option': option,
+        'path': path,
+        'display_name': raw.get('display_name') or option,
+        'format': model_format,
+        'input_size': input_size,
+        'preprocessing': raw.get('preprocessing') or DEFAULT_PREPROCESSING,
+        'labels': raw.get('labels') or DEFAULT_LABELS_PATH,
+        'version': str(raw.get('version', "1")),
+        'checksum': raw.get('checksum'),
+        'available': os.path.exists(path)
+    }
+
+class ModelRegistry:
+    """In-memory, indexed view of the registry file"""
+
+    def __init__(self, path: str, reload_interval: float = 30.0, on_change=None):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.on_change = on_change  # called with the changes of every reload
+        self._lock = threading.RLock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self.loaded_at = None
+        self.errors = []
+        self._set_entries({})
+
+    def _set_entries(self, entries: Dict[str, Dict[str, Any]]):
+        """Swap in new entries with their indexes (readers see either the old or the new set)"""
+        by_name, by_path, by_stem = {}, {}, {}
+        for option, entry in entries.items():
+            by_name.setdefault(entry['display_name'].lower(), option)
+            by_path[os.path.normpath(entry['path'])] = option
+            by_stem.setdefault(model_stem(entry['path']), option)
+
+        self._indexes = (entries, by_name, by_path, by_stem)
+        self._mapping = {option: (entry['path'], entry['display_name']) for option, entry in entries.items()}
+
+    def load(self) -> Dict[str, Any]:
+        """(Re)read the registry file; returns which options were added, removed or changed.
+
+        An unreadable file keeps the current entries; invalid entries are skipped.
+        """
+        with self._lock:
+            self._checked_at = time.time()
+            try:
+                mtime = os.path.getmtime(self.path)
+                with open(self.path, 'r') as f:
+                    raw_models = json.load(f).get('models', {})
+            except FileNotFoundError:
+                logger.error(f"Model registry not found: {self.path}")
+                self.errors = [f"registry not found: {self.path}"]
+                return {'added': [], 'removed': [], 'changed': [], 'stale_paths': [], 'errors': self.errors}
+            except (OSError, ValueError) as e:
+                logger.error(f"Unreadable model registry {self.path}, keeping the current entries: {e}")
+                self.errors = [f"unreadable registry: {e}"]
+                return {'added': [], 'removed': [], 'changed': [], 'stale_paths': [], 'errors': self.errors}
+
+            entries, errors = {}, []
+            for option, raw in raw_models.items():
+                try:
+                    entries[option] = _validate_entry(option, raw)
+                except ModelRegistryError as e:
+                    logger.error(f"Skipping registry entry {e}")
+                    errors.append(str(e))
+
+            previous = self._indexes[0]
+            changes = {
+                'added': sorted(set(entries) - set(previous)),
+                'removed': sorted(set(previous) - set(entries)),
+                'changed': sorted(option for option in set(entries) & set(previous) if entries[option] != previous[option]),
+                'errors': errors
+            }
+            # Model files no longer described by the registry as they were
+            changes['stale_paths'] = sorted({previous[option]['path'] for option in changes['removed'] + changes['changed']})
+
+            self._set_entries(entries)
+            self._mtime = mtime
+            self.loaded_at = time.time()
+            self.errors = errors
+
+            missing = [option for option, entry in entries.items() if not entry['available']]
+            logger.info(f"Model registry loaded: {len(entries)} models ({len(missing)} missing files), "
+                        f"added {changes['added']}, removed {changes['removed']}, changed {changes['changed']}")
+
+        if self.on_change is not None and previous:
+            self.on_change(changes)
+        return changes
+
+    def _maybe_reload(self):
+        """Re-read the file when it changed, checking at most every reload_interval seconds"""
+        if self.reload_interval <= 0 or time.time() - self._checked_at < self.reload_interval:
+            return
+        with self._lock:
+            if time.time() - self._checked_at < self.reload_interval:
+                return
+            self._checked_at = time.time()
+            try:
+                changed = os.path.getmtime(self.path) != self._mtime
+            except OSError:
+                changed = False
+            if changed:
+                self.load()
+
+    def get(self, option: str) -> Optional[Dict[str, Any]]:
+        self._maybe_reload()
+        return self._indexes[0].get(option)
+
+    def resolve(self, key: str) -> Optional[Dict[str, Any]]:
+        """Entry for a model option, display name, model path or any file derived from it"""
+        self._maybe_reload()
+        entries, by_name, by_path, by_stem = self._indexes
+        option = (
+            key if key in entries else
+            by_name.get(key.lower()) or by_path.get(os.path.normpath(key)) or by_stem.get(model_stem(key))
+        )
+        return entries.get(option) if option else None
+
+    def mapping(self) -> Dict[str, Tuple[str, str]]:
+        """{option: (path, display_name)}; shared, do not modify"""
+        self._maybe_reload()
+        return self._mapping
+
+    def input_size(self, key: str) -> int:
+        entry = self.resolve(key)
+        return entry['input_size'] if entry else DEFAULT_INPUT_SIZE
+
+    def confirm_input_size(self, model_path: str, observed: Optional[int]):
+        """Correct the registry when a loaded model declares a different input size"""
+        entry = self.resolve(model_path)
+        if entry is None or not observed or observed == entry['input_size']:
+            return
+        logger.error(f"Registry input_size {entry['input_size']} for {entry['option']} does not match the model "
+                     f"({observed}); using {observed}, fix {self.path}")
+        with self._lock:
+            entry['input_size'] = observed
+
+    def summary(self) -> Dict[str, Any]:
+        self._maybe_reload()
+        return {
+            'path': self.path,
+            'loaded_at': time.ctime(self.loaded_at) if self.loaded_at else None,
+            'models': len(self._indexes[0]),
+            'errors': self.errors,
+            'entries': {option: dict(entry) for option, entry in self._indexes[0].items()}
+        }
@@ -1,16 +1,22 @@
 import os
+import json
 import time
+import asyncio
+import functools
+import aiofiles
 import logging
+import tempfile
 import requests
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 
 from fastapi import APIRouter, UploadFile, File, Form, Request, Response, Depends, HTTPException
-from fastapi.responses import JSONResponse, HTMLResponse, RedirectResponse
+from fastapi.responses import JSONResponse, HTMLResponse, RedirectResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.templating import Jinja2Templates
 
-from utils import predict_img, get_cache_info, get_model_mapping, MODEL_CACHE, generate_uuid_28, preload_models_async, clear_model_cache
-from database import get_db, FirestoreDB, AppUser, ClassificationEntry, UserRole, create_guest_user
+from utils import predict_img, predict_img_batch, predict_img_tiled, predict_img_detect, classify_archive_stream, get_cache_info, get_worker_cache_info, get_model_mapping, MODEL_CACHE, generate_uuid_28, preload_models_async, preload_progress, PRELOAD_PRIORITY_MODELS, clear_model_cache, inference_executor, ModelOverloadedError, model_registry, copy_archive_upload, count_zip_images, ArchiveTooLargeError, ARCHIVE_MAX_MEMBERS
+from database import get_db, FirestoreDB, AppUser, ClassificationEntry, DetectionEntry, UserRole, create_guest_user
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,6 +24,13 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
 
+# Upload limits shared by the prediction endpoints
+MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_BATCH_FILES = 500
+MAX_FIELD_FILE_SIZE = 50 * 1024 * 1024  # 50MB for full microscope fields
+ALLOWED_IMAGE_TYPES = ['image/jpeg', 'image/jpg', 'image/png', 'image/webp']
+RESULTS_DIR = "static/uploads/results"
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
@@ -29,6 +42,47 @@ def get_current_user(request: Request, db: FirestoreDB = Depends(get_db)) -> Opt
         return db.get_user_by_uid(user_id)
     return None
 
+def _clean_location(location: str) -> str:
+    """Clean location for filename (remove spaces, special chars)"""
+    return location.replace(" ", "").replace(",", "").replace("(", "").replace(")", "")[:20] if location else "Unknown"
+
+async def _persist_upload(file_path: str, content: bytes) -> float:
+    """Write upload bytes to disk without blocking the event loop; returns the write time"""
+    file_save_start = time.time()
+    async with aiofiles.open(file_path, "wb") as buffer:
+        await buffer.write(content)
+    return time.time() - file_save_start
+
+def _build_classification_entry(
+    classification_id: str,
+    user: AppUser,
+    image_path: str,
+    prediction_result: dict,
+    model_option: str,
+    location: str
+) -> ClassificationEntry:
+    """Create a ClassificationEntry from a predict_img result"""
+    top_3_predictions = prediction_result.get('top_3_predictions', [])
+    
+    return ClassificationEntry(
+        id=classification_id,
+        user_id=user.uid,
+        user_role=user.role.value,
+        image_path=image_path,
+        classification_result=prediction_result['predicted_class'],
+        confidence=prediction_result['confidence'],
+        model_used=model_option,
+        location=location,
+        timestamp=datetime.now(),
+        second_class=top_3_predictions[1]['class'] if len(top_3_predictions) > 1 else None,
+        second_confidence=top_3_predictions[1]['confidence'] if len(top_3_predictions) > 1 else None,
+        third_class=top_3_predictions[2]['class'] if len(top_3_predictions) > 2 else None,
+        third_confidence=top_3_predictions[2]['confidence'] if len(top_3_predictions) > 2 else None,
+        user_feedback=None,
+        is_correct=None,
+        correct_class=None
+    )
+
 # ============================================================================
 # AUTHENTICATION ROUTES
 # ============================================================================
@@ -459,6 +513,12 @@ async def get_cache_status():
     try:
         cache_info = get_cache_info()
         
+        # In process mode the models live in the worker processes
+        worker_cache_info = await inference_executor.run(get_worker_cache_info)
+        if worker_cache_info is not None:
+            cache_info['worker_pool'] = worker_cache_info
+            cache_info['cached_models'] = worker_cache_info['total_cached_models']
+        
         return JSONResponse(content={
             "status": "success",
             "cache_info": cache_info,
@@ -489,15 +549,32 @@ async def clear_cache():
             "error": str(e)
         })
     
+def _log_preload_outcome(future):
+    """Surface errors of a preload started from the API, nobody awaits it"""
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Model preloading failed: {future.exception()}")
+
 @router.post("/cache/preload")
 async def preload_models_endpoint():
-    """Manually trigger model preloading"""
+    """Manually trigger model preloading (runs in the background, poll /preload-status)"""
     try:
-        results = preload_models_async()
+        # Claimed here on the event loop, so concurrent triggers cannot both start one
+        if not preload_progress.start(PRELOAD_PRIORITY_MODELS):
+            return JSONResponse(status_code=409, content={
+                "status": "already_running",
+                "progress": preload_progress.snapshot()
+            })
         
-        return JSONResponse(content={
-            "status": "success",
-            "preload_results": results
+        try:
+            future = asyncio.get_event_loop().run_in_executor(None, functools.partial(preload_models_async, claimed=True))
+        except Exception:
+            preload_progress.finish()
+            raise
+        future.add_done_callback(_log_preload_outcome)
+        
+        return JSONResponse(status_code=202, content={
+            "status": "started",
+            "progress": preload_progress.snapshot()
         })
     except Exception as e:
         logger.error(f"Error preloading models: {str(e)}")
@@ -511,21 +588,32 @@ async def get_preload_status():
     """Check if models are preloaded"""
     try:
         model_mapping = get_model_mapping()
-        priority_models = ['efficientnetv2b0', 'mobilenetv2', 'resnet50']
+        progress = preload_progress.snapshot()
         
         preload_status = {}
-        for model_name in priority_models:
+        for model_name, priority in PRELOAD_PRIORITY_MODELS:
             if model_name in model_mapping:
-                model_path, display_name = model_mapping[model_name]
+                model_progress = progress['models'].get(model_name, {})
+                
+                # The path actually loaded, which differs when a backend is configured
+                model_path = model_progress.get('path', model_mapping[model_name][0])
                 preload_status[model_name] = {
-                    "display_name": display_name,
+                    "display_name": model_mapping[model_name][1],
                     "path": model_path,
+                    "priority": priority,
+                    "state": model_progress.get('state', 'not_started'),
+                    "load_time": model_progress.get('load_time'),
+                    "error": model_progress.get('error'),
                     "file_exists": os.path.exists(model_path),
                     "cached": model_path in MODEL_CACHE
                 }
         
         return JSONResponse(content={
             "status": "success",
+            "running": progress['running'],
+            "complete": progress['complete'],
+            "elapsed_seconds": progress['elapsed_seconds'],
+            "counts": progress['counts'],
             "preload_status": preload_status,
             "total_cached": len(MODEL_CACHE)
         })
@@ -535,6 +623,43 @@ async def get_preload_status():
             "error": str(e)
         })
 
+@router.get("/models/registry")
+async def get_model_registry():
+    """Registered models with their input size, preprocessing, labels and version"""
+    try:
+        return JSONResponse(content={
+            "status": "success",
+            "registry": model_registry.summary()
+        })
+    except Exception as e:
+        logger.error(f"Error reading model registry: {str(e)}")
+        return JSONResponse(status_code=500, content={
+            "status": "error",
+            "error": str(e)
+        })
+
+@router.post("/models/registry/reload")
+async def reload_model_registry(request: Request, db: FirestoreDB = Depends(get_db)):
+    """Re-read the registry file now instead of waiting for the change check (admin only)"""
+    current_user = get_current_user(request, db)
+    if not current_user or current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    try:
+        changes = await run_in_threadpool(model_registry.load)
+        
+        return JSONResponse(content={
+            "status": "success",
+            "changes": changes,
+            "models": len(get_model_mapping())
+        })
+    except Exception as e:
+        logger.error(f"Error reloading model registry: {str(e)}")
+        return JSONResponse(status_code=500, content={
+            "status": "error",
+            "error": str(e)
+        })
+
 # ============================================================================
 # MAIN APPLICATION ROUTES
 # ============================================================================
@@ -686,25 +811,23 @@ async def predict_image(
             raise HTTPException(status_code=400, detail="No file uploaded")
         
         # Check file size (10MB limit)
-        MAX_FILE_SIZE = 10 * 1024 * 1024
         content = await img_path.read()
         if len(content) > MAX_FILE_SIZE:
             raise HTTPException(status_code=400, detail="File too large (max 10MB)")
         
         # Validate file type
-        allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/webp']
-        if img_path.content_type not in allowed_types:
+        if img_path.content_type not in ALLOWED_IMAGE_TYPES:
             raise HTTPException(status_code=400, detail="Invalid file type")
 
         # Ensure results directory exists
-        results_dir = "static/uploads/results"
+        results_dir = RESULTS_DIR
         os.makedirs(results_dir, exist_ok=True)
 
         # Create filename with timestamp and prediction info
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
         # Clean location for filename (remove spaces, special chars)
-        location_clean = location.replace(" ", "").replace(",", "").replace("(", "").replace(")", "")[:20] if location else "Unknown"
+        location_clean = _clean_location(location)
         
         # Generate filename
         uuid_suffix = generate_uuid_28()[:6]  # Short UUID for uniqueness
@@ -714,22 +837,23 @@ async def predict_image(
         # Full path for saving
         file_path = os.path.join(results_dir, filename)
 
-        # Save uploaded file
-        file_save_start = time.time()        
-        with open(file_path, "wb") as buffer:
-            buffer.write(content)
-        
-        file_save_time = time.time() - file_save_start
-        logger.info(f"File saved in {file_save_time:.3f}s: {filename}")
+        # Persist the upload in parallel; inference decodes straight from the request bytes
+        save_task = asyncio.create_task(_persist_upload(file_path, content))
 
         stored_image_path = file_path.replace('\\', '/')  
 
-        # Run prediction with enhanced function
-        prediction_result = predict_img(
-            model_option=model_option,
-            img_path=file_path,
-            use_cache=True
-        )
+        # Run prediction in the inference executor so the event loop stays responsive
+        try:
+            prediction_result = await inference_executor.run(
+                predict_img,
+                model_option=model_option,
+                image_bytes=content,
+                use_cache=True
+            )
+        finally:
+            # The file must be fully written before it is renamed or cleaned up
+            file_save_time = await save_task
+        logger.info(f"File saved in {file_save_time:.3f}s: {filename}")
         
         # Extract results
         predicted_class = prediction_result['predicted_class']
@@ -759,23 +883,8 @@ async def predict_image(
         classification_id = str(datetime.now().timestamp() * 1000)
 
         # Create classification entry
-        classification_entry = ClassificationEntry(
-            id=classification_id,
-            user_id=user_id,
-            user_role=current_user.role.value,
-            image_path=stored_image_path,
-            classification_result=predicted_class,
-            confidence=confidence,
-            model_used=model_option,
-            location=location,
-            timestamp=datetime.now(),
-            second_class=top_3_predictions[1]['class'] if len(top_3_predictions) > 1 else None,
-            second_confidence=top_3_predictions[1]['confidence'] if len(top_3_predictions) > 1 else None,
-            third_class=top_3_predictions[2]['class'] if len(top_3_predictions) > 2 else None,
-            third_confidence=top_3_predictions[2]['confidence'] if len(top_3_predictions) > 2 else None,
-            user_feedback=None,
-            is_correct=None,
-            correct_class=None
+        classification_entry = _build_classification_entry(
+            classification_id, current_user, stored_image_path, prediction_result, model_option, location
         )
 
         # Save to database
@@ -825,8 +934,478 @@ async def predict_image(
             except:
                 pass
         
+        # A model with every call slot busy and a full queue is a temporary condition
         return JSONResponse(
-            status_code=500,
+            status_code=503 if isinstance(e, ModelOverloadedError) else 500,
+            headers={"Retry-After": "1"} if isinstance(e, ModelOverloadedError) else None,
+            content={
+                "message": "error",
+                "error": str(e),
+                "request_time": f"{total_request_time:.3f}s"
+            }
+        )
+
+@router.post("/predict/batch")
+async def predict_image_batch(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    model_option: str = Form(...),
+    location: str = Form(...),
+    db: FirestoreDB = Depends(get_db)
+):
+    """Bulk prediction endpoint: N images, one model, batched inference and one batched DB commit"""
+    
+    request_start_time = time.time()
+    saved_files = []
+    
+    try:
+        # Validate user session
+        user_id = request.session.get('user_id')
+        if not user_id:
+            raise HTTPException(status_code=401, detail="User not authenticated")
+        
+        current_user = get_current_user(request, db)
+        if not current_user:
+            raise HTTPException(status_code=401, detail="User not found")
+        
+        if not files:
+            raise HTTPException(status_code=400, detail="No files uploaded")
+        if len(files) > MAX_BATCH_FILES:
+            raise HTTPException(status_code=400, detail=f"Too many files (max {MAX_BATCH_FILES})")
+        
+        logger.info(f"Batch prediction request from user: {user_id} ({len(files)} files, model: {model_option})")
+        
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        location_clean = _clean_location(location)
+        
+        # Validate and save every upload; invalid files are reported, not fatal
+        file_save_start = time.time()
+        items = []
+        save_tasks = []
+        for upload in files:
+            item = {"original_filename": upload.filename}
+            items.append(item)
+            
+            content = await upload.read()
+            if not upload.filename:
+                item["error"] = "No file uploaded"
+            elif len(content) > MAX_FILE_SIZE:
+                item["error"] = "File too large (max 10MB)"
+            elif upload.content_type not in ALLOWED_IMAGE_TYPES:
+                item["error"] = "Invalid file type"
+            else:
+                item["uuid_suffix"] = generate_uuid_28()[:6]
+                item["extension"] = os.path.splitext(upload.filename)[1]
+                filename = f"{timestamp}_{location_clean}_{os.path.splitext(upload.filename)[0]}_{item['uuid_suffix']}{item['extension']}"
+                item["file_path"] = os.path.join(RESULTS_DIR, filename)
+                save_tasks.append(asyncio.create_task(_persist_upload(item["file_path"], content)))
+                saved_files.append(item["file_path"])
+        await asyncio.gather(*save_tasks)
+        file_save_time = time.time() - file_save_start
+        
+        valid_items = [item for item in items if "file_path" in item]
+        if not valid_items:
+            raise HTTPException(status_code=400, detail="No valid image files uploaded")
+        
+        # One batched inference for all valid images
+        batch_result = await inference_executor.run(
+            predict_img_batch,
+            model_option=model_option,
+            img_paths=[item["file_path"] for item in valid_items],
+            use_cache=True
+        )
+        
+        # Rename files to include the prediction and build classification entries
+        batch_base_ms = datetime.now().timestamp() * 1000
+        entries = []
+        for index, (item, prediction_result) in enumerate(zip(valid_items, batch_result['results'])):
+            if 'error' in prediction_result:
+                item["error"] = prediction_result['error']
+                continue
+            
+            predicted_class_clean = prediction_result['predicted_class'].replace(" ", "").replace(",", "")
+            final_file_path = os.path.join(RESULTS_DIR, f"{timestamp}_{location_clean}_{predicted_class_clean}_{item['uuid_suffix']}{item['extension']}")
+            try:
+                os.rename(item["file_path"], final_file_path)
+                saved_files[saved_files.index(item["file_path"])] = final_file_path
+                item["file_path"] = final_file_path
+            except Exception as rename_error:
+                logger.warning(f"Could not rename file: {rename_error}")
+            
+            item["prediction"] = prediction_result
+            entry = _build_classification_entry(
+                f"{batch_base_ms:.0f}_{index}", current_user, item["file_path"].replace('\\', '/'),
+                prediction_result, model_option, location
+            )
+            item["entry"] = entry
+            entries.append(entry)
+        
+        # Single batched Firestore commit
+        db_save_start = time.time()
+        if entries:
+            await run_in_threadpool(db.save_classifications_batch, entries)
+        db_save_time = time.time() - db_save_start
+        
+        # Remove files of images that could not be classified
+        for item in items:
+            if "error" in item and item.get("file_path") and os.path.exists(item["file_path"]):
+                os.remove(item["file_path"])
+        
+        total_request_time = time.time() - request_start_time
+        
+        results = []
+        for item in items:
+            if "error" in item:
+                results.append({
+                    "success": False,
+                    "original_filename": item["original_filename"],
+                    "error": item["error"]
+                })
+                continue
+            
+            prediction_result = item["prediction"]
+            results.append({
+                "success": True,
+                "original_filename": item["original_filename"],
+                "classification_result": prediction_result['predicted_class'],
+                "confidence": f"{prediction_result['confidence']:.4f}",
+                "response": prediction_result['response_message'],
+                "result_id": item["entry"].id,
+                "image_path": item["entry"].image_path,
+                "top_3_predictions": prediction_result.get('top_3_predictions', [])
+            })
+        
+        logger.info(f"Batch prediction completed: {len(entries)}/{len(items)} images in {total_request_time:.3f}s")
+        
+        return JSONResponse(content={
+            "success": True,
+            "message": "success",
+            "total_files": len(items),
+            "classified": len(entries),
+            "failed": len(items) - len(entries),
+            "results": results,
+            "performance": {
+                **batch_result['performance_metrics'],
+                "file_save_time": f"{file_save_time:.3f}s",
+                "db_save_time": f"{db_save_time:.3f}s",
+                "total_request_time": f"{total_request_time:.3f}s"
+            }
+        })
+        
+    except HTTPException:
+        for file_path in saved_files:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        raise
+    except Exception as e:
+        total_request_time = time.time() - request_start_time
+        logger.error(f"Batch prediction failed after {total_request_time:.3f}s: {str(e)}")
+        
+        # Cleanup uploaded files
+        for file_path in saved_files:
+            try:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+            except:
+                pass
+        
+        return JSONResponse(
+            status_code=503 if isinstance(e, ModelOverloadedError) else 500,
+            headers={"Retry-After": "1"} if isinstance(e, ModelOverloadedError) else None,
+            content={
+                "message": "error",
+                "error": str(e),
+                "request_time": f"{total_request_time:.3f}s"
+            }
+        )
+
+@router.post("/predict/archive")
+async def predict_archive(
+    request: Request,
+    archive: UploadFile = File(...),
+    model_option: str = Form(...),
+    db: FirestoreDB = Depends(get_db)
+):
+    """Classify every image inside a ZIP/tar archive, streaming NDJSON results per batch"""
+    
+    # Validate user session
+    user_id = request.session.get('user_id')
+    if not user_id or not get_current_user(request, db):
+        raise HTTPException(status_code=401, detail="User not authenticated")
+    
+    if not archive.filename:
+        raise HTTPException(status_code=400, detail="No file uploaded")
+    
+    if model_option not in get_model_mapping():
+        raise HTTPException(status_code=400, detail=f"Model '{model_option}' is not available")
+    
+    logger.info(f"Archive prediction request from user: {user_id} ({archive.filename}, model: {model_option})")
+    
+    # Keep a private copy: the upload is closed once this handler returns,
+    # while the stream below keeps reading members from it
+    archive_file = tempfile.TemporaryFile()
+    try:
+        await run_in_threadpool(copy_archive_upload, archive.file, archive_file)
+        
+        # ZIP archives list their members up front; tar archives are counted while streaming
+        image_count = await run_in_threadpool(count_zip_images, archive_file)
+        if image_count is not None and image_count > ARCHIVE_MAX_MEMBERS:
+            raise ArchiveTooLargeError(f"Archive has more than {ARCHIVE_MAX_MEMBERS} images")
+    except ArchiveTooLargeError as e:
+        archive_file.close()
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception:
+        archive_file.close()
+        raise
+    
+    async def result_stream():
+        stream_start_time = time.time()
+        class_counts = {}
+        classified = 0
+        failed = 0
+        
+        try:
+            batches = classify_archive_stream(model_option, archive_file)
+            while True:
+                # Each batch (read, decode, infer) runs in the inference executor
+                batch = await inference_executor.run(next, batches, None)
+                if batch is None:
+                    break
+                
+                for item in batch:
+                    if 'error' in item:
+                        failed += 1
+                    else:
+                        classified += 1
+                        class_counts[item['predicted_class']] = class_counts.get(item['predicted_class'], 0) + 1
+                    yield json.dumps({"type": "result", **item}) + "\n"
+            
+            yield json.dumps({
+                "type": "summary",
+                "success": True,
+                "classified": classified,
+                "failed": failed,
+                "class_counts": dict(sorted(class_counts.items(), key=lambda x: x[1], reverse=True)),
+                "total_time": f"{time.time() - stream_start_time:.3f}s"
+            }) + "\n"
+            
+        except Exception as e:
+            logger.error(f"Archive prediction failed: {str(e)}")
+            yield json.dumps({
+                "type": "summary",
+                "success": False,
+                "classified": classified,
+                "failed": failed,
+                "error": str(e)
+            }) + "\n"
+        
+        finally:
+            archive_file.close()
+    
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+@router.post("/predict/tiled")
+async def predict_image_tiled(
+    request: Request,
+    img_path: UploadFile = File(...),
+    model_option: str = Form(...),
+    tile_scale: float = Form(1.0),
+    overlap: float = Form(0.25),
+    db: FirestoreDB = Depends(get_db)
+):
+    """Tiled sliding-window classification for large microscope mosaics"""
+    
+    request_start_time = time.time()
+    
+    try:
+        # Validate user session
+        user_id = request.session.get('user_id')
+        if not user_id or not get_current_user(request, db):
+            raise HTTPException(status_code=401, detail="User not authenticated")
+        
+        if not img_path.filename:
+            raise HTTPException(status_code=400, detail="No file uploaded")
+        
+        if img_path.content_type not in ALLOWED_IMAGE_TYPES:
+            raise HTTPException(status_code=400, detail="Invalid file type")
+        
+        content = await img_path.read()
+        if len(content) > MAX_FIELD_FILE_SIZE:
+            raise HTTPException(status_code=400, detail="File too large (max 50MB)")
+        
+        logger.info(f"Tiled prediction request from user: {user_id} (model: {model_option}, scale: {tile_scale}, overlap: {overlap})")
+        
+        tiled_result = await inference_executor.run(
+            predict_img_tiled,
+            model_option=model_option,
+            image_bytes=content,
+            tile_scale=tile_scale,
+            overlap=overlap
+        )
+        
+        total_request_time = time.time() - request_start_time
+        tiled_result['performance_metrics']['total_request_time'] = f"{total_request_time:.3f}s"
+        
+        return JSONResponse(content={
+            "success": True,
+            "message": "success",
+            **tiled_result
+        })
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"message": "error", "error": str(e)})
+    except Exception as e:
+        total_request_time = time.time() - request_start_time
+        logger.error(f"Tiled prediction failed after {total_request_time:.3f}s: {str(e)}")
+        return JSONResponse(
+            status_code=503 if isinstance(e, ModelOverloadedError) else 500,
+            headers={"Retry-After": "1"} if isinstance(e, ModelOverloadedError) else None,
+            content={
+                "message": "error",
+                "error": str(e),
+                "request_time": f"{total_request_time:.3f}s"
+            }
+        )
+
+@router.post("/predict/detect")
+async def predict_image_detect(
+    request: Request,
+    img_path: UploadFile = File(...),
+    model_option: str = Form(...),
+    location: str = Form(...),
+    db: FirestoreDB = Depends(get_db)
+):
+    """Detect every organism in a frame and classify all crops in one batch"""
+    
+    request_start_time = time.time()
+    
+    try:
+        # Validate user session
+        user_id = request.session.get('user_id')
+        if not user_id:
+            raise HTTPException(status_code=401, detail="User not authenticated")
+        
+        current_user = get_current_user(request, db)
+        if not current_user:
+            raise HTTPException(status_code=401, detail="User not found")
+        
+        if not img_path.filename:
+            raise HTTPException(status_code=400, detail="No file uploaded")
+        
+        content = await img_path.read()
+        if len(content) > MAX_FIELD_FILE_SIZE:
+            raise HTTPException(status_code=400, detail="File too large (max 50MB)")
+        
+        if img_path.content_type not in ALLOWED_IMAGE_TYPES:
+            raise HTTPException(status_code=400, detail="Invalid file type")
+        
+        logger.info(f"Detection request from user: {user_id} (model: {model_option})")
+        
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        location_clean = _clean_location(location)
+        uuid_suffix = generate_uuid_28()[:6]
+        file_extension = os.path.splitext(img_path.filename)[1]
+        file_path = os.path.join(RESULTS_DIR, f"{timestamp}_{location_clean}_{os.path.splitext(img_path.filename)[0]}_{uuid_suffix}{file_extension}")
+        
+        # Persist the upload in parallel with detection and classification
+        save_task = asyncio.create_task(_persist_upload(file_path, content))
+        try:
+            detection_result = await inference_executor.run(
+                predict_img_detect,
+                model_option=model_option,
+                image_bytes=content
+            )
+        finally:
+            file_save_time = await save_task
+        
+        # Name the stored frame after its dominant class
+        predicted_class_clean = detection_result['predicted_class'].replace(" ", "").replace(",", "")
+        final_file_path = os.path.join(RESULTS_DIR, f"{timestamp}_{location_clean}_{predicted_class_clean}_{uuid_suffix}{file_extension}")
+        try:
+            os.rename(file_path, final_file_path)
+            stored_image_path = final_file_path.replace('\\', '/')
+        except Exception as rename_error:
+            logger.warning(f"Could not rename file: {rename_error}")
+            stored_image_path = file_path.replace('\\', '/')
+        
+        # One parent classification plus one child document per detection
+        classification_id = str(datetime.now().timestamp() * 1000)
+        classification_entry = _build_classification_entry(
+            classification_id, current_user, stored_image_path, detection_result, model_option, location
+        )
+        classification_entry.detection_count = detection_result['detection_count']
+        
+        detection_entries = []
+        for detection in detection_result['detections']:
+            top_3_predictions = detection['top_3_predictions']
+            detection_entries.append(DetectionEntry(
+                id=f"{classification_id}_{detection['index']}",
+                classification_id=classification_id,
+                index=detection['index'],
+                bbox=detection['bbox'],
+                classification_result=detection['predicted_class'],
+                confidence=detection['confidence'],
+                second_class=top_3_predictions[1]['class'] if len(top_3_predictions) > 1 else None,
+                second_confidence=top_3_predictions[1]['confidence'] if len(top_3_predictions) > 1 else None,
+                third_class=top_3_predictions[2]['class'] if len(top_3_predictions) > 2 else None,
+                third_confidence=top_3_predictions[2]['confidence'] if len(top_3_predictions) > 2 else None
+            ))
+        
+        db_save_start = time.time()
+        doc_id = await run_in_threadpool(db.save_classification_with_detections, classification_entry, detection_entries)
+        db_save_time = time.time() - db_save_start
+        
+        total_request_time = time.time() - request_start_time
+        logger.info(f"Detection completed: {detection_result['detection_count']} organisms in {total_request_time:.3f}s")
+        
+        return JSONResponse(content={
+            "success": True,
+            "message": "success",
+            "classification_result": detection_result['predicted_class'],
+            "confidence": f"{detection_result['confidence']:.4f}",
+            "response": detection_result['response_message'],
+            "result_id": doc_id,
+            "image_path": stored_image_path,
+            "detection_count": detection_result['detection_count'],
+            "species_counts": detection_result['species_counts'],
+            "detections": [
+                {
+                    "index": detection['index'],
+                    "bbox": detection['bbox'],
+                    "classification_result": detection['predicted_class'],
+                    "confidence": detection['confidence']
+                }
+                for detection in detection_result['detections']
+            ],
+            "performance": {
+                **detection_result['performance_metrics'],
+                "file_save_time": f"{file_save_time:.3f}s",
+                "db_save_time": f"{db_save_time:.3f}s",
+                "total_request_time": f"{total_request_time:.3f}s"
+            }
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        total_request_time = time.time() - request_start_time
+        logger.error(f"Detection failed after {total_request_time:.3f}s: {str(e)}")
+        
+        # Cleanup uploaded file if it exists
+        for path in (locals().get('file_path'), locals().get('final_file_path')):
+            if path and os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        
+        return JSONResponse(
+            status_code=503 if isinstance(e, ModelOverloadedError) else 500,
+            headers={"Retry-After": "1"} if isinstance(e, ModelOverloadedError) else None,
             content={
                 "message": "error",
                 "error": str(e),
@@ -918,6 +1497,21 @@ async def get_result(
     except Exception as e:
         logger.error(f"Error loading result {result_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Error loading result")
+
+@router.get("/result/{result_id}/detections")
+async def get_result_detections(result_id: str, db: FirestoreDB = Depends(get_db)):
+    """Detections stored under a field-image result, in detection order"""
+    classification = db.get_classification_by_id(result_id)
+    if not classification:
+        raise HTTPException(status_code=404, detail="Result not found")
+    
+    detections = db.get_detections_by_classification_id(result_id)
+    return JSONResponse(content={
+        "status": "success",
+        "result_id": result_id,
+        "count": len(detections),
+        "detections": [detection.to_dict() for detection in detections]
+    })
     
 @router.get("/feedback/{result_id}", response_class=HTMLResponse)
 async def expert_feedback_page(
@@ -0,0 +1,191 @@
+"""CPU-topology-aware thread layout for inference.
+
+TensorFlow sizes its intra-op and inter-op thread pools for the whole machine, so
+several web or inference worker processes on one host oversubscribe the cores.
+The layout here splits the CPUs actually available (affinity mask and cgroup CPU
+quota) between the processes that run inference:
+
+- TensorFlow intra-op threads = the process' share of the CPUs (TFLite and ONNX
+  Runtime follow it unless TFLITE_NUM_THREADS / ONNX_NUM_THREADS are set)
+- inter-op threads = 1, or 2 once a process has 8 or more CPUs
+- INFERENCE_CPU_AFFINITY=process pins each worker process to its own cores,
+  =thread additionally pins each inference executor thread to one of them
+
+TF_INTRA_OP_THREADS and TF_INTER_OP_THREADS override the computed counts. The layout
+is computed on first use (the first TensorFlow import, TFLite or ONNX model), so
+it is planned in the process that runs inference, never in a pre-fork parent.
+GET /api/system-info shows the layout and the counts TensorFlow actually uses; scripts/sweep_thread_layout.py compares layouts.
+"""
+import os
+import math
+import logging
+import itertools
+import threading
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_CPU_AFFINITY = os.getenv("INFERENCE_CPU_AFFINITY", "none").lower()  # none | process | thread
+TF_INTRA_OP_THREADS = int(os.getenv("TF_INTRA_OP_THREADS", "0"))  # 0 derives it from the CPU share
+TF_INTER_OP_THREADS = int(os.getenv("TF_INTER_OP_THREADS", "0"))
+
+_layout = None
+_tensorflow_threads = None  # counts read back from TensorFlow once applied
+_layout_lock = threading.Lock()
+_thread_cpus = itertools.count()
+
+def _cgroup_cpu_quota() -> Optional[float]:
+    """CPUs allowed by the cgroup quota (v2 cpu.max or v1 cfs), None when unlimited"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max", "r") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "r") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us", "r") as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+
+    return None
+
+def detect_cpu_topology() -> Dict[str, Any]:
+    """Logical cores, the cores this process may run on, and the cgroup quota"""
+    logical = os.cpu_count() or 1
+    if hasattr(os, "sched_getaffinity"):
+        allowed = sorted(os.sched_getaffinity(0))
+    else:
+        allowed = list(range(logical))
+
+    quota = _cgroup_cpu_quota()
+    effective = len(allowed) if quota is None else max(1, min(len(allowed), math.floor(quota)))
+
+    return {
+        "logical_cpus": logical,
+        "allowed_cpus": allowed,
+        "cgroup_cpu_quota": quota,
+        "effective_cpus": effective
+    }
+
+def _inference_processes() -> int:
+    """Processes on this host that run inference concurrently"""
+    web_workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+    from inference_workers import INFERENCE_MODE, PROCESS_WORKERS
+    if INFERENCE_MODE == "process" or os.getenv("INFERENCE_WORKER_INDEX") is not None:
+        return web_workers * max(1, PROCESS_WORKERS)
+    return web_workers
+
+def _claim_worker_index(processes: int) -> Optional[int]:
+    """This process' slot among the inference processes, None when it cannot be known.
+
+    Gunicorn (post_fork) and the inference worker pool set it explicitly; uvicorn
+    workers take the next slot from a counter file shared through WEB_MASTER_PID.
+    """
+    if processes <= 1:
+        return 0
+
+    web_index = os.getenv("WEB_WORKER_INDEX")
+    if web_index is None:
+        master_pid = os.getenv("WEB_MASTER_PID")
+        if master_pid is None or master_pid == str(os.getpid()):
+            return None
+        try:
+            import fcntl
+            counter_path = os.path.join("/tmp", f"planktoscan-workers-{master_pid}")
+            with open(counter_path, "a+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.seek(0)
+                claimed = int(f.read() or 0)
+                f.seek(0)
+                f.truncate()
+                f.write(str(claimed + 1))
+        except (ImportError, OSError, ValueError) as e:
+            logger.warning(f"Could not claim a worker slot for CPU affinity: {e}")
+            return None
+        web_index = str(claimed)
+        os.environ["WEB_WORKER_INDEX"] = web_index
+
+    index = int(web_index)
+    worker_index = os.getenv("INFERENCE_WORKER_INDEX")
+    if worker_index is not None:
+        from inference_workers import PROCESS_WORKERS
+        index = index * max(1, PROCESS_WORKERS) + int(worker_index)
+    return index % processes
+
+def plan_thread_layout(topology: Dict[str, Any], processes: int, worker_index: Optional[int] = None) -> Dict[str, Any]:
+    """Thread counts and CPU set for one of `processes` inference processes"""
+    share = max(1, topology["effective_cpus"] // max(1, processes))
+    inter_op = TF_INTER_OP_THREADS or (2 if share >= 8 else 1)
+    intra_op = TF_INTRA_OP_THREADS or share
+
+    cpus = None
+    allowed = topology["allowed_cpus"]
+    if INFERENCE_CPU_AFFINITY in ("process", "thread") and worker_index is not None and share * processes <= len(allowed):
+        cpus = allowed[worker_index * share:(worker_index + 1) * share]
+
+    return {
+        **topology,
+        "inference_processes": processes,
+        "worker_index": worker_index,
+        "cpus_per_process": share,
+        "intra_op_threads": intra_op,
+        "inter_op_threads": inter_op,
+        "affinity": INFERENCE_CPU_AFFINITY,
+        "process_cpus": cpus
+    }
+
+def configure_process(force: bool = False) -> Dict[str, Any]:
+    """Compute this process' layout once and pin it to its CPUs if affinity is on"""
+    global _layout
+    with _layout_lock:
+        if _layout is not None and not force:
+            return _layout
+
+        processes = _inference_processes()
+        _layout = plan_thread_layout(detect_cpu_topology(), processes, _claim_worker_index(processes))
+
+        if _layout["process_cpus"] and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, _layout["process_cpus"])
+
+        logger.info(
+            f"Thread layout: {_layout['effective_cpus']} CPUs / {processes} processes -> "
+            f"intra_op={_layout['intra_op_threads']} inter_op={_layout['inter_op_threads']} "
+            f"cpus={_layout['process_cpus'] or 'any'}"
+        )
+        return _layout
+
+def get_thread_layout() -> Dict[str, Any]:
+    return {**configure_process(), "tensorflow_threads": _tensorflow_threads}
+
+def apply_tensorflow_threading(tf):
+    """Size TensorFlow's thread pools (must run before its first op) and record what it uses"""
+    global _tensorflow_threads
+    layout = configure_process()
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(layout["intra_op_threads"])
+        tf.config.threading.set_inter_op_parallelism_threads(layout["inter_op_threads"])
+    except RuntimeError as e:
+        logger.warning(f"TensorFlow already initialized, thread layout not applied: {e}")
+
+    # 0 means TensorFlow chose the count itself
+    _tensorflow_threads = {
+        "intra_op_threads": tf.config.threading.get_intra_op_parallelism_threads(),
+        "inter_op_threads": tf.config.threading.get_inter_op_parallelism_threads()
+    }
+
+def pin_current_thread():
+    """Executor thread initializer: pin the thread to one of the process' CPUs"""
+    cpus = configure_process()["process_cpus"]
+    if INFERENCE_CPU_AFFINITY != "thread" or not cpus or not hasattr(os, "sched_setaffinity"):
+        return
+    # On Linux, pid 0 is the calling thread
+    os.sched_setaffinity(0, [cpus[next(_thread_cpus) % len(cpus)]])
@@ -0,0 +1,74 @@
+"""Measure how prediction latency scales with concurrent requests on the same model.
+
+Each level runs that many threads calling predict_raw() on one model option and
+reports latency percentiles and throughput, followed by the model's call-slot
+statistics (capacity reached, wait and run time per concurrency level):
+
+    python -m scripts.benchmark_concurrency --models efficientnetv2b0 --levels 1 2 4 8 16
+    MODEL_CALL_SLOTS_MAX=1 python -m scripts.benchmark_concurrency   # single-slot baseline
+"""
+import json
+import time
+import logging
+import argparse
+import threading
+
+import numpy as np
+
+from utils import (
+    cache_manager, get_input_size, predict_raw, _resolve_model_option, load_model_single_flight
+)
+
+logging.basicConfig(level=logging.WARNING)
+logging.getLogger("utils").setLevel(logging.WARNING)
+
+def run_level(model_option: str, concurrency: int, requests_per_thread: int, use_batching: bool):
+    """Latencies (seconds) of every request at one concurrency level, and the wall time"""
+    _, model_name = _resolve_model_option(model_option)
+    input_size = get_input_size(model_name)
+    sample = np.random.random((1, input_size, input_size, 3)).astype(np.float32)
+
+    latencies = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(concurrency)
+
+    def client():
+        start_barrier.wait()
+        for _ in range(requests_per_thread):
+            start = time.time()
+            predict_raw(model_option, sample, use_batching=use_batching)
+            with lock:
+                latencies.append(time.time() - start)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    wall_start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.time() - wall_start
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency by concurrency level per model")
+    parser.add_argument("--models", nargs="+", default=["efficientnetv2b0"], help="Model options to benchmark")
+    parser.add_argument("--levels", nargs="+", type=int, default=[1, 2, 4, 8], help="Concurrent clients per level")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per client and level")
+    parser.add_argument("--no-batching", action="store_true", help="Bypass the micro-batching scheduler")
+    args = parser.parse_args()
+
+    for model_option in args.models:
+        model_path, _ = _resolve_model_option(model_option)
+        load_model_single_flight(model_path)
+
+        print(f"\n{model_option} ({'unbatched' if args.no_batching else 'batched'})")
+        print(f"{'clients':>7s} {'p50 ms':>8s} {'p95 ms':>8s} {'max ms':>8s} {'req/s':>8s}")
+        for concurrency in args.levels:
+            latencies, wall_time = run_level(model_option, concurrency, args.requests, not args.no_batching)
+            latencies_ms = np.array(latencies) * 1000
+            print(f"{concurrency:7d} {np.percentile(latencies_ms, 50):8.1f} {np.percentile(latencies_ms, 95):8.1f} "
+                  f"{latencies_ms.max():8.1f} {len(latencies) / wall_time:8.1f}")
+
+        print(json.dumps(cache_manager.call_slots_for(model_path).get_stats(), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Convert the mobile model family to quantized TFLite models.
+
+Writes a dynamic-range and (with calibration images) a full-int8 variant of each
+model next to each other in TFLITE_MODEL_DIR:
+
+    python -m scripts.convert_tflite --calibration-dir static/uploads/results
+
+Enable a variant at runtime with e.g. MODEL_BACKENDS="mobilenetv3_small=tflite-int8".
+"""
+import os
+import glob
+import logging
+import argparse
+
+import cv2
+import tensorflow as tf
+
+from utils import (
+    TFLITE_MODEL_DIR, TFLITE_MODEL_OPTIONS, get_preprocess_function,
+    get_model_mapping, get_input_size, get_backend_path, _resize_to_input_array
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CALIBRATION_EXTENSIONS = ('*.jpg', '*.jpeg', '*.png', '*.webp')
+
+def _calibration_images(calibration_dir: str, limit: int):
+    """Paths of up to `limit` calibration images"""
+    paths = []
+    for extension in CALIBRATION_EXTENSIONS:
+        paths.extend(glob.glob(os.path.join(calibration_dir, '**', extension), recursive=True))
+    return sorted(paths)[:limit]
+
+def _representative_dataset(model_name: str, image_paths):
+    """Yield preprocessed calibration samples exactly as the server feeds the model"""
+    preprocess_func = get_preprocess_function(model_name)
+    input_size = get_input_size(model_name)
+
+    def generator():
+        for path in image_paths:
+            image = cv2.imread(path)
+            if image is None:
+                logger.warning(f"Skipping unreadable calibration image: {path}")
+                continue
+            yield [preprocess_func(_resize_to_input_array(image, input_size))]
+
+    return generator
+
+def convert_model(model_option: str, calibration_images=None):
+    """Convert one model option; returns {variant: (path, size_mb)}"""
+    model_path, model_name = get_model_mapping()[model_option]
+    logger.info(f"Converting {model_option}: {model_path}")
+
+    model = tf.keras.models.load_model(model_path, compile=False)
+    outputs = {}
+
+    # Dynamic range: int8 weights, float activations, no calibration needed
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    outputs['dynamic'] = converter.convert()
+
+    # Full int8: weights and activations, calibrated on real plankton images
+    if calibration_images:
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = _representative_dataset(model_name, calibration_images)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+        outputs['int8'] = converter.convert()
+    else:
+        logger.warning(f"No calibration images, skipping int8 conversion of {model_option}")
+
+    written = {}
+    for variant, content in outputs.items():
+        output_path = get_backend_path(model_path, f"tflite-{variant}")
+        with open(output_path, 'wb') as f:
+            f.write(content)
+        written[variant] = (output_path, len(content) / (1024 * 1024))
+        logger.info(f"Wrote {output_path} ({written[variant][1]:.1f}MB)")
+
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert mobile models to quantized TFLite")
+    parser.add_argument("--models", nargs="+", default=list(TFLITE_MODEL_OPTIONS), help="Model options to convert")
+    parser.add_argument("--calibration-dir", help="Directory of sample images for int8 calibration")
+    parser.add_argument("--calibration-samples", type=int, default=200, help="Number of calibration images")
+    args = parser.parse_args()
+
+    os.makedirs(TFLITE_MODEL_DIR, exist_ok=True)
+    calibration_images = _calibration_images(args.calibration_dir, args.calibration_samples) if args.calibration_dir else []
+    logger.info(f"Using {len(calibration_images)} calibration images")
+
+    for model_option in args.models:
+        try:
+            for variant, (path, size_mb) in convert_model(model_option, calibration_images).items():
+                print(f"{model_option:20s} {variant:8s} {size_mb:7.1f}MB  {path}")
+        except Exception as e:
+            logger.error(f"Conversion failed for {model_option}: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Export classification models to ONNX and check parity against TensorFlow.
+
+    python -m scripts.export_onnx                        # every model in get_model_mapping()
+    python -m scripts.export_onnx --models efficientnetv2b0 resnet50 --samples-dir static/uploads/results
+
+Each export is followed by a parity check: the same inputs go through the TF model
+and through ONNX Runtime, and the max absolute difference and top-1 agreement are
+reported. Select the backend at runtime with MODEL_BACKENDS="efficientnetv2b0=onnx".
+"""
+import os
+import glob
+import time
+import logging
+import argparse
+
+import cv2
+import numpy as np
+import tensorflow as tf
+
+from utils import (
+    ONNX_MODEL_DIR, get_preprocess_function,
+    get_model_mapping, get_input_size, get_backend_path, _load_backend, _resize_to_input_array,
+    OnnxBackend
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ONNX_OPSET = 17
+SAMPLE_EXTENSIONS = ('*.jpg', '*.jpeg', '*.png', '*.webp')
+
+def _parity_inputs(model_name: str, samples_dir: str = None, count: int = 16):
+    """Preprocessed parity inputs: real images when available, random ones otherwise"""
+    input_size = get_input_size(model_name)
+    preprocess_func = get_preprocess_function(model_name)
+
+    paths = []
+    if samples_dir:
+        for extension in SAMPLE_EXTENSIONS:
+            paths.extend(glob.glob(os.path.join(samples_dir, '**', extension), recursive=True))
+
+    images = [cv2.imread(path) for path in sorted(paths)[:count]]
+    images = [image for image in images if image is not None]
+    if not images:
+        images = [np.random.randint(0, 256, (input_size, input_size, 3), dtype=np.uint8) for _ in range(count)]
+
+    return preprocess_func(np.concatenate([_resize_to_input_array(image, input_size) for image in images], axis=0))
+
+def _export(model_path: str, model_name: str, output_path: str):
+    """Convert a .keras model or a SavedModel directory to ONNX"""
+    import tf2onnx
+
+    input_size = get_input_size(model_name)
+    backend, _ = _load_backend(model_path)
+
+    if backend.name == "keras":
+        input_signature = [tf.TensorSpec((None, input_size, input_size, 3), tf.float32, name="input")]
+        tf2onnx.convert.from_keras(backend.model, input_signature=input_signature, opset=ONNX_OPSET, output_path=output_path)
+    else:
+        # SavedModel: convert the serving signature with a dynamic batch dimension
+        input_signature = [tf.TensorSpec((None, input_size, input_size, 3), tf.float32, name=backend.input_name)]
+        serving = tf.function(lambda x: backend.signature(**{backend.input_name: x}), input_signature=input_signature)
+        tf2onnx.convert.from_function(serving, input_signature=input_signature, opset=ONNX_OPSET, output_path=output_path)
+
+    return backend
+
+def export_model(model_option: str, samples_dir: str = None, atol: float = 1e-3):
+    """Export one model option and check parity; returns a report dict"""
+    model_path, model_name = get_model_mapping()[model_option]
+    output_path = get_backend_path(model_path, "onnx")
+    logger.info(f"Exporting {model_option}: {model_path} -> {output_path}")
+
+    tf_backend = _export(model_path, model_name, output_path)
+    onnx_backend = OnnxBackend(output_path)
+
+    inputs = _parity_inputs(model_name, samples_dir)
+
+    start = time.time()
+    tf_outputs = np.asarray(tf_backend.run(inputs))
+    tf_time = time.time() - start
+
+    start = time.time()
+    onnx_outputs = np.asarray(onnx_backend.run(inputs))
+    onnx_time = time.time() - start
+
+    max_abs_diff = float(np.max(np.abs(tf_outputs - onnx_outputs)))
+    top1_agreement = float(np.mean(np.argmax(tf_outputs, axis=1) == np.argmax(onnx_outputs, axis=1)))
+
+    return {
+        'model': model_option,
+        'path': output_path,
+        'size_mb': os.path.getsize(output_path) / (1024 * 1024),
+        'max_abs_diff': max_abs_diff,
+        'top1_agreement': top1_agreement,
+        'tf_time': tf_time,
+        'onnx_time': onnx_time,
+        'passed': max_abs_diff <= atol and top1_agreement == 1.0
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Export models to ONNX with a TF parity check")
+    parser.add_argument("--models", nargs="+", default=list(get_model_mapping().keys()), help="Model options to export")
+    parser.add_argument("--samples-dir", help="Directory of sample images for the parity check")
+    parser.add_argument("--atol", type=float, default=1e-3, help="Max allowed absolute probability difference")
+    args = parser.parse_args()
+
+    os.makedirs(ONNX_MODEL_DIR, exist_ok=True)
+
+    failed = []
+    for model_option in args.models:
+        try:
+            report = export_model(model_option, args.samples_dir, args.atol)
+        except Exception as e:
+            logger.error(f"Export failed for {model_option}: {e}")
+            failed.append(model_option)
+            continue
+
+        status = "OK" if report['passed'] else "MISMATCH"
+        print(f"{model_option:20s} {status:8s} max_diff={report['max_abs_diff']:.2e} "
+              f"top1={report['top1_agreement']:.0%} tf={report['tf_time']:.3f}s onnx={report['onnx_time']:.3f}s "
+              f"{report['size_mb']:.1f}MB")
+        if not report['passed']:
+            failed.append(model_option)
+
+    if failed:
+        raise SystemExit(f"Export or parity check failed for: {', '.join(failed)}")
+
+if __name__ == "__main__":
+    main()
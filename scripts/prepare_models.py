@@ -0,0 +1,137 @@
+"""Prepare every classification model for fast cold starts and write the load manifest.
+
+For each entry in get_model_mapping() this measures the server's trial-and-error
+load path, then the candidate formats:
+
+- keras: the .keras file loaded directly with compile=False
+- savedmodel: an inference-only SavedModel (exported from .keras, or the source directory)
+
+The fastest working format is recorded in MODEL_MANIFEST_PATH together with its
+input size, preprocessing function and checksum, so _load_backend goes straight
+to the right loader:
+
+    python -m scripts.prepare_models
+    python -m scripts.prepare_models --models efficientnetv2b0 vit --repeats 3
+"""
+import os
+import gc
+import json
+import time
+import logging
+import argparse
+from datetime import datetime
+
+import numpy as np
+import tensorflow as tf
+
+import utils
+from utils import (
+    MODEL_MANIFEST_PATH, PREPARED_MODEL_DIR, model_registry,
+    get_model_mapping, get_input_size, _get_model_version, _load_backend
+)
+from model_registry import file_checksum
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _timed(load, repeats: int):
+    """Best-of-N load time in seconds and the last loaded object"""
+    best, loaded = None, None
+    for _ in range(repeats):
+        loaded = None
+        gc.collect()
+        start = time.time()
+        loaded = load()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, loaded
+
+def _export_inference_savedmodel(model, input_size: int, output_dir: str):
+    """Save only the forward pass with a fixed (None, size, size, 3) signature"""
+    spec = tf.TensorSpec((None, input_size, input_size, 3), tf.float32, name="input")
+    serve = tf.function(lambda x: {"predictions": model(x, training=False)}, input_signature=[spec])
+    tf.saved_model.save(model, output_dir, signatures={"serving_default": serve.get_concrete_function()})
+
+def prepare_model(model_option: str, repeats: int = 2):
+    """Measure candidate formats for one model option; returns its manifest entry"""
+    source, model_name = get_model_mapping()[model_option]
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"Model file not found: {source}")
+
+    input_size = get_input_size(model_name)
+    logger.info(f"Preparing {model_option}: {source}")
+
+    # Baseline: what the server does without a manifest
+    original_seconds, _ = _timed(lambda: _load_backend(source), repeats)
+
+    candidates = {}
+    if os.path.isfile(source):
+        keras_seconds, keras_model = _timed(lambda: tf.keras.models.load_model(source, compile=False), repeats)
+        candidates["keras"] = (source, keras_seconds)
+
+        # Inference-only SavedModel exported from the Keras model, checked for parity
+        output_dir = os.path.join(PREPARED_MODEL_DIR, os.path.splitext(os.path.basename(source))[0])
+        _export_inference_savedmodel(keras_model, input_size, output_dir)
+        savedmodel_seconds, exported = _timed(lambda: tf.saved_model.load(output_dir), repeats)
+
+        sample = np.random.random((2, input_size, input_size, 3)).astype(np.float32)
+        expected = keras_model(sample, training=False).numpy()
+        actual = exported.signatures["serving_default"](input=tf.constant(sample))["predictions"].numpy()
+        if np.allclose(expected, actual, atol=1e-4):
+            candidates["savedmodel"] = (output_dir, savedmodel_seconds)
+        else:
+            logger.warning(f"Exported SavedModel for {model_option} does not match the Keras model, skipping it")
+    else:
+        savedmodel_seconds, _ = _timed(lambda: tf.saved_model.load(source), repeats)
+        candidates["savedmodel"] = (source, savedmodel_seconds)
+
+    artifact_format = min(candidates, key=lambda name: candidates[name][1])
+    artifact_path, load_seconds = candidates[artifact_format]
+
+    return {
+        "source": source,
+        "source_version": _get_model_version(source),
+        "path": artifact_path,
+        "format": artifact_format,
+        "input_size": input_size,
+        "preprocessing": model_registry.get(model_option)['preprocessing'],
+        "checksum": file_checksum(artifact_path),
+        "load_seconds": {name: round(seconds, 3) for name, (_, seconds) in candidates.items()},
+        "original_load_seconds": round(original_seconds, 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Prepare fast-loading model artifacts and the load manifest")
+    parser.add_argument("--models", nargs="+", default=list(get_model_mapping().keys()), help="Model options to prepare")
+    parser.add_argument("--repeats", type=int, default=2, help="Loads per format (best time is kept)")
+    args = parser.parse_args()
+
+    # Measure the un-prepared load path, whatever an existing manifest says
+    utils._manifest_entries = {}
+    os.makedirs(PREPARED_MODEL_DIR, exist_ok=True)
+
+    manifest = {"models": {}}
+    if os.path.exists(MODEL_MANIFEST_PATH):
+        with open(MODEL_MANIFEST_PATH, 'r') as f:
+            manifest = json.load(f)
+
+    print(f"{'model':20s} {'before':>8s} {'format':>11s} {'after':>8s} {'speedup':>8s}")
+    for model_option in args.models:
+        try:
+            entry = prepare_model(model_option, args.repeats)
+        except Exception as e:
+            logger.error(f"Preparation failed for {model_option}: {e}")
+            continue
+
+        manifest["models"][model_option] = entry
+        after = entry["load_seconds"][entry["format"]]
+        print(f"{model_option:20s} {entry['original_load_seconds']:7.2f}s {entry['format']:>11s} "
+              f"{after:7.2f}s {entry['original_load_seconds'] / max(after, 1e-3):7.1f}x")
+
+    manifest["generated_at"] = datetime.utcnow().isoformat()
+    with open(MODEL_MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    logger.info(f"Wrote {MODEL_MANIFEST_PATH} with {len(manifest['models'])} models")
+
+if __name__ == "__main__":
+    main()
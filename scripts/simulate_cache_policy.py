@@ -0,0 +1,108 @@
+"""Replay logged prediction requests against each model cache policy.
+
+Reads the admin CSV export (/admin/export, "Model Used" column) or a plain text
+file with one model option per line, and reports hit rate and total reload time
+for every policy at the given budget:
+
+    python -m scripts.simulate_cache_policy classifications.csv --budget-mb 2048
+
+Model sizes come from the files on disk when present. Reload times are estimated
+from size unless given with --profile, a JSON file like
+{"resnet101": {"size_mb": 170, "load_seconds": 6.5}}.
+"""
+import os
+import csv
+import json
+import logging
+import argparse
+
+from utils import (
+    EVICTION_POLICIES, ModelCacheManager, get_model_mapping, _path_size_bytes
+)
+
+logging.basicConfig(level=logging.WARNING)
+logging.getLogger("utils").setLevel(logging.WARNING)
+
+DEFAULT_SIZE_MB = 100.0
+
+def load_requests(log_path: str):
+    """Model options in chronological order"""
+    if not log_path.endswith('.csv'):
+        with open(log_path, 'r') as f:
+            return [line.strip() for line in f if line.strip()]
+
+    with open(log_path, 'r', newline='') as f:
+        rows = [row for row in csv.DictReader(f) if row.get("Model Used")]
+
+    # The admin export is newest first
+    if rows and rows[0].get("Created At"):
+        rows.sort(key=lambda row: row["Created At"])
+    else:
+        rows.reverse()
+    return [row["Model Used"] for row in rows]
+
+def build_profile(model_options, profile_path: str = None, load_mb_per_second: float = 50.0):
+    """Size (bytes) and reload time (seconds) per model option"""
+    overrides = {}
+    if profile_path:
+        with open(profile_path, 'r') as f:
+            overrides = json.load(f)
+
+    model_mapping = get_model_mapping()
+    profile = {}
+    for option in set(model_options):
+        size_mb = DEFAULT_SIZE_MB
+        if option in model_mapping and os.path.exists(model_mapping[option][0]):
+            size_mb = _path_size_bytes(model_mapping[option][0]) / (1024 * 1024)
+
+        override = overrides.get(option, {})
+        size_mb = override.get("size_mb", size_mb)
+        load_seconds = override.get("load_seconds", 0.5 + size_mb / load_mb_per_second)
+        profile[option] = (int(size_mb * 1024 * 1024), load_seconds)
+    return profile
+
+def simulate(policy: str, requests, profile, budget_mb: float):
+    """Replay requests through a ModelCacheManager with the given policy"""
+    manager = ModelCacheManager(budget_mb=budget_mb, policy=policy, cache={}, collect_garbage=False)
+    reload_seconds = 0.0
+
+    for option in requests:
+        if manager.get_from_cache(option) is not None:
+            continue
+        cost_bytes, load_seconds = profile[option]
+        reload_seconds += load_seconds
+        manager.add_to_cache(option, object(), cost_bytes=cost_bytes, load_duration=load_seconds)
+
+    lookups = manager.hits + manager.misses
+    return {
+        'policy': policy,
+        'hits': manager.hits,
+        'misses': manager.misses,
+        'hit_rate': manager.hits / lookups if lookups else 0.0,
+        'reload_seconds': reload_seconds,
+        'evictions': manager.evictions,
+        'rejected': manager.rejected
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare model cache policies on logged requests")
+    parser.add_argument("log", help="Admin CSV export or text file with one model option per line")
+    parser.add_argument("--budget-mb", type=float, default=2048, help="Model cache budget")
+    parser.add_argument("--profile", help="JSON file with size_mb/load_seconds per model option")
+    parser.add_argument("--load-mb-per-second", type=float, default=50.0, help="Reload speed used when no profile is given")
+    args = parser.parse_args()
+
+    requests = load_requests(args.log)
+    if not requests:
+        raise SystemExit(f"No requests found in {args.log}")
+    profile = build_profile(requests, args.profile, args.load_mb_per_second)
+
+    print(f"{len(requests)} requests, {len(profile)} models, budget {args.budget_mb:.0f}MB\n")
+    print(f"{'policy':8s} {'hit rate':>9s} {'misses':>7s} {'reload s':>9s} {'evictions':>10s} {'rejected':>9s}")
+    for policy in EVICTION_POLICIES:
+        result = simulate(policy, requests, profile, args.budget_mb)
+        print(f"{result['policy']:8s} {result['hit_rate']:9.1%} {result['misses']:7d} "
+              f"{result['reload_seconds']:9.1f} {result['evictions']:10d} {result['rejected']:9d}")
+
+if __name__ == "__main__":
+    main()
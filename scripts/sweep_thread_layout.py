@@ -0,0 +1,117 @@
+"""Sweep TensorFlow thread layouts and report the one with the best throughput.
+
+TensorFlow's thread pools cannot be resized once it is initialized, so every
+layout runs in fresh processes. --processes starts that many concurrently to
+reproduce several workers sharing the host:
+
+    python -m scripts.sweep_thread_layout --model efficientnetv2b0 --processes 4
+    python -m scripts.sweep_thread_layout --layouts 1:1 2:1 4:1 4:2 --affinity process
+
+Apply the winner with TF_INTRA_OP_THREADS / TF_INTER_OP_THREADS (and
+INFERENCE_CPU_AFFINITY), or keep the computed default if it wins.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+import numpy as np
+
+from runtime_config import detect_cpu_topology
+
+def _default_layouts(cpus_per_process: int):
+    """Powers of two up to the per-process share, with one and two inter-op threads"""
+    intra_options = sorted({1, cpus_per_process} | {2 ** i for i in range(1, 8) if 2 ** i < cpus_per_process})
+    return [(intra, inter) for intra in intra_options for inter in (1, 2) if inter <= max(1, intra)]
+
+def run_one(args):
+    """Child mode: benchmark one model under the layout given by the environment"""
+    from utils import _resolve_model_option, load_model_single_flight, get_thread_layout
+    from scripts.benchmark_concurrency import run_level
+
+    model_path, _ = _resolve_model_option(args.model)
+    load_model_single_flight(model_path)
+    run_level(args.model, args.clients, 2, use_batching=True)  # warm-up
+
+    latencies, wall_time = run_level(args.model, args.clients, args.requests, use_batching=True)
+    latencies_ms = np.array(latencies) * 1000
+    print(json.dumps({
+        "throughput": len(latencies) / wall_time,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "process_cpus": get_thread_layout()["process_cpus"]
+    }))
+
+def run_layout(args, intra: int, inter: int):
+    """Run --processes children with one layout; returns aggregate throughput and worst p99"""
+    children = []
+    for index in range(args.processes):
+        env = {
+            **os.environ,
+            "TF_INTRA_OP_THREADS": str(intra),
+            "TF_INTER_OP_THREADS": str(inter),
+            "INFERENCE_CPU_AFFINITY": args.affinity,
+            "WEB_CONCURRENCY": str(args.processes),
+            "WEB_WORKER_INDEX": str(index)
+        }
+        command = [sys.executable, "-m", "scripts.sweep_thread_layout", "--run-one",
+                   "--model", args.model, "--clients", str(args.clients), "--requests", str(args.requests)]
+        children.append(subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True))
+
+    results = []
+    for child in children:
+        output, _ = child.communicate()
+        if child.returncode != 0:
+            raise RuntimeError(f"Benchmark process failed for layout {intra}:{inter}")
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    return {
+        "throughput": sum(result["throughput"] for result in results),
+        "p50_ms": max(result["p50_ms"] for result in results),
+        "p99_ms": max(result["p99_ms"] for result in results)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the TensorFlow thread layout with the best throughput")
+    parser.add_argument("--model", default="efficientnetv2b0", help="Model option to benchmark")
+    parser.add_argument("--processes", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")), help="Concurrent worker processes")
+    parser.add_argument("--clients", type=int, default=4, help="Concurrent clients per process")
+    parser.add_argument("--requests", type=int, default=25, help="Requests per client")
+    parser.add_argument("--layouts", nargs="+", help="intra:inter pairs (default: a sweep up to the per-process CPU share)")
+    parser.add_argument("--affinity", default="none", choices=["none", "process", "thread"], help="CPU pinning during the sweep")
+    parser.add_argument("--run-one", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        run_one(args)
+        return
+
+    topology = detect_cpu_topology()
+    cpus_per_process = max(1, topology["effective_cpus"] // max(1, args.processes))
+    if args.layouts:
+        layouts = [tuple(int(value) for value in layout.split(":")) for layout in args.layouts]
+    else:
+        layouts = _default_layouts(cpus_per_process)
+
+    print(f"{topology['effective_cpus']} effective CPUs (quota {topology['cgroup_cpu_quota'] or 'none'}), "
+          f"{args.processes} processes x {args.clients} clients, {cpus_per_process} CPUs per process\n")
+    print(f"{'intra':>5s} {'inter':>5s} {'req/s':>8s} {'p50 ms':>8s} {'p99 ms':>8s}")
+
+    best = None
+    for intra, inter in layouts:
+        try:
+            result = run_layout(args, intra, inter)
+        except RuntimeError as e:
+            print(f"{intra:5d} {inter:5d} failed: {e}")
+            continue
+        print(f"{intra:5d} {inter:5d} {result['throughput']:8.1f} {result['p50_ms']:8.1f} {result['p99_ms']:8.1f}")
+        if best is None or result["throughput"] > best[2]["throughput"]:
+            best = (intra, inter, result)
+
+    if best is None:
+        raise SystemExit("Every layout failed")
+    print(f"\nBest: TF_INTRA_OP_THREADS={best[0]} TF_INTER_OP_THREADS={best[1]} ({best[2]['throughput']:.1f} req/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Refresh checksums and versions in the model registry and list unregistered models.
+
+    python -m scripts.update_registry                 # checksum every registered model file
+    python -m scripts.update_registry --add           # also register new files in model/classification
+
+A model whose file content changed gets its checksum updated and its version
+bumped, which also invalidates its cached prediction results. New files are added
+with the default input size and preprocessing; review those entries before
+relying on them. The running server picks up the edited file without a restart.
+"""
+import os
+import json
+import logging
+import argparse
+
+from model_registry import (
+    DEFAULT_INPUT_SIZE, DEFAULT_PREPROCESSING, DEFAULT_LABELS_PATH, file_checksum, infer_format, model_stem
+)
+from utils import MODEL_REGISTRY_PATH
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODEL_DIR = "model/classification"
+MODEL_EXTENSIONS = (".keras", ".h5", ".onnx", ".tflite")
+
+def _bump(version: str) -> str:
+    return str(int(version) + 1) if str(version).isdigit() else f"{version}.1"
+
+def _unregistered_models(models):
+    """Model files and SavedModel directories in MODEL_DIR that no entry points at"""
+    registered = {os.path.normpath(entry['path']) for entry in models.values()}
+    found = []
+    for name in sorted(os.listdir(MODEL_DIR)) if os.path.isdir(MODEL_DIR) else []:
+        path = os.path.join(MODEL_DIR, name)
+        is_savedmodel = os.path.isdir(path) and os.path.exists(os.path.join(path, "saved_model.pb"))
+        if (is_savedmodel or name.endswith(MODEL_EXTENSIONS)) and os.path.normpath(path) not in registered:
+            found.append(path)
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh model registry checksums and versions")
+    parser.add_argument("--add", action="store_true", help=f"Register model files found in {MODEL_DIR}")
+    args = parser.parse_args()
+
+    with open(MODEL_REGISTRY_PATH, 'r') as f:
+        registry = json.load(f)
+    models = registry.setdefault("models", {})
+
+    print(f"{'model':20s} {'status':10s} {'version':>7s}")
+    for option, entry in models.items():
+        if not os.path.exists(entry['path']):
+            print(f"{option:20s} {'missing':10s} {entry.get('version', '1'):>7s}")
+            continue
+
+        checksum = file_checksum(entry['path'])
+        status = "unchanged"
+        if entry.get('checksum') is None:
+            status = "recorded"
+        elif entry['checksum'] != checksum:
+            entry['version'] = _bump(entry.get('version', "1"))
+            status = "changed"
+        entry['checksum'] = checksum
+        print(f"{option:20s} {status:10s} {entry.get('version', '1'):>7s}")
+
+    for path in _unregistered_models(models):
+        if not args.add:
+            print(f"unregistered: {path} (run with --add to register it)")
+            continue
+        option = model_stem(path).lower()
+        models[option] = {
+            "path": path,
+            "display_name": model_stem(path),
+            "format": infer_format(path),
+            "input_size": DEFAULT_INPUT_SIZE,
+            "preprocessing": DEFAULT_PREPROCESSING,
+            "labels": DEFAULT_LABELS_PATH,
+            "version": "1",
+            "checksum": file_checksum(path)
+        }
+        logger.warning(f"Registered {path} as '{option}' with default input size and preprocessing, review the entry")
+
+    with open(MODEL_REGISTRY_PATH, 'w') as f:
+        json.dump(registry, f, indent=2)
+        f.write("\n")
+    logger.info(f"Wrote {MODEL_REGISTRY_PATH} with {len(models)} models")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Model weights shared between worker processes through the page cache.
+
+TensorFlow keeps every Keras/SavedModel weight in private, per-process variables,
+so N web workers hold N copies. With SHARED_WEIGHTS=true models are served from
+their ONNX export (scripts/export_onnx.py, which also checks parity with the
+Keras model) and the ONNX weights are not loaded into the process: the first
+worker writes them once to a flat, page-aligned file next to the .onnx model
+(<model>.onnx.weights), every worker memory-maps it read-only and hands ONNX
+Runtime views of the mapping as initializers. Physical pages are shared by all
+workers on the host; GET /api/memory-report shows them as shared memory.
+"""
+import os
+import json
+import logging
+import tempfile
+from typing import Dict, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+WEIGHTS_SUFFIX = ".weights"
+INDEX_SUFFIX = ".weights.json"
+ALIGNMENT = 4096  # Page-aligned tensors; also satisfies SIMD alignment
+
+def shared_weights_path(onnx_path: str) -> str:
+    return onnx_path + WEIGHTS_SUFFIX
+
+def _source_version(onnx_path: str) -> str:
+    stat = os.stat(onnx_path)
+    return f"{stat.st_size}-{int(stat.st_mtime)}"
+
+def _atomic_write(path: str, write):
+    """Write through a temporary file so concurrent workers never read a partial file"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def export_shared_weights(onnx_path: str) -> Dict[str, dict]:
+    """Write the initializers of an ONNX model to <model>.onnx.weights; returns the index"""
+    import onnx
+    from onnx import numpy_helper
+
+    model = onnx.load(onnx_path)
+    arrays = [(initializer.name, numpy_helper.to_array(initializer)) for initializer in model.graph.initializer]
+
+    index, offset = {}, 0
+    for name, array in arrays:
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        index[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        offset += array.nbytes
+
+    def write_weights(f):
+        for name, array in arrays:
+            f.seek(index[name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(max(offset, 1))
+
+    _atomic_write(shared_weights_path(onnx_path), write_weights)
+    _atomic_write(onnx_path + INDEX_SUFFIX, lambda f: f.write(json.dumps({
+        "source_version": _source_version(onnx_path),
+        "tensors": index
+    }).encode()))
+
+    logger.info(f"Wrote {len(index)} shared weights for {onnx_path} ({offset / (1024 * 1024):.1f}MB)")
+    return index
+
+def load_shared_weights(onnx_path: str) -> Tuple[np.memmap, Dict[str, np.ndarray]]:
+    """Memory-map the shared weights of an ONNX model, exporting them first if missing or stale.
+
+    Returns (mapping, {initializer name: read-only array view}); keep the mapping alive
+    as long as the arrays are in use.
+    """
+    index = None
+    try:
+        with open(onnx_path + INDEX_SUFFIX, "r") as f:
+            stored = json.load(f)
+        if stored.get("source_version") == _source_version(onnx_path) and os.path.exists(shared_weights_path(onnx_path)):
+            index = stored["tensors"]
+    except (OSError, ValueError):
+        pass
+
+    if index is None:
+        index = export_shared_weights(onnx_path)
+
+    mapping = np.memmap(shared_weights_path(onnx_path), dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, entry in index.items():
+        dtype = np.dtype(entry["dtype"])
+        count = int(np.prod(entry["shape"], dtype=np.int64))
+        start = entry["offset"]
+        arrays[name] = mapping[start:start + count * dtype.itemsize].view(dtype).reshape(entry["shape"])
+    return mapping, arrays
@@ -0,0 +1,105 @@
+"""Startup profiling and deferred heavy imports.
+
+Process start used to be dominated by importing TensorFlow and initializing
+Firebase before uvicorn could bind its socket. LazyModule defers an import until
+the module is first used, and startup_profiler records how long each import and
+initialization step took, whether it ran at startup or on first use:
+
+    GET /api/startup-profile
+"""
+import time
+import logging
+import threading
+import importlib
+from datetime import datetime
+from contextlib import contextmanager
+from typing import Dict, Any
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+class StartupProfiler:
+    """Wall time of imports and initialization steps, relative to process start"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.process_start = psutil.Process().create_time()
+        self.records = []
+        self.marks = {}
+
+    @contextmanager
+    def measure(self, name: str, kind: str = "init"):
+        """Record the duration of the enclosed block"""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.record(name, kind, time.time() - start, start)
+
+    def record(self, name: str, kind: str, seconds: float, started_at: float = None):
+        started_at = started_at if started_at is not None else time.time() - seconds
+        with self._lock:
+            self.records.append({
+                'name': name,
+                'kind': kind,
+                'seconds': round(seconds, 4),
+                'started_after_seconds': round(started_at - self.process_start, 3)
+            })
+        logger.info(f"Startup profile: {kind} {name} took {seconds:.3f}s")
+
+    def mark(self, name: str):
+        """Remember when a milestone (e.g. 'serving') was first reached"""
+        with self._lock:
+            self.marks.setdefault(name, round(time.time() - self.process_start, 3))
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            records = sorted(self.records, key=lambda record: record['seconds'], reverse=True)
+            marks = dict(self.marks)
+
+        totals = {}
+        for record in records:
+            totals[record['kind']] = round(totals.get(record['kind'], 0.0) + record['seconds'], 4)
+
+        return {
+            'process_start': datetime.fromtimestamp(self.process_start).isoformat(),
+            'marks': marks,
+            'totals': totals,
+            'records': records
+        }
+
+# Global startup profiler instance
+startup_profiler = StartupProfiler()
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access"""
+
+    def __init__(self, name: str, on_load=None):
+        self._name = name
+        self._on_load = on_load
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    with startup_profiler.measure(self._name, "lazy import"):
+                        module = importlib.import_module(self._name)
+                    # Configure the module before any other thread can use it
+                    if self._on_load is not None:
+                        self._on_load(module)
+                    self._module = module
+        return self._module
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
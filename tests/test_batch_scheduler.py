@@ -0,0 +1,136 @@
+import time
+import uuid
+import threading
+from collections import deque
+
+import numpy as np
+import pytest
+
+from utils import InferenceBatchScheduler, _PendingInference
+
+class RecordingModel:
+    """Fake backend returning each input's first value as a one-hot position"""
+    name = "fake"
+
+    def __init__(self, num_classes=8, delay=0.0, error=None):
+        self.num_classes = num_classes
+        self.delay = delay
+        self.error = error
+        self.batch_sizes = []
+        self._lock = threading.Lock()
+
+    def run(self, batch):
+        with self._lock:
+            self.batch_sizes.append(len(batch))
+        if self.error is not None:
+            raise self.error
+        if self.delay:
+            threading.Event().wait(self.delay)
+        predictions = np.zeros((len(batch), self.num_classes), dtype=np.float32)
+        predictions[np.arange(len(batch)), batch[:, 0].astype(int)] = 1.0
+        return predictions
+
+def model_path():
+    # Call slots are kept per path, so every test gets its own
+    return f"model/test-{uuid.uuid4().hex}.keras"
+
+def submit_concurrently(scheduler, path, model, count):
+    results, errors = [None] * count, [None] * count
+
+    def call(index):
+        try:
+            results[index] = scheduler.submit(path, 224, model, np.full((1, 4), index, dtype=np.float32), "Fake")
+        except Exception as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results, errors
+
+def test_each_caller_gets_its_own_row():
+    scheduler = InferenceBatchScheduler(max_batch_size=4, max_wait_ms=50)
+    model = RecordingModel()
+
+    results, errors = submit_concurrently(scheduler, model_path(), model, 8)
+
+    assert errors == [None] * 8
+    for index, (predictions, batch_size) in enumerate(results):
+        assert predictions.shape == (1, model.num_classes)
+        assert predictions.argmax() == index
+        assert 1 <= batch_size <= 4
+
+def test_requests_are_grouped_into_batches():
+    scheduler = InferenceBatchScheduler(max_batch_size=4, max_wait_ms=200)
+    model = RecordingModel()
+
+    submit_concurrently(scheduler, model_path(), model, 4)
+    stats = scheduler.get_stats()
+
+    assert max(model.batch_sizes) > 1
+    assert sum(model.batch_sizes) == 4
+    assert stats['images_processed'] == 4
+    assert stats['batches_run'] == len(model.batch_sizes)
+
+def test_failed_batch_fails_every_caller():
+    scheduler = InferenceBatchScheduler(max_batch_size=4, max_wait_ms=50)
+    model = RecordingModel(error=RuntimeError("boom"))
+
+    results, errors = submit_concurrently(scheduler, model_path(), model, 3)
+
+    assert results == [None] * 3
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert scheduler.get_stats()['failed_batches'] >= 1
+    assert scheduler.get_stats()['batches_run'] == 0
+
+def test_batches_never_exceed_max_size():
+    scheduler = InferenceBatchScheduler(max_batch_size=2, max_wait_ms=100)
+    model = RecordingModel(delay=0.01)
+
+    results, errors = submit_concurrently(scheduler, model_path(), model, 6)
+
+    assert errors == [None] * 6
+    assert max(model.batch_sizes) <= 2
+
+def test_collect_batch_on_drained_queue_is_empty():
+    scheduler = InferenceBatchScheduler(max_batch_size=4, max_wait_ms=10)
+    key = (model_path(), 224)
+    scheduler._queues[key] = deque()
+
+    with scheduler._cond:
+        assert scheduler._collect_batch(key) == []
+
+def test_collect_batch_stops_when_waiters_withdraw():
+    scheduler = InferenceBatchScheduler(max_batch_size=4, max_wait_ms=2000)
+    key = (model_path(), 224)
+    pending = _PendingInference(np.zeros((1, 4), dtype=np.float32))
+    scheduler._queues[key] = deque([pending])
+
+    def withdraw():
+        with scheduler._cond:
+            scheduler._queues[key].remove(pending)
+            scheduler._cond.notify_all()
+
+    timer = threading.Timer(0.02, withdraw)
+    started = time.time()
+    timer.start()
+    with scheduler._cond:
+        batch = scheduler._collect_batch(key)
+    timer.join()
+
+    assert batch == []
+    # Returns as soon as the queue drains instead of waiting out max_wait
+    assert time.time() - started < 1.0
+
+def test_empty_batches_are_not_counted_as_failures():
+    scheduler = InferenceBatchScheduler()
+
+    scheduler._fail_batch([], "Fake", RuntimeError("boom"))
+
+    assert scheduler.get_stats()['failed_batches'] == 0
+
+@pytest.mark.parametrize("max_batch_size, enabled", [(1, False), (8, True)])
+def test_enabled_only_with_batches_larger_than_one(max_batch_size, enabled):
+    assert InferenceBatchScheduler(max_batch_size=max_batch_size).enabled is enabled
@@ -0,0 +1,97 @@
+import json
+
+import numpy as np
+import pytest
+
+import utils
+from model_registry import ModelRegistry
+from utils import fuse_probabilities, _parse_ensemble_option, _tile_positions
+
+PROBABILITIES = np.array([
+    [0.7, 0.2, 0.1],
+    [0.1, 0.6, 0.3],
+], dtype=np.float32)
+
+# ============================================================================
+# FUSION
+# ============================================================================
+
+def test_mean_fusion():
+    fused = fuse_probabilities(PROBABILITIES, fusion="mean")
+
+    assert fused.shape == (1, 3)
+    np.testing.assert_allclose(fused[0], [0.4, 0.4, 0.2], rtol=1e-6)
+
+def test_weighted_fusion():
+    fused = fuse_probabilities(PROBABILITIES, fusion="weighted", weights=[3, 1])
+
+    np.testing.assert_allclose(fused[0], [0.55, 0.3, 0.15], rtol=1e-6)
+
+def test_weighted_fusion_without_weights_is_the_mean():
+    np.testing.assert_allclose(
+        fuse_probabilities(PROBABILITIES, fusion="weighted"), fuse_probabilities(PROBABILITIES, fusion="mean")
+    )
+
+def test_max_fusion_is_renormalized():
+    fused = fuse_probabilities(PROBABILITIES, fusion="max")
+
+    np.testing.assert_allclose(fused.sum(), 1.0, rtol=1e-6)
+    assert fused.argmax() == 0
+
+def test_weight_count_must_match_members():
+    with pytest.raises(ValueError):
+        fuse_probabilities(PROBABILITIES, fusion="weighted", weights=[1, 2, 3])
+
+def test_unknown_fusion():
+    with pytest.raises(ValueError):
+        fuse_probabilities(PROBABILITIES, fusion="median")
+
+# ============================================================================
+# ENSEMBLE MEMBERS
+# ============================================================================
+
+@pytest.fixture
+def ensemble_registry(tmp_path, monkeypatch):
+    labels = {"0": "Chaetoceros", "1": "Nitzschia", "2": "Oscillatoria"}
+    shared_path, other_path = tmp_path / "labels.json", tmp_path / "other_labels.json"
+    shared_path.write_text(json.dumps(labels))
+    other_path.write_text(json.dumps({**labels, "2": "Skeletonema"}))
+
+    registry_path = tmp_path / "registry.json"
+    registry_path.write_text(json.dumps({"models": {
+        "a": {"path": str(tmp_path / "A.keras"), "labels": str(shared_path)},
+        "b": {"path": str(tmp_path / "B.keras"), "labels": str(shared_path)},
+        "c": {"path": str(tmp_path / "C.keras"), "labels": str(other_path)}
+    }}))
+    registry = ModelRegistry(str(registry_path), reload_interval=0)
+    registry.load()
+    monkeypatch.setattr(utils, "model_registry", registry)
+    return registry
+
+def test_ensemble_members_are_parsed(ensemble_registry):
+    assert _parse_ensemble_option(f"{utils.ENSEMBLE_MODEL_OPTION}:a+b") == ["a", "b"]
+    assert _parse_ensemble_option("a") is None
+
+def test_ensemble_rejects_members_with_different_label_sets(ensemble_registry):
+    with pytest.raises(ValueError, match="different label set"):
+        _parse_ensemble_option(f"{utils.ENSEMBLE_MODEL_OPTION}:a+c")
+
+def test_ensemble_needs_two_members(ensemble_registry):
+    with pytest.raises(ValueError):
+        _parse_ensemble_option(f"{utils.ENSEMBLE_MODEL_OPTION}:a")
+
+# ============================================================================
+# TILING
+# ============================================================================
+
+@pytest.mark.parametrize("length, tile_size, step, expected", [
+    (100, 224, 112, [0]),
+    (224, 224, 112, [0]),
+    (448, 224, 112, [0, 112, 224]),
+    (500, 224, 112, [0, 112, 224, 276]),
+])
+def test_tile_positions_cover_the_edge(length, tile_size, step, expected):
+    positions = _tile_positions(length, tile_size, step)
+
+    assert positions == expected
+    assert positions[-1] + tile_size >= length
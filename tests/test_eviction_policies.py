@@ -0,0 +1,114 @@
+import pytest
+
+from utils import ModelCacheManager, EvictionPolicy, EVICTION_POLICIES
+
+MB = 1024 * 1024
+
+def make_manager(policy, budget_mb=2):
+    return ModelCacheManager(budget_mb=budget_mb, policy=policy, cache={}, collect_garbage=False)
+
+def access(manager, path, times=1):
+    for _ in range(times):
+        manager.get_from_cache(path)
+
+def test_policies_implement_choose_victim():
+    assert set(EVICTION_POLICIES) == {"lru", "lfu", "arc", "cost"}
+    with pytest.raises(TypeError):
+        EvictionPolicy()
+
+def test_unknown_policy_falls_back_to_lru():
+    assert make_manager("random").policy.name == "lru"
+
+def test_budget_counts_measured_cost():
+    manager = make_manager("lru", budget_mb=3)
+    manager.add_to_cache("a", object(), cost_bytes=2 * MB)
+    manager.add_to_cache("b", object(), cost_bytes=2 * MB)
+
+    assert list(manager.cache) == ["b"]
+    assert manager.used_bytes() == 2 * MB
+    assert manager.evictions == 1
+
+def test_readding_a_path_does_not_count_it_twice():
+    manager = make_manager("lru")
+    manager.add_to_cache("a", object(), cost_bytes=MB)
+    manager.add_to_cache("a", object(), cost_bytes=MB)
+
+    assert manager.used_bytes() == MB
+
+def test_lru_evicts_least_recently_used():
+    manager = make_manager("lru")
+    manager.add_to_cache("a", object(), cost_bytes=MB)
+    manager.add_to_cache("b", object(), cost_bytes=MB)
+    access(manager, "a")
+
+    manager.add_to_cache("c", object(), cost_bytes=MB)
+
+    assert set(manager.cache) == {"a", "c"}
+
+def test_lfu_evicts_least_frequently_requested():
+    manager = make_manager("lfu")
+    manager.add_to_cache("a", object(), cost_bytes=MB)
+    manager.add_to_cache("b", object(), cost_bytes=MB)
+    access(manager, "a", times=3)
+    access(manager, "b")
+    access(manager, "a")
+
+    manager.add_to_cache("c", object(), cost_bytes=MB)
+
+    assert set(manager.cache) == {"a", "c"}
+
+def test_arc_prefers_evicting_models_seen_once():
+    manager = make_manager("arc")
+    manager.add_to_cache("a", object(), cost_bytes=MB)
+    manager.add_to_cache("b", object(), cost_bytes=MB)
+    access(manager, "a")  # a moves to the frequent list
+
+    manager.add_to_cache("c", object(), cost_bytes=MB)
+
+    assert set(manager.cache) == {"a", "c"}
+    assert "b" in manager.policy.b1
+
+def test_arc_ghost_hit_goes_to_frequent_list():
+    manager = make_manager("arc")
+    manager.add_to_cache("a", object(), cost_bytes=MB)
+    manager.add_to_cache("b", object(), cost_bytes=MB)
+    manager.add_to_cache("c", object(), cost_bytes=MB)
+
+    manager.add_to_cache("a", object(), cost_bytes=MB)
+
+    assert "a" in manager.policy.t2
+    assert manager.policy.p > 0
+
+def test_cost_policy_declines_cheap_rare_model_that_would_displace_a_hot_one():
+    manager = make_manager("cost")
+    access(manager, "hot", times=20)
+    manager.add_to_cache("hot", object(), cost_bytes=2 * MB, load_duration=10.0)
+
+    cached = manager.add_to_cache("rare", object(), cost_bytes=2 * MB, load_duration=0.1)
+
+    assert cached is False
+    assert list(manager.cache) == ["hot"]
+    assert manager.rejected == 1
+
+def test_cost_policy_evicts_lowest_value_first():
+    manager = make_manager("cost", budget_mb=3)
+    manager.add_to_cache("slow", object(), cost_bytes=MB, load_duration=10.0)
+    manager.add_to_cache("fast", object(), cost_bytes=MB, load_duration=0.1)
+    manager.add_to_cache("cheap", object(), cost_bytes=MB, load_duration=0.5)
+
+    manager.add_to_cache("new", object(), cost_bytes=MB, load_duration=5.0)
+
+    assert set(manager.cache) == {"slow", "cheap", "new"}
+    # Aging: the next admission has to beat the evicted value
+    assert manager.policy.inflation > 0
+
+def test_clear_keeps_request_history():
+    manager = make_manager("lfu")
+    manager.add_to_cache("a", object(), cost_bytes=MB)
+    access(manager, "a", times=2)
+
+    manager.clear()
+
+    assert not manager.cache
+    assert manager.used_bytes() == 0
+    assert manager.access_counts["a"] == 2
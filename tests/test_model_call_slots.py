@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+from utils import ModelCallSlots, ModelOverloadedError
+
+def test_rejects_callers_beyond_the_queue_limit():
+    slots = ModelCallSlots(min_slots=1, max_slots=1, queue_limit=0, wait_timeout=1)
+    token = slots.acquire()
+
+    with pytest.raises(ModelOverloadedError):
+        slots.acquire()
+
+    slots.release(token)
+    assert slots.get_stats()['rejected'] == 1
+
+def test_waiting_caller_times_out():
+    slots = ModelCallSlots(min_slots=1, max_slots=1, queue_limit=4, wait_timeout=0.05)
+    token = slots.acquire()
+
+    with pytest.raises(ModelOverloadedError):
+        slots.acquire()
+
+    slots.release(token)
+    stats = slots.get_stats()
+    assert stats['timeouts'] == 1
+    assert stats['waiting'] == 0
+
+def test_release_hands_the_slot_to_a_waiter():
+    slots = ModelCallSlots(min_slots=1, max_slots=1, queue_limit=4, wait_timeout=5)
+    token = slots.acquire()
+    acquired = threading.Event()
+
+    def wait_for_slot():
+        with slots.slot():
+            acquired.set()
+
+    waiter = threading.Thread(target=wait_for_slot)
+    waiter.start()
+    assert not acquired.wait(0.05)
+
+    slots.release(token)
+    waiter.join(timeout=5)
+
+    assert acquired.is_set()
+    assert slots.get_stats()['active'] == 0
+
+def test_capacity_follows_demand_within_bounds():
+    slots = ModelCallSlots(min_slots=1, max_slots=3, queue_limit=0, wait_timeout=1)
+    tokens = []
+    for _ in range(20):
+        try:
+            tokens.append(slots.acquire())
+        except ModelOverloadedError:
+            pass
+
+    assert 1 < slots.capacity <= 3
+    assert slots.active == len(tokens) <= 3
+
+    for token in tokens:
+        slots.release(token)
+    assert slots.get_stats()['active'] == 0
@@ -0,0 +1,130 @@
+import os
+import json
+
+import pytest
+
+from model_registry import ModelRegistry, ModelRegistryError, _validate_entry, DEFAULT_INPUT_SIZE, DEFAULT_LABELS_PATH
+
+def write_registry(path, models):
+    with open(path, 'w') as f:
+        json.dump({"models": models}, f)
+
+@pytest.fixture
+def registry_file(tmp_path):
+    path = str(tmp_path / "registry.json")
+    write_registry(path, {
+        "mobilenet": {"path": "model/classification/MobileNet.keras", "display_name": "MobileNet"},
+        "vit": {"path": "model/classification/ViT.keras", "input_size": 384, "version": "2"}
+    })
+    return path
+
+# ============================================================================
+# ENTRY VALIDATION
+# ============================================================================
+
+def test_validate_entry_fills_defaults():
+    entry = _validate_entry("mobilenet", {"path": "model/classification/MobileNet.keras"})
+
+    assert entry['display_name'] == "mobilenet"
+    assert entry['format'] == "keras"
+    assert entry['input_size'] == DEFAULT_INPUT_SIZE
+    assert entry['labels'] == DEFAULT_LABELS_PATH
+    assert entry['version'] == "1"
+
+@pytest.mark.parametrize("path, expected", [
+    ("model/a.tflite", "tflite"),
+    ("model/a.onnx", "onnx"),
+    ("model/a.h5", "keras"),
+    ("model/saved_model", "savedmodel"),
+])
+def test_validate_entry_infers_format_from_path(path, expected):
+    assert _validate_entry("a", {"path": path})['format'] == expected
+
+@pytest.mark.parametrize("raw", [
+    {},
+    {"path": ""},
+    {"path": "a.keras", "input_size": 0},
+    {"path": "a.keras", "input_size": "224"},
+    {"path": "a.keras", "format": "pickle"},
+])
+def test_validate_entry_rejects_invalid_entries(raw):
+    with pytest.raises(ModelRegistryError):
+        _validate_entry("a", raw)
+
+# ============================================================================
+# LOOKUPS AND RELOADS
+# ============================================================================
+
+def test_resolve_by_option_name_path_and_stem(registry_file):
+    registry = ModelRegistry(registry_file, reload_interval=0)
+    registry.load()
+
+    assert registry.resolve("mobilenet")['option'] == "mobilenet"
+    assert registry.resolve("MOBILENET")['option'] == "mobilenet"
+    assert registry.resolve("model/classification/MobileNet.keras")['option'] == "mobilenet"
+    # Converted variants share the file stem
+    assert registry.resolve("model/classification/MobileNet.tflite")['option'] == "mobilenet"
+    assert registry.resolve("unknown") is None
+    assert registry.input_size("vit") == 384
+    assert registry.input_size("unknown") == DEFAULT_INPUT_SIZE
+
+def test_load_skips_invalid_entries(tmp_path):
+    path = str(tmp_path / "registry.json")
+    write_registry(path, {
+        "good": {"path": "good.keras"},
+        "bad": {"path": "bad.keras", "input_size": -1}
+    })
+    registry = ModelRegistry(path, reload_interval=0)
+    changes = registry.load()
+
+    assert list(registry.mapping()) == ["good"]
+    assert len(changes['errors']) == 1
+    assert registry.errors == changes['errors']
+
+def test_reload_reports_changes_and_stale_paths(registry_file):
+    seen = []
+    registry = ModelRegistry(registry_file, reload_interval=0, on_change=seen.append)
+    registry.load()
+
+    write_registry(registry_file, {
+        "mobilenet": {"path": "model/classification/MobileNet.keras", "display_name": "MobileNet", "version": "2"},
+        "resnet50": {"path": "model/classification/ResNet50.keras"}
+    })
+    changes = registry.load()
+
+    assert changes['added'] == ["resnet50"]
+    assert changes['removed'] == ["vit"]
+    assert changes['changed'] == ["mobilenet"]
+    assert changes['stale_paths'] == ["model/classification/MobileNet.keras", "model/classification/ViT.keras"]
+    assert seen == [changes]
+    assert registry.resolve("vit") is None
+
+def test_unreadable_file_keeps_current_entries(registry_file):
+    registry = ModelRegistry(registry_file, reload_interval=0)
+    registry.load()
+
+    with open(registry_file, 'w') as f:
+        f.write("{not json")
+    changes = registry.load()
+
+    assert changes['errors']
+    assert set(registry.mapping()) == {"mobilenet", "vit"}
+
+def test_lookups_pick_up_file_changes(registry_file):
+    registry = ModelRegistry(registry_file, reload_interval=0.01)
+    registry.load()
+
+    write_registry(registry_file, {"resnet50": {"path": "model/classification/ResNet50.keras"}})
+    mtime = os.path.getmtime(registry_file) + 5
+    os.utime(registry_file, (mtime, mtime))
+    registry._checked_at = 0.0
+
+    assert list(registry.mapping()) == ["resnet50"]
+
+def test_confirm_input_size_corrects_entry(registry_file):
+    registry = ModelRegistry(registry_file, reload_interval=0)
+    registry.load()
+
+    registry.confirm_input_size("model/classification/ViT.keras", 224)
+
+    assert registry.input_size("vit") == 224
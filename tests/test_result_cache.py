@@ -0,0 +1,68 @@
+import threading
+
+from utils import PredictionResultCache
+
+IMAGE = b"\x89PNG fake image bytes"
+
+def test_key_covers_image_model_and_version():
+    key = PredictionResultCache.make_key(IMAGE, "mobilenet", "1:abc")
+
+    assert key == PredictionResultCache.make_key(IMAGE, "mobilenet", "1:abc")
+    assert key != PredictionResultCache.make_key(IMAGE + b"!", "mobilenet", "1:abc")
+    assert key != PredictionResultCache.make_key(IMAGE, "vit", "1:abc")
+    assert key != PredictionResultCache.make_key(IMAGE, "mobilenet", "2:abc")
+
+def test_memory_tier_is_byte_bounded_lru():
+    cache = PredictionResultCache(max_bytes=80)  # room for two 33-byte payloads
+    cache.put("a", {"class": "x" * 20})
+    cache.put("b", {"class": "y" * 20})
+    cache.get("a")
+    cache.put("c", {"class": "z" * 20})
+
+    assert cache.get("a")[1] == "memory"
+    assert cache.get("b") == (None, None)
+    assert cache.get_stats()['evictions'] == 1
+
+def test_disk_tier_survives_memory_clear(tmp_path):
+    cache = PredictionResultCache(max_bytes=1024, disk_dir=str(tmp_path), disk_max_bytes=1024 * 1024)
+    cache.put("a", {"class": "Chaetoceros"})
+    cache.clear()
+
+    assert cache.get("a") == ({"class": "Chaetoceros"}, "disk")
+    assert cache.get("a")[1] == "memory"
+
+def test_concurrent_misses_compute_once():
+    cache = PredictionResultCache(max_bytes=1024)
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {"class": "Chaetoceros"}
+
+    statuses = []
+    threads = [
+        threading.Thread(target=lambda: statuses.append(cache.get_or_compute("a", compute)[1]))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    threading.Event().wait(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert sorted(statuses).count("miss") == 1
+    assert set(statuses) <= {"miss", "shared", "memory"}
+
+def test_callers_get_independent_copies():
+    cache = PredictionResultCache(max_bytes=1024)
+    first, _ = cache.get_or_compute("a", lambda: {"metrics": {}})
+    first["metrics"]["request"] = 1
+
+    second, status = cache.get_or_compute("a", lambda: {"metrics": {}})
+
+    assert status == "memory"
+    assert second == {"metrics": {}}
@@ -1,32 +1,36 @@
+import io
 import json
 import os
+import hashlib
 import logging
+import asyncio
 import cv2
 import uuid
 import numpy as np
-import tensorflow as tf
-import tf_keras
+from PIL import Image
 from datetime import datetime
 import time
 import threading
+import queue
+import zipfile
+import tarfile
 import psutil
 import gc
+from abc import ABC, abstractmethod
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import Dict, Any, Optional, Tuple
 
-# Default preprocessing imports
-from tf_keras.applications.imagenet_utils import preprocess_input
-
-# Model-specific preprocessing imports
-from tf_keras.applications.efficientnet import preprocess_input as preprocess_input_efficientnet
-from tf_keras.applications.efficientnet_v2 import preprocess_input as preprocess_input_efficientnetv2
-from tf_keras.applications.mobilenet import preprocess_input as preprocess_input_mobilenet
-from tf_keras.applications.mobilenet_v2 import preprocess_input as preprocess_input_mobilenetv2
-from tf_keras.applications.mobilenet_v3 import preprocess_input as preprocess_input_mobilenetv3
-from tf_keras.applications.resnet import preprocess_input as preprocess_input_resnet
-from tf_keras.applications.resnet_v2 import preprocess_input as preprocess_input_resnetv2
-from tf_keras.applications.convnext import preprocess_input as preprocess_input_convnext
-from tf_keras.applications.inception_v3 import preprocess_input as preprocess_input_inceptionv3
-from tf_keras.applications.densenet import preprocess_input as preprocess_input_densenet
+from inference_workers import get_worker_pool, shutdown_worker_pool
+from startup_profile import LazyModule
+from model_registry import ModelRegistry, DEFAULT_PREPROCESSING, file_checksum
+from shared_weights import load_shared_weights
+from runtime_config import get_thread_layout, apply_tensorflow_threading, pin_current_thread
+
+# TensorFlow is imported on first use so the server binds its socket without waiting for it.
+# The thread layout is computed then too, inside the worker process that runs inference.
+tf = LazyModule("tensorflow", on_load=apply_tensorflow_threading)
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -38,196 +42,978 @@ logger = logging.getLogger(__name__)
 
 # Global caches for better performance
 MODEL_CACHE = {}
-LABELS_CACHE = None
+LABELS_CACHE = {}  # label sets by path
 CACHE_LOCK = threading.RLock()
-MAX_CACHE_SIZE = 3  # Maximum number of models to keep in memory
-MEMORY_THRESHOLD = 0.85  # 85% memory usage threshold
+MODEL_CACHE_BUDGET_MB = float(os.getenv("MODEL_CACHE_BUDGET_MB", "2048"))  # Memory budget for cached models
+MODEL_CACHE_POLICY = os.getenv("MODEL_CACHE_POLICY", "lru").lower()  # lru | lfu | arc | cost
+# RSS growth while loading also includes other threads' allocations; cap it at this many times the weight bytes
+MODEL_COST_MAX_WEIGHT_MULTIPLE = float(os.getenv("MODEL_COST_MAX_WEIGHT_MULTIPLE", "3"))
+
+# Dynamic micro-batching configuration (max batch size of 1 disables batching)
+BATCH_MAX_SIZE = int(os.getenv("INFERENCE_BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("INFERENCE_BATCH_MAX_WAIT_MS", "5"))
+BATCH_RESULT_TIMEOUT = float(os.getenv("INFERENCE_BATCH_RESULT_TIMEOUT", "120"))  # Seconds a caller waits for its row
+
+# Largest tensor handed to a single forward pass by bulk prediction
+BULK_BATCH_SIZE = int(os.getenv("INFERENCE_BULK_BATCH_SIZE", "32"))
+
+# Archive (ZIP/tar) streaming classification
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "16"))
+ARCHIVE_MAX_MEMBER_SIZE = 20 * 1024 * 1024  # 20MB per image inside an archive
+ARCHIVE_MAX_BYTES = int(os.getenv("ARCHIVE_MAX_MB", "1024")) * 1024 * 1024  # Whole uploaded archive
+ARCHIVE_MAX_MEMBERS = int(os.getenv("ARCHIVE_MAX_MEMBERS", "10000"))  # Images per archive
+ARCHIVE_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tif', '.tiff')
+
+# Prediction result cache (in-memory LRU bounded by bytes, optional on-disk tier)
+RESULT_CACHE_MAX_MB = float(os.getenv("PREDICTION_CACHE_MAX_MB", "64"))
+RESULT_CACHE_DIR = os.getenv("PREDICTION_CACHE_DIR")  # unset disables the disk tier
+RESULT_CACHE_DISK_MAX_MB = float(os.getenv("PREDICTION_CACHE_DISK_MAX_MB", "512"))
+
+# Cascaded early-exit classification ("cascade" or "cascade:<heavy model option>")
+CASCADE_MODEL_OPTION = "cascade"
+CASCADE_FAST_MODEL = os.getenv("CASCADE_FAST_MODEL", "mobilenetv3_small")
+CASCADE_FALLBACK_MODEL = os.getenv("CASCADE_FALLBACK_MODEL", "efficientnetv2b0")
+CASCADE_CONFIDENCE_THRESHOLD = float(os.getenv("CASCADE_CONFIDENCE_THRESHOLD", "0.85"))
+CASCADE_MARGIN_THRESHOLD = float(os.getenv("CASCADE_MARGIN_THRESHOLD", "0.20"))
+
+# Ensemble classification ("ensemble" or "ensemble:<option>+<option>+...")
+ENSEMBLE_MODEL_OPTION = "ensemble"
+ENSEMBLE_MEMBERS = [m.strip() for m in os.getenv("ENSEMBLE_MEMBERS", "efficientnetv2b0,convnext_tiny,densenet121").split(",") if m.strip()]
+ENSEMBLE_FUSION = os.getenv("ENSEMBLE_FUSION", "mean").lower()  # mean | weighted | max
+ENSEMBLE_WEIGHTS = [float(w) for w in os.getenv("ENSEMBLE_WEIGHTS", "").split(",") if w.strip()]
+ENSEMBLE_MAX_PARALLEL = int(os.getenv("ENSEMBLE_MAX_PARALLEL", "4"))
+
+# Tiled sliding-window classification for large microscope fields
+TILE_DEFAULT_OVERLAP = 0.25
+TILE_MAX_TILES = int(os.getenv("TILE_MAX_TILES", "4096"))
+TILE_MIN_CONFIDENCE = float(os.getenv("TILE_MIN_CONFIDENCE", "0.5"))
+
+# Multi-organism detection (OpenCV thresholding + contours before classification)
+DETECTION_MIN_AREA = int(os.getenv("DETECTION_MIN_AREA", "400"))
+DETECTION_MAX_OBJECTS = int(os.getenv("DETECTION_MAX_OBJECTS", "200"))
+DETECTION_PADDING = 0.1
+DETECTION_ANALYSIS_MAX_DIM = 1024
+
+# Inference backends selected per model option, e.g.
+# MODEL_BACKENDS="efficientnetv2b0=onnx,mobilenetv3_small=tflite-int8" (default: keras)
+MODEL_BACKENDS = dict(
+    item.strip().split("=", 1) for item in os.getenv("MODEL_BACKENDS", "").split(",") if "=" in item
+)
+
+# Serve models without an explicit backend from their ONNX export, with the weights
+# memory-mapped and shared by every worker on the host (see shared_weights.py)
+SHARED_WEIGHTS = os.getenv("SHARED_WEIGHTS", "false").lower() == "true"
+
+# Load manifest written by scripts/prepare_models.py (format, artifact and checksum per model)
+MODEL_MANIFEST_PATH = os.getenv("MODEL_MANIFEST_PATH", "model/manifest.json")
+PREPARED_MODEL_DIR = os.getenv("PREPARED_MODEL_DIR", "model/prepared")
+MANIFEST_FORMATS = ("keras", "savedmodel", "tflite", "onnx")
+
+# Model catalogue (path, format, input size, preprocessing, labels, version per option)
+MODEL_REGISTRY_PATH = os.getenv("MODEL_REGISTRY_PATH", "model/registry.json")
+MODEL_REGISTRY_RELOAD_SECONDS = float(os.getenv("MODEL_REGISTRY_RELOAD_SECONDS", "30"))  # 0 disables change detection
+MODEL_REGISTRY_VERIFY_CHECKSUMS = os.getenv("MODEL_REGISTRY_VERIFY_CHECKSUMS", "false").lower() == "true"
+
+# Keras models run through compiled tf.functions with a fixed input signature per
+# batch-size bucket (batches are zero-padded up to the next bucket)
+COMPILED_BATCH_BUCKETS = sorted({b for b in (1, 2, 4, 8, 16, 32, 64) if b <= BULK_BATCH_SIZE} | {BULK_BATCH_SIZE})
+COMPILED_WARMUP_MAX_BATCH = int(os.getenv("INFERENCE_WARMUP_MAX_BATCH", str(BATCH_MAX_SIZE)))
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "true").lower() == "true"
+INFERENCE_XLA = os.getenv("INFERENCE_XLA", "false").lower() == "true"
+
+# Quantized TFLite backend for the mobile model family
+TFLITE_MODEL_DIR = os.getenv("TFLITE_MODEL_DIR", "model/classification/tflite")
+TFLITE_MODEL_OPTIONS = ("mobilenet", "mobilenetv2", "mobilenetv3_small", "mobilenetv3_large")
+TFLITE_VARIANTS = ("dynamic", "int8")
+TFLITE_POOL_SIZE = int(os.getenv("TFLITE_POOL_SIZE", "2"))
+TFLITE_NUM_THREADS = int(os.getenv("TFLITE_NUM_THREADS", "0"))  # 0 follows the runtime thread layout
+
+# ONNX Runtime (CPU) backend
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "model/classification/onnx")
+ONNX_NUM_THREADS = int(os.getenv("ONNX_NUM_THREADS", "0"))  # 0 follows the runtime thread layout
+
+# Models warmed at startup, highest priority first
+PRELOAD_PARALLELISM = int(os.getenv("PRELOAD_PARALLELISM", "2"))  # Models loaded at the same time
+PRELOAD_PRIORITY_MODELS = [
+    ('efficientnetv2b0', 1),  # Highest priority - default model
+    ('mobilenetv3_small', 2), # Medium priority
+    ('resnet50', 3)           # Lower priority
+]
+
+# Concurrent calls per model ("call slots" on the shared weights), sized from observed demand
+MODEL_CALL_SLOTS_MIN = int(os.getenv("MODEL_CALL_SLOTS_MIN", "1"))
+MODEL_CALL_SLOTS_MAX = int(os.getenv("MODEL_CALL_SLOTS_MAX", "4"))
+MODEL_CALL_QUEUE_LIMIT = int(os.getenv("MODEL_CALL_QUEUE_LIMIT", "64"))  # Callers waiting for a slot before rejecting
+MODEL_CALL_WAIT_TIMEOUT = float(os.getenv("MODEL_CALL_WAIT_TIMEOUT", "30"))  # Seconds
+
+# Dedicated inference executor size (each waiting request holds a thread, so keep >= batch size)
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(max(4, BATCH_MAX_SIZE))))
+
+class EvictionPolicy(ABC):
+    """Chooses which cached model to evict and whether a new model is worth admitting.
+
+    Policies read the manager's bookkeeping (recency, access_counts, memory_usage,
+    load_durations) and may keep their own state through the on_* hooks.
+    """
+    name = "base"
+
+    def on_access(self, manager, model_path: str):
+        pass
+
+    def on_insert(self, manager, model_path: str):
+        pass
+
+    def on_evict(self, manager, model_path: str):
+        pass
+
+    @abstractmethod
+    def choose_victim(self, manager, candidates) -> str:
+        """Cached model path to evict among candidates"""
+
+    def admit(self, manager, model_path: str, cost_bytes: int, load_duration: float, victims) -> bool:
+        return True
+
+    def reset(self):
+        pass
+
+class LRUPolicy(EvictionPolicy):
+    """Evict the least recently used model"""
+    name = "lru"
+
+    def choose_victim(self, manager, candidates):
+        candidates = set(candidates)
+        return next(path for path in manager.recency if path in candidates)
+
+class LFUPolicy(EvictionPolicy):
+    """Evict the least frequently requested model (ties broken by recency)"""
+    name = "lfu"
+
+    def choose_victim(self, manager, candidates):
+        order = {path: index for index, path in enumerate(manager.recency)}
+        return min(candidates, key=lambda path: (manager.access_counts.get(path, 0), order.get(path, 0)))
+
+class ARCPolicy(EvictionPolicy):
+    """ARC-style policy: models seen once (T1) and seen repeatedly (T2) compete for
+    space, and ghost lists of recently evicted models adapt the T1 target size"""
+    name = "arc"
+    GHOST_LIMIT = 64
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.t1, self.t2 = OrderedDict(), OrderedDict()
+        self.b1, self.b2 = OrderedDict(), OrderedDict()
+        self.p = 0.0
+
+    def on_access(self, manager, model_path):
+        if model_path in self.t1:
+            del self.t1[model_path]
+            self.t2[model_path] = True
+        elif model_path in self.t2:
+            self.t2.move_to_end(model_path)
+
+    def on_insert(self, manager, model_path):
+        capacity = max(1, len(manager.cache) + 1)
+        if model_path in self.b1:
+            # Evicted from T1 too early: favour recency
+            self.p = min(capacity, self.p + max(1.0, len(self.b2) / max(1, len(self.b1))))
+            del self.b1[model_path]
+            self.t2[model_path] = True
+        elif model_path in self.b2:
+            # Evicted from T2 too early: favour frequency
+            self.p = max(0.0, self.p - max(1.0, len(self.b1) / max(1, len(self.b2))))
+            del self.b2[model_path]
+            self.t2[model_path] = True
+        else:
+            self.t1[model_path] = True
+
+    def on_evict(self, manager, model_path):
+        for resident, ghost in ((self.t1, self.b1), (self.t2, self.b2)):
+            if model_path in resident:
+                del resident[model_path]
+                ghost[model_path] = True
+                while len(ghost) > self.GHOST_LIMIT:
+                    ghost.popitem(last=False)
+
+    def choose_victim(self, manager, candidates):
+        candidates = set(candidates)
+        t1 = [path for path in self.t1 if path in candidates]
+        t2 = [path for path in self.t2 if path in candidates]
+        if t1 and (len(self.t1) > self.p or not t2):
+            return t1[0]
+        if t2:
+            return t2[0]
+        return LRUPolicy().choose_victim(manager, candidates)
+
+class CostAwarePolicy(EvictionPolicy):
+    """GreedyDual-Size-Frequency: a model's value is requests x reload seconds per MB.
+
+    The least valuable model is evicted, and a new model is only admitted when it is
+    worth more than the models it would push out. A rarely used large model is then
+    served without displacing a hot one.
+    """
+    name = "cost"
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.inflation = 0.0
+        self.priority = {}
+
+    def value(self, manager, model_path: str, cost_bytes: int = None, load_duration: float = None):
+        size_mb = max(1.0, (cost_bytes if cost_bytes is not None else manager.memory_usage.get(model_path, 0)) / (1024 * 1024))
+        if load_duration is None:
+            load_duration = manager.load_durations.get(model_path, DEFAULT_LOAD_DURATION)
+        return self.inflation + manager.access_counts.get(model_path, 1) * load_duration / size_mb
+
+    def on_access(self, manager, model_path):
+        if model_path in manager.cache:
+            self.priority[model_path] = self.value(manager, model_path)
+
+    def on_insert(self, manager, model_path):
+        self.priority[model_path] = self.value(manager, model_path)
+
+    def on_evict(self, manager, model_path):
+        # Aging: later entries must beat the value of what was evicted
+        self.inflation = self.priority.pop(model_path, self.inflation)
+
+    def choose_victim(self, manager, candidates):
+        return min(candidates, key=lambda path: self.priority.get(path, self.inflation))
+
+    def admit(self, manager, model_path, cost_bytes, load_duration, victims):
+        if not victims:
+            return True
+        value = self.value(manager, model_path, cost_bytes, load_duration)
+        return value >= max(self.priority.get(path, self.inflation) for path in victims)
+
+EVICTION_POLICIES = {
+    policy.name: policy for policy in (LRUPolicy, LFUPolicy, ARCPolicy, CostAwarePolicy)
+}
+
+# Reload time assumed for models that have never been loaded
+DEFAULT_LOAD_DURATION = 1.0
+
+class ModelOverloadedError(RuntimeError):
+    """A model's call queue is full, or a caller waited too long for a free slot"""
+
+class ModelCallSlots:
+    """Concurrency control for one model: up to `capacity` calls run at once and
+    further callers wait on a bounded queue.
+
+    Keras, SavedModel and ONNX Runtime calls are thread-safe and TFLite pools its
+    interpreters, so a slot is a concurrent call on the shared weights rather than a
+    copy of them. Capacity follows a moving average of the concurrent demand seen by
+    acquire(), between min_slots and max_slots.
+    """
+    DEMAND_SMOOTHING = 0.2
+    
+    def __init__(self, min_slots=MODEL_CALL_SLOTS_MIN, max_slots=MODEL_CALL_SLOTS_MAX,
+                 queue_limit=MODEL_CALL_QUEUE_LIMIT, wait_timeout=MODEL_CALL_WAIT_TIMEOUT):
+        self.min_slots = max(1, min_slots)
+        self.max_slots = max(self.min_slots, max_slots)
+        self.queue_limit = max(0, queue_limit)
+        self.wait_timeout = wait_timeout
+        self.capacity = self.min_slots
+        self.active = 0
+        self.waiting = 0
+        self.demand = float(self.min_slots)
+        self.peak_demand = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.latency = {}  # concurrency level -> call count, wait and run seconds
+        self._cond = threading.Condition()
+    
+    def _observe_demand(self):
+        """Fold the current demand into the moving average and resize (lock held)"""
+        demand = self.active + self.waiting + 1
+        self.peak_demand = max(self.peak_demand, demand)
+        self.demand += self.DEMAND_SMOOTHING * (demand - self.demand)
+        
+        capacity = min(self.max_slots, max(self.min_slots, round(self.demand)))
+        if capacity > self.capacity:
+            self._cond.notify(capacity - self.capacity)
+        self.capacity = capacity
+    
+    def acquire(self):
+        """Wait for a free slot; returns a token for release()"""
+        enqueued_at = time.time()
+        with self._cond:
+            self._observe_demand()
+            if self.active >= self.capacity:
+                if self.waiting >= self.queue_limit:
+                    self.rejected += 1
+                    raise ModelOverloadedError(f"Model busy: {self.waiting} requests already waiting")
+                
+                self.waiting += 1
+                try:
+                    deadline = enqueued_at + self.wait_timeout
+                    while self.active >= self.capacity:
+                        remaining = deadline - time.time()
+                        if remaining <= 0:
+                            self.timeouts += 1
+                            raise ModelOverloadedError(f"No free model slot within {self.wait_timeout:.0f}s")
+                        self._cond.wait(timeout=remaining)
+                finally:
+                    self.waiting -= 1
+            
+            self.active += 1
+            return (self.active, enqueued_at, time.time())
+    
+    def release(self, token):
+        level, enqueued_at, started_at = token
+        finished_at = time.time()
+        with self._cond:
+            self.active -= 1
+            stats = self.latency.setdefault(level, {'calls': 0, 'wait': 0.0, 'run': 0.0, 'max_run': 0.0})
+            stats['calls'] += 1
+            stats['wait'] += started_at - enqueued_at
+            stats['run'] += finished_at - started_at
+            stats['max_run'] = max(stats['max_run'], finished_at - started_at)
+            self._cond.notify()
+    
+    @contextmanager
+    def slot(self):
+        token = self.acquire()
+        try:
+            yield
+        finally:
+            self.release(token)
+    
+    def get_stats(self):
+        with self._cond:
+            return {
+                "capacity": self.capacity,
+                "active": self.active,
+                "waiting": self.waiting,
+                "demand": f"{self.demand:.2f}",
+                "peak_demand": self.peak_demand,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                # Latency by how many calls were running (this one included) when a call started
+                "latency_by_concurrency": {
+                    level: {
+                        "calls": stats['calls'],
+                        "avg_wait_ms": f"{stats['wait'] * 1000 / stats['calls']:.1f}",
+                        "avg_run_ms": f"{stats['run'] * 1000 / stats['calls']:.1f}",
+                        "max_run_ms": f"{stats['max_run'] * 1000:.1f}"
+                    }
+                    for level, stats in sorted(self.latency.items())
+                }
+            }
 
 class ModelCacheManager:
-    """Enhanced model cache manager with memory monitoring"""
-    def __init__(self, max_size=3, memory_threshold=0.85):
-        self.max_size = max_size
-        self.memory_threshold = memory_threshold
+    """Model cache bounded by a byte budget, using each model's measured memory cost.
+
+    Which model to evict (and whether to admit a new one) is up to a pluggable policy.
+    """
+    def __init__(self, budget_mb=2048, policy="lru", cache=None, collect_garbage=True):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.cache = MODEL_CACHE if cache is None else cache
+        self.collect_garbage = collect_garbage
+        if policy not in EVICTION_POLICIES:
+            logger.warning(f"Unknown cache policy '{policy}', using lru")
+            policy = "lru"
+        self.policy = EVICTION_POLICIES[policy]()
         self.access_times = {}
         self.load_times = {}
-        self.memory_usage = {}
+        self.memory_usage = {}  # bytes per cached model
+        self.recency = OrderedDict()  # cached paths, least recently used first
+        # History kept across evictions
+        self.known_costs = {}  # last measured memory cost per path
+        self.load_durations = {}  # last measured load + warm-up seconds per path
+        self.access_counts = {}  # requests per path, hits and misses
+        self.call_slots = {}  # ModelCallSlots per path (demand history survives reloads)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
     
     def get_memory_usage(self):
-        """Get current memory usage percentage"""
+        """Get current system memory usage percentage (reported only, never used for eviction)"""
         return psutil.virtual_memory().percent / 100.0
     
-    def estimate_model_memory(self, model):
-        """Estimate model memory usage in MB"""
-        try:
-            if hasattr(model, 'count_params'):
-                # Keras model
-                params = model.count_params()
-                # Rough estimate: 4 bytes per parameter (float32) + overhead
-                return (params * 4) / (1024 * 1024)  # MB
-            else:
-                # SavedModel - rough estimate
-                return 100  # Default 100MB for SavedModel
-        except:
-            return 50  # Default fallback
+    def get_process_rss(self):
+        """Resident memory of this process in bytes"""
+        return psutil.Process().memory_info().rss
     
-    def should_evict_cache(self):
-        """Check if cache should be evicted based on memory usage"""
-        memory_usage = self.get_memory_usage()
-        cache_size = len(MODEL_CACHE)
-        
-        return (memory_usage > self.memory_threshold or 
-                cache_size >= self.max_size)
+    def expected_cost(self, model_path: str) -> int:
+        """Expected memory cost of a model before it is loaded"""
+        if model_path in self.known_costs:
+            return self.known_costs[model_path]
+        return _path_size_bytes(model_path)
     
-    def evict_least_recently_used(self):
-        """Evict least recently used model from cache"""
-        if not MODEL_CACHE:
-            return
-        
-        # Find least recently used model
-        lru_model_path = min(self.access_times.keys(), 
-                           key=lambda k: self.access_times[k])
-        
-        logger.info(f"Evicting LRU model from cache: {lru_model_path}")
-        
-        # Remove from cache
-        if lru_model_path in MODEL_CACHE:
-            del MODEL_CACHE[lru_model_path]
-        
-        # Cleanup metadata
-        if lru_model_path in self.access_times:
-            del self.access_times[lru_model_path]
-        if lru_model_path in self.load_times:
-            del self.load_times[lru_model_path]
-        if lru_model_path in self.memory_usage:
-            del self.memory_usage[lru_model_path]
+    def used_bytes(self) -> int:
+        return sum(self.memory_usage.values())
+    
+    def fits_without_eviction(self, model_path: str) -> bool:
+        """Whether a model would fit in the budget next to the cached ones"""
+        return self.used_bytes() + self.expected_cost(model_path) <= self.budget_bytes
+    
+    def _plan_evictions(self, required_bytes: int, exclude: str = None):
+        """Models the policy would evict to fit required_bytes, without evicting them"""
+        with CACHE_LOCK:
+            candidates = [path for path in self.cache if path != exclude]
+            free = self.budget_bytes - self.used_bytes()
+            victims = []
+            while free < required_bytes and candidates:
+                victim = self.policy.choose_victim(self, candidates)
+                candidates.remove(victim)
+                victims.append(victim)
+                free += self.memory_usage.get(victim, 0)
+            return victims
+    
+    def would_admit(self, model_path: str, cost_bytes: int = None, load_duration: float = None) -> bool:
+        """Whether the policy would cache a model of this cost, given what it would displace"""
+        if cost_bytes is None:
+            cost_bytes = self.expected_cost(model_path)
+        if load_duration is None:
+            load_duration = self.load_durations.get(model_path, DEFAULT_LOAD_DURATION)
+        victims = self._plan_evictions(cost_bytes, exclude=model_path)
+        return self.policy.admit(self, model_path, cost_bytes, load_duration, victims)
+    
+    def make_room(self, required_bytes: int, exclude: str = None):
+        """Evict models chosen by the policy until required_bytes fit in the budget"""
+        with CACHE_LOCK:
+            while self.used_bytes() + required_bytes > self.budget_bytes:
+                candidates = [path for path in self.cache if path != exclude]
+                if not candidates:
+                    logger.warning(
+                        f"Model needs {required_bytes / (1024 * 1024):.1f}MB, "
+                        f"over the {self.budget_bytes / (1024 * 1024):.0f}MB cache budget"
+                    )
+                    break
+                self.evict(self.policy.choose_victim(self, candidates))
+    
+    def evict(self, model_path: str):
+        """Remove one model from the cache"""
+        with CACHE_LOCK:
+            freed = self.memory_usage.get(model_path, 0)
+            logger.info(f"Evicting model from cache ({self.policy.name}): {model_path} ({freed / (1024 * 1024):.1f}MB)")
+            
+            self.policy.on_evict(self, model_path)
+            
+            # Remove from cache and cleanup metadata
+            self.cache.pop(model_path, None)
+            self.access_times.pop(model_path, None)
+            self.load_times.pop(model_path, None)
+            self.memory_usage.pop(model_path, None)
+            self.recency.pop(model_path, None)
+            self.evictions += 1
         
         # Force garbage collection
-        gc.collect()
+        if self.collect_garbage:
+            gc.collect()
         
-        logger.info(f"Model evicted. Cache size now: {len(MODEL_CACHE)}")
+        logger.info(f"Model evicted. Cache size now: {len(self.cache)}")
     
-    def add_to_cache(self, model_path: str, model):
-        """Add model to cache with memory management"""
+    def add_to_cache(self, model_path: str, model, cost_bytes: int = None, load_duration: float = None) -> bool:
+        """Add model to cache with its measured cost, evicting others until it fits.
+
+        Returns False when the policy declines to cache the model.
+        """
         with CACHE_LOCK:
             current_time = time.time()
+            if cost_bytes is None:
+                cost_bytes = _model_weight_bytes(model)
+            self.known_costs[model_path] = cost_bytes
+            if load_duration is not None:
+                self.load_durations[model_path] = load_duration
+            
+            # Replace a stale entry for the same path instead of counting it twice
+            if model_path in self.cache:
+                self.evict(model_path)
             
-            # Check if we need to evict
-            while self.should_evict_cache() and len(MODEL_CACHE) > 0:
-                self.evict_least_recently_used()
+            if not self.would_admit(model_path, cost_bytes, load_duration):
+                self.rejected += 1
+                logger.info(f"Cache policy {self.policy.name} declined to cache {model_path}; serving it uncached")
+                return False
+            
+            self.make_room(cost_bytes, exclude=model_path)
             
             # Add to cache
-            MODEL_CACHE[model_path] = model
+            self.cache[model_path] = model
             self.access_times[model_path] = current_time
             self.load_times[model_path] = current_time
-            self.memory_usage[model_path] = self.estimate_model_memory(model)
+            self.memory_usage[model_path] = cost_bytes
+            self.recency[model_path] = True
+            self.policy.on_insert(self, model_path)
             
             logger.info(f"Model added to cache: {model_path}")
-            logger.info(f"Estimated memory usage: {self.memory_usage[model_path]:.1f}MB")
-            logger.info(f"Current cache size: {len(MODEL_CACHE)}")
+            logger.info(f"Measured memory cost: {cost_bytes / (1024 * 1024):.1f}MB")
+            logger.info(f"Cache usage: {self.used_bytes() / (1024 * 1024):.1f}/{self.budget_bytes / (1024 * 1024):.0f}MB ({len(self.cache)} models)")
+            return True
     
-    def get_from_cache(self, model_path: str):
-        """Get model from cache and update access time"""
+    def get_from_cache(self, model_path: str, record: bool = True):
+        """Get model from cache and update access statistics (record=False only peeks)"""
         with CACHE_LOCK:
-            if model_path in MODEL_CACHE:
-                self.access_times[model_path] = time.time()
+            if record:
+                self.access_counts[model_path] = self.access_counts.get(model_path, 0) + 1
+            
+            if model_path in self.cache:
+                if record:
+                    self.hits += 1
+                    self.access_times[model_path] = time.time()
+                    self.recency.move_to_end(model_path)
+                    self.policy.on_access(self, model_path)
                 logger.info(f"Model retrieved from cache: {model_path}")
-                return MODEL_CACHE[model_path]
+                return self.cache[model_path]
+            
+            if record:
+                self.misses += 1
             return None
     
+    def call_slots_for(self, model_path: str) -> ModelCallSlots:
+        """Concurrency control for calls into a model"""
+        with CACHE_LOCK:
+            slots = self.call_slots.get(model_path)
+            if slots is None:
+                slots = self.call_slots[model_path] = ModelCallSlots()
+            return slots
+    
+    def clear(self):
+        """Drop every cached model (request history is kept)"""
+        with CACHE_LOCK:
+            self.cache.clear()
+            self.access_times.clear()
+            self.load_times.clear()
+            self.memory_usage.clear()
+            self.recency.clear()
+            self.policy.reset()
+    
     def get_cache_stats(self):
         """Get detailed cache statistics"""
         memory_usage = self.get_memory_usage()
-        total_model_memory = sum(self.memory_usage.values())
+        used_bytes = self.used_bytes()
+        lookups = self.hits + self.misses
         
         return {
-            "cached_models": len(MODEL_CACHE),
-            "max_cache_size": self.max_size,
+            "cached_models": len(self.cache),
+            "cache_policy": self.policy.name,
+            "cache_budget_mb": f"{self.budget_bytes / (1024 * 1024):.0f}",
+            "cache_used_mb": f"{used_bytes / (1024 * 1024):.1f}",
+            "cache_used_percent": f"{used_bytes / self.budget_bytes:.1%}" if self.budget_bytes else "n/a",
+            "hit_rate": f"{self.hits / lookups:.1%}" if lookups else "n/a",
+            "evictions": self.evictions,
+            "rejected_admissions": self.rejected,
+            "process_rss_mb": f"{self.get_process_rss() / (1024 * 1024):.1f}",
             "system_memory_usage": f"{memory_usage:.1%}",
-            "estimated_model_memory_mb": f"{total_model_memory:.1f}",
-            "memory_threshold": f"{self.memory_threshold:.1%}",
             "models": [
                 {
                     "path": path,
-                    "memory_mb": f"{self.memory_usage.get(path, 0):.1f}",
+                    "backend": getattr(self.cache[path], 'name', 'unknown'),
+                    "compiled_buckets": getattr(self.cache[path], 'compiled_buckets', None),
+                    "memory_mb": f"{self.memory_usage.get(path, 0) / (1024 * 1024):.1f}",
+                    "requests": self.access_counts.get(path, 0),
+                    "reload_seconds": f"{self.load_durations.get(path, 0):.2f}",
+                    "call_slots": self.call_slots[path].get_stats() if path in self.call_slots else None,
                     "last_accessed": time.ctime(self.access_times.get(path, 0)),
                     "load_time": time.ctime(self.load_times.get(path, 0))
                 }
-                for path in MODEL_CACHE.keys()
+                for path in list(self.cache.keys())
             ]
         }
     
 # Global cache manager instance
-cache_manager = ModelCacheManager(max_size=MAX_CACHE_SIZE, memory_threshold=MEMORY_THRESHOLD)
+cache_manager = ModelCacheManager(budget_mb=MODEL_CACHE_BUDGET_MB, policy=MODEL_CACHE_POLICY)
 
 # ============================================================================
 # MODEL CONFIGURATION
 # ============================================================================
 
+def _lazy_preprocess(application: str):
+    """preprocess_input of tf_keras.applications.<application>, imported on first call"""
+    module = LazyModule(f"tf_keras.applications.{application}")
+    
+    def preprocess(x, *args, **kwargs):
+        return module.preprocess_input(x, *args, **kwargs)
+    
+    preprocess.__name__ = f"preprocess_input_{application}"
+    return preprocess
+
+# Default preprocessing imports
+preprocess_input = _lazy_preprocess("imagenet_utils")
+
 # Default preprocessing function (was missing)
 def preprocess_input_default(x):
     """Default preprocessing function for unknown models"""
     return preprocess_input(x)
 
-# Model preprocessing function mapping
-PREPROCESSING_FUNCTIONS = {
-    'EfficientNetV2B0': preprocess_input_efficientnetv2,
-    'EfficientNetV1': preprocess_input_efficientnet,
-    'MobileNetV2': preprocess_input_mobilenetv2,
-    'MobileNetV3Small': preprocess_input_mobilenetv3,
-    'MobileNetV3Large': preprocess_input_mobilenetv3,
-    'MobileNet': preprocess_input_mobilenet,
-    'ResNet50V2': preprocess_input_resnetv2,
-    'ResNet101V2': preprocess_input_resnetv2,
-    'ResNet50': preprocess_input_resnet,
-    'ResNet101': preprocess_input_resnet,
-    'ConvNeXtTiny': preprocess_input_convnext,
-    'ConvNeXtSmall': preprocess_input_convnext,
-    'InceptionV3': preprocess_input_inceptionv3,
-    'DenseNet121': preprocess_input_densenet,
-}
+# Preprocessing functions by registry name (a tf_keras.applications module), created on first use
+_preprocess_functions = {DEFAULT_PREPROCESSING: preprocess_input_default}
+
+def get_preprocess_function(model_name: str):
+    """Preprocessing function recorded in the registry for a model option, name or path"""
+    entry = model_registry.resolve(model_name)
+    preprocessing = entry['preprocessing'] if entry else DEFAULT_PREPROCESSING
+    
+    function = _preprocess_functions.get(preprocessing)
+    if function is None:
+        function = _preprocess_functions.setdefault(preprocessing, _lazy_preprocess(preprocessing))
+    return function
+
+def _on_registry_change(changes: Dict[str, Any]):
+    """Drop cached models whose registry entry was removed or changed"""
+    for model_path in changes['stale_paths']:
+        if model_path in cache_manager.cache:
+            cache_manager.evict(model_path)
+
+# Scanned at startup, re-read when the file changes
+model_registry = ModelRegistry(
+    MODEL_REGISTRY_PATH, reload_interval=MODEL_REGISTRY_RELOAD_SECONDS, on_change=_on_registry_change
+)
+model_registry.load()
 
 def get_model_mapping():
-    """Get consistent model mapping used across the application"""
-    return {
-        # Transformer-based models
-        "vit": ('model/classification/vit_model_plankton', "vit"),
-        "bit": ('model/classification/bit_model_plankton', "bit"),
-        "swin": ('model/classification/swin_model_plankton', "swin"),
-        
-        # CNN-based models
-        "conv": ('model/classification/conv_model_plankton', "conv"),
-        "regnet": ('model/classification/regnet_model_plankton', "regnet"),
-        
-        # Modern architectures (.keras files)
-        "convnext_small": ('model/classification/ConvNeXtSmall500DataReplicated.keras', "ConvNeXtSmall"),
-        "convnext_tiny": ('model/classification/ConvNeXtTiny500DataReplicated.keras', "ConvNeXtTiny"),
-        "densenet121": ('model/classification/DenseNet121500DataReplicated.keras', "DenseNet121"),
-        "efficientnetv2b0": ('model/classification/EfficientNetV2B0500DataReplicated.keras', "EfficientNetV2B0"),
-        "inceptionv3": ('model/classification/InceptionV3500DataReplicated.keras', "InceptionV3"),
-        
-        # Mobile-optimized models
-        "mobilenet": ('model/classification/MobileNet500DataReplicated.keras', "MobileNet"),
-        "mobilenetv2": ('model/classification/MobileNetV2500DataReplicated.keras', "MobileNetV2"),
-        "mobilenetv3_large": ('model/classification/MobileNetV3Large500DataReplicated.keras', "MobileNetV3Large"),
-        "mobilenetv3_small": ('model/classification/MobileNetV3Small500DataReplicated.keras', "MobileNetV3Small"),
-        
-        # ResNet family
-        "resnet50": ('model/classification/ResNet50500DataReplicated.keras', "ResNet50"),
-        "resnet101": ('model/classification/ResNet101500DataReplicated.keras', "ResNet101"),
-        "resnet50v2": ('model/classification/ResNet50V2500DataReplicated.keras', "ResNet50V2"),
-        "resnet101v2": ('model/classification/ResNet101V2500DataReplicated.keras', "ResNet101V2"),
-    }
+    """Get consistent model mapping used across the application ({option: (path, display name)})"""
+    return model_registry.mapping()
 
 def get_input_size(model_name):
-    """Get input size for a given model based on its architecture"""
-    model_name_lower = model_name.lower()
+    """Get input size for a model option, display name or model path from the registry"""
+    return model_registry.input_size(model_name)
+
+_manifest_entries = None
+_verified_artifacts = {}  # artifact path -> version whose checksum matched the manifest
+
+def get_manifest_entry(model_path: str) -> Optional[Dict[str, Any]]:
+    """Manifest entry for a model path, or None when absent or stale (source changed since preparation)"""
+    global _manifest_entries
+    if _manifest_entries is None:
+        try:
+            with open(MODEL_MANIFEST_PATH, 'r') as f:
+                _manifest_entries = {entry['source']: entry for entry in json.load(f).get('models', {}).values()}
+            logger.info(f"Loaded model manifest with {len(_manifest_entries)} entries")
+        except FileNotFoundError:
+            _manifest_entries = {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable model manifest {MODEL_MANIFEST_PATH}: {e}")
+            _manifest_entries = {}
+
+    entry = _manifest_entries.get(model_path)
+    if entry is None:
+        return None
+    if entry.get('source_version') != _get_model_version(model_path) or not os.path.exists(entry['path']):
+        logger.warning(f"Manifest entry for {model_path} is stale, run scripts/prepare_models.py again")
+        return None
     
-    # InceptionV3 requires 299x299
-    if model_name_lower == "inceptionv3":
-        return 299
-    # All other models use 224x224
-    else:
-        return 224
+    # Checksum the artifact on first use and whenever it changes on disk
+    artifact_version = _get_model_version(entry['path'])
+    if entry.get('checksum') and _verified_artifacts.get(entry['path']) != artifact_version:
+        if file_checksum(entry['path']) != entry['checksum']:
+            logger.warning(f"Manifest artifact {entry['path']} does not match its checksum, run scripts/prepare_models.py again")
+            return None
+        _verified_artifacts[entry['path']] = artifact_version
+    return entry
+
+def get_backend_path(model_path: str, backend: str) -> str:
+    """Location of a converted model for a backend ("onnx", "tflite-dynamic", "tflite-int8")"""
+    stem = os.path.splitext(os.path.basename(model_path.rstrip('/')))[0]
+    if backend == "onnx":
+        return os.path.join(ONNX_MODEL_DIR, f"{stem}.onnx")
+    if backend.startswith("tflite-"):
+        return os.path.join(TFLITE_MODEL_DIR, f"{stem}.{backend[len('tflite-'):]}.tflite")
+    return model_path
+
+# ============================================================================
+# INFERENCE BACKENDS
+# ============================================================================
+
+class InferenceBackend(ABC):
+    """A loaded model behind a common interface: run() takes a float32 NHWC batch
+    of preprocessed images and returns an (N, num_classes) probability array."""
+    name = "base"
+    warmed = False
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+
+    @abstractmethod
+    def run(self, batch) -> np.ndarray:
+        """Predict one batch"""
+
+    def warmup(self):
+        """Prepare the backend for its first real request (no-op by default)"""
+        pass
+
+    def weight_bytes(self) -> int:
+        """Bytes of model weights (the model file size unless the backend knows better)"""
+        return _path_size_bytes(self.model_path)
+
+class KerasBackend(InferenceBackend):
+    """Keras model (.keras) called through compiled fixed-signature functions.
+
+    model.predict() rebuilds its data-adapter machinery on every call; instead each
+    batch-size bucket gets its own tf.function (optionally XLA-compiled), and
+    batches are zero-padded up to the nearest bucket.
+    """
+    name = "keras"
+
+    def __init__(self, model_path: str, model, jit_compile: bool = INFERENCE_XLA):
+        super().__init__(model_path)
+        self.model = model
+        self.jit_compile = jit_compile
+        self.input_shape = tuple(model.input_shape[1:]) if not isinstance(model.input_shape, list) else None
+        self._functions = {}
+        self._lock = threading.Lock()
+
+    @property
+    def compiled_buckets(self):
+        return sorted(self._functions.keys())
+
+    def _function_for(self, bucket: int):
+        function = self._functions.get(bucket)
+        if function is None:
+            with self._lock:
+                function = self._functions.get(bucket)
+                if function is None:
+                    signature = [tf.TensorSpec((bucket,) + self.input_shape, tf.float32)]
+                    function = tf.function(
+                        lambda x: self.model(x, training=False), input_signature=signature, jit_compile=self.jit_compile
+                    )
+                    self._functions[bucket] = function
+        return function
+
+    def _call(self, batch):
+        outputs = self.model(batch, training=False)
+        return outputs[0] if isinstance(outputs, (list, tuple)) else outputs
+
+    def run(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+
+        # Models with a dynamic spatial input cannot use fixed signatures
+        if self.input_shape is None or None in self.input_shape:
+            return self._call(batch).numpy()
+
+        outputs = []
+        max_bucket = COMPILED_BATCH_BUCKETS[-1]
+        for start in range(0, len(batch), max_bucket):
+            chunk = batch[start:start + max_bucket]
+            bucket = next(b for b in COMPILED_BATCH_BUCKETS if b >= len(chunk))
+            if bucket > len(chunk):
+                chunk = np.concatenate([chunk, np.zeros((bucket - len(chunk),) + chunk.shape[1:], dtype=np.float32)])
+
+            result = self._function_for(bucket)(tf.constant(chunk))
+            if isinstance(result, (list, tuple)):
+                result = result[0]
+            outputs.append(result.numpy()[:min(max_bucket, len(batch) - start)])
+
+        return np.concatenate(outputs, axis=0)
+
+    def warmup(self):
+        """Trace (and XLA-compile) the buckets up to the micro-batch size"""
+        if self.input_shape is None or None in self.input_shape:
+            return
+        for bucket in COMPILED_BATCH_BUCKETS:
+            if bucket > max(1, COMPILED_WARMUP_MAX_BATCH):
+                break
+            self._function_for(bucket)(tf.zeros((bucket,) + self.input_shape, tf.float32))
+
+    def weight_bytes(self):
+        return sum(int(np.prod(weight.shape)) * weight.dtype.size for weight in self.model.weights)
+
+class SavedModelBackend(InferenceBackend):
+    """TensorFlow SavedModel called through its serving signature"""
+    name = "savedmodel"
+
+    def __init__(self, model_path: str, model):
+        super().__init__(model_path)
+        self.model = model
+
+        # Resolve the serving signature and its input name once
+        self.signature = model.signatures.get('serving_default')
+        if self.signature is None:
+            signature_keys = list(model.signatures.keys())
+            if not signature_keys:
+                raise ValueError("No signatures found in SavedModel")
+            self.signature = model.signatures[signature_keys[0]]
+            logger.info(f"Using signature: {signature_keys[0]}")
+
+        input_names = list(self.signature.structured_input_signature[1].keys())
+        self.input_name = input_names[0] if input_names else 'input_1'
+
+        # Declared (H, W, C), None when the signature leaves it unknown
+        try:
+            self.input_shape = tuple(self.signature.structured_input_signature[1][self.input_name].shape[1:])
+        except (KeyError, ValueError):
+            self.input_shape = None
+
+    def run(self, batch):
+        prediction_result = self.signature(**{self.input_name: tf.constant(batch)})
+
+        # Extract predictions from result (first output)
+        if isinstance(prediction_result, dict):
+            prediction_result = prediction_result[list(prediction_result.keys())[0]]
+        return prediction_result.numpy()
+
+    def weight_bytes(self):
+        variables = getattr(self.model, 'variables', None)
+        if not variables:
+            return _path_size_bytes(self.model_path)
+        return sum(int(np.prod(variable.shape)) * variable.dtype.size for variable in variables)
+
+class TFLiteBackend(InferenceBackend):
+    """TFLite model served by a small pool of interpreters.
+
+    Interpreters are not thread-safe, so each concurrent call borrows its own.
+    All of them map the same .tflite file, so the weights are shared.
+    """
+    name = "tflite"
+
+    def __init__(self, model_path: str, pool_size: int = TFLITE_POOL_SIZE, num_threads: int = TFLITE_NUM_THREADS):
+        super().__init__(model_path)
+        self.pool_size = max(1, pool_size)
+        self.num_threads = num_threads or get_thread_layout()["intra_op_threads"]
+        self._idle = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+        # Create one interpreter up front so broken files fail at load time
+        self._idle.put(self._create_interpreter())
+
+    def _create_interpreter(self):
+        interpreter = tf.lite.Interpreter(model_path=self.model_path, num_threads=self.num_threads)
+        interpreter.allocate_tensors()
+        self._created += 1
+        return interpreter
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.pool_size:
+                return self._create_interpreter()
+
+        return self._idle.get()
+
+    def run(self, batch):
+        """Run a float32 batch through one interpreter, handling int8 (de)quantization"""
+        interpreter = self._acquire()
+        try:
+            input_details = interpreter.get_input_details()[0]
+            if tuple(input_details['shape']) != tuple(batch.shape):
+                interpreter.resize_tensor_input(input_details['index'], batch.shape)
+                interpreter.allocate_tensors()
+                input_details = interpreter.get_input_details()[0]
+
+            scale, zero_point = input_details['quantization']
+            if input_details['dtype'] != np.float32 and scale:
+                batch = np.clip(np.round(batch / scale + zero_point), np.iinfo(input_details['dtype']).min, np.iinfo(input_details['dtype']).max)
+            interpreter.set_tensor(input_details['index'], batch.astype(input_details['dtype']))
+
+            interpreter.invoke()
+
+            output_details = interpreter.get_output_details()[0]
+            predictions = interpreter.get_tensor(output_details['index'])
+            scale, zero_point = output_details['quantization']
+            if output_details['dtype'] != np.float32 and scale:
+                predictions = (predictions.astype(np.float32) - zero_point) * scale
+            return np.array(predictions, dtype=np.float32)
+        finally:
+            self._idle.put(interpreter)
+
+class OnnxBackend(InferenceBackend):
+    """ONNX Runtime session on the CPU execution provider (sessions are thread-safe)"""
+    name = "onnx"
+
+    def __init__(self, model_path: str, num_threads: int = ONNX_NUM_THREADS, shared_weights: bool = SHARED_WEIGHTS):
+        super().__init__(model_path)
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("onnxruntime is required for the onnx backend (pip install onnxruntime)") from e
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = num_threads or get_thread_layout()["intra_op_threads"]
+
+        self.shared_weights = None
+        if shared_weights:
+            # Initializers point into the memory-mapped weight file instead of private copies.
+            # Pre-packing would copy them into private, kernel-specific layouts.
+            mapping, arrays = load_shared_weights(model_path)
+            values = {name: ort.OrtValue.ortvalue_from_numpy(array) for name, array in arrays.items()}
+            for name, value in values.items():
+                options.add_initializer(name, value)
+            options.add_session_config_entry("session.disable_prepacking", "1")
+            # ONNX Runtime does not own these buffers, they must outlive the session
+            self.shared_weights = (mapping, arrays, values)
+
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def run(self, batch):
+        return self.session.run(None, {self.input_name: np.ascontiguousarray(batch, dtype=np.float32)})[0]
+
+def _load_manifest_backend(entry: Dict[str, Any]) -> InferenceBackend:
+    """Load a prepared artifact with exactly the method recorded in the manifest"""
+    artifact_path, artifact_format = entry['path'], entry['format']
+    if artifact_format == "keras":
+        return KerasBackend(artifact_path, tf.keras.models.load_model(artifact_path, compile=False))
+    if artifact_format == "savedmodel":
+        return SavedModelBackend(artifact_path, tf.saved_model.load(artifact_path))
+    if artifact_format == "tflite":
+        return TFLiteBackend(artifact_path)
+    if artifact_format == "onnx":
+        return OnnxBackend(artifact_path)
+    raise ValueError(f"Unknown manifest format: {artifact_format}")
+
+def _load_backend(model_path: str) -> Tuple[InferenceBackend, str]:
+    """Load a model file into the matching backend; returns (backend, load method)"""
+    # Prepared models skip the trial-and-error below
+    entry = get_manifest_entry(model_path)
+    if entry is not None:
+        try:
+            return _load_manifest_backend(entry), f"manifest ({entry['format']})"
+        except Exception as e:
+            logger.warning(f"Manifest load failed for {model_path}, falling back: {str(e)}")
+
+    # The registry declares the format of the file it lists; derived files (exports) are probed below
+    registry_entry = model_registry.resolve(model_path)
+    if registry_entry is not None and os.path.normpath(registry_entry['path']) == os.path.normpath(model_path):
+        model_format = registry_entry['format']
+        if model_format == 'tflite':
+            return TFLiteBackend(model_path), "TFLite (registry)"
+        if model_format == 'onnx':
+            return OnnxBackend(model_path), "ONNX Runtime (registry)"
+        if model_format == 'savedmodel':
+            return SavedModelBackend(model_path, tf.saved_model.load(model_path)), "SavedModel (registry)"
+
+    if model_path.endswith('.tflite'):
+        return TFLiteBackend(model_path), "TFLite"
+    if model_path.endswith('.onnx'):
+        return OnnxBackend(model_path), "ONNX Runtime"
+
+    try:
+        # Try loading as Keras model first
+        logger.info(f"Attempting to load as Keras model: {model_path}")
+        return KerasBackend(model_path, tf.keras.models.load_model(model_path)), "Keras"
+        
+    except Exception as e1:
+        logger.warning(f"Keras loading failed: {str(e1)}")
+        
+        try:
+            # Try loading with compile=False
+            logger.info(f"Attempting to load with compile=False: {model_path}")
+            return KerasBackend(model_path, tf.keras.models.load_model(model_path, compile=False)), "Keras (compile=False)"
+            
+        except Exception as e2:
+            logger.warning(f"Keras compile=False failed: {str(e2)}")
+            
+            try:
+                # Try loading as SavedModel
+                logger.info(f"Attempting to load as SavedModel: {model_path}")
+                return SavedModelBackend(model_path, tf.saved_model.load(model_path)), "SavedModel"
+                
+            except Exception as e3:
+                logger.error(f"All loading methods failed for {model_path}")
+                logger.error(f"Keras error: {str(e1)}")
+                logger.error(f"Keras compile=False error: {str(e2)}")
+                logger.error(f"SavedModel error: {str(e3)}")
+                raise e3
 
 # ============================================================================
 # UTILITY FUNCTIONS
@@ -250,6 +1036,22 @@ def convert_numpy_types(obj):
     else:
         return obj
     
+def _path_size_bytes(path: str) -> int:
+    """Size of a model file, or of all files in a SavedModel directory"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+def _model_weight_bytes(model) -> int:
+    """Real weight bytes of a loaded backend"""
+    try:
+        return int(model.weight_bytes())
+    except Exception:
+        return _path_size_bytes(model.model_path)
+
 def generate_uuid_28():
     """Generate UUID with 28 characters"""
     # Generate UUID and remove hyphens
@@ -262,19 +1064,36 @@ def generate_uuid_28():
 # ============================================================================
 
 def clear_model_cache():
-    """Clear all models from cache"""
-    global MODEL_CACHE
+    """Clear all models from cache (including inference worker processes)"""
     with CACHE_LOCK:
-        MODEL_CACHE.clear()
-        cache_manager.access_times.clear()
-        cache_manager.load_times.clear()
-        cache_manager.memory_usage.clear()
+        cache_manager.clear()
         gc.collect()
         logger.info("Model cache cleared completely")
 
+    worker_pool = get_worker_pool(start=False)
+    if worker_pool is not None:
+        worker_pool.broadcast("clear")
+
 def get_cache_info():
     """Get information about cached models"""
-    return cache_manager.get_cache_stats()
+    cache_info = cache_manager.get_cache_stats()
+    cache_info['batching'] = batch_scheduler.get_stats()
+    cache_info['inference_executor'] = inference_executor.get_stats()
+    cache_info['result_cache'] = result_cache.get_stats()
+    cache_info['model_loading'] = model_load_flight.get_stats()
+
+    worker_pool = get_worker_pool(start=False)
+    if worker_pool is not None:
+        cache_info['worker_pool'] = worker_pool.get_summary()
+
+    return cache_info
+
+def get_worker_cache_info():
+    """Get cache status aggregated across inference worker processes (None in thread mode)"""
+    worker_pool = get_worker_pool(start=False)
+    if worker_pool is None:
+        return None
+    return worker_pool.get_stats()
     
 # ============================================================================
 # INTERNAL HELPER FUNCTIONS
@@ -305,12 +1124,16 @@ def _validate_image_path(img_path):
         logger.error(f"Image path validation failed: {str(e)}")
         raise e
 
+# Loads in flight, used to tell whether a load's RSS growth was its own
+_LOAD_ACTIVITY_LOCK = threading.Lock()
+_load_activity = {'active': 0, 'started': 0}
+
 def _load_model_safe(model_path: str, force_reload: bool = False):
     """Load model with enhanced caching and error handling"""
     
     # Check cache first (unless force reload)
     if not force_reload:
-        cached_model = cache_manager.get_from_cache(model_path)
+        cached_model = cache_manager.get_from_cache(model_path, record=False)
         if cached_model is not None:
             return cached_model
     
@@ -320,45 +1143,54 @@ def _load_model_safe(model_path: str, force_reload: bool = False):
     if not os.path.exists(model_path):
         raise FileNotFoundError(f"Model file not found: {model_path}")
     
-    start_time = time.time()
-    model = None
+    # A registered checksum catches truncated or swapped model files before they are served
+    entry = model_registry.resolve(model_path)
+    if MODEL_REGISTRY_VERIFY_CHECKSUMS and entry and entry['checksum'] and os.path.normpath(entry['path']) == os.path.normpath(model_path):
+        if file_checksum(model_path) != entry['checksum']:
+            raise ValueError(f"Checksum mismatch for {model_path}, the file differs from {MODEL_REGISTRY_PATH}")
     
+    # Free budget for the model before loading it, unless the policy will not cache it anyway
+    if cache_manager.would_admit(model_path):
+        cache_manager.make_room(cache_manager.expected_cost(model_path), exclude=model_path)
+    
+    start_time = time.time()
+    rss_before = cache_manager.get_process_rss()
+    with _LOAD_ACTIVITY_LOCK:
+        _load_activity['active'] += 1
+        _load_activity['started'] += 1
+        started_at = _load_activity['started']
+        overlapped = _load_activity['active'] > 1
     try:
-        # Try loading as Keras model first
-        logger.info(f"Attempting to load as Keras model: {model_path}")
-        model = tf.keras.models.load_model(model_path)
-        load_method = "Keras"
+        model, load_method = _load_backend(model_path)
         
-    except Exception as e1:
-        logger.warning(f"Keras loading failed: {str(e1)}")
-        
-        try:
-            # Try loading with compile=False
-            logger.info(f"Attempting to load with compile=False: {model_path}")
-            model = tf.keras.models.load_model(model_path, compile=False)
-            load_method = "Keras (compile=False)"
-            
-        except Exception as e2:
-            logger.warning(f"Keras compile=False failed: {str(e2)}")
-            
-            try:
-                # Try loading as SavedModel
-                logger.info(f"Attempting to load as SavedModel: {model_path}")
-                model = tf.saved_model.load(model_path)
-                load_method = "SavedModel"
-                
-            except Exception as e3:
-                logger.error(f"All loading methods failed for {model_path}")
-                logger.error(f"Keras error: {str(e1)}")
-                logger.error(f"Keras compile=False error: {str(e2)}")
-                logger.error(f"SavedModel error: {str(e3)}")
-                raise e3
+        # Compile and warm up before the model serves its first request
+        if MODEL_WARMUP:
+            warmup_start = time.time()
+            model.warmup()
+            model.warmed = True
+            logger.info(f"Model warm-up time: {time.time() - warmup_start:.2f} seconds")
+    finally:
+        with _LOAD_ACTIVITY_LOCK:
+            overlapped = overlapped or _load_activity['started'] != started_at
+            _load_activity['active'] -= 1
     
     load_time = time.time() - start_time
     
     if model is not None:
-        # Add to cache using cache manager
-        cache_manager.add_to_cache(model_path, model)
+        # A fixed square input declared by the model wins over a wrong registry input_size
+        input_shape = getattr(model, 'input_shape', None)
+        if input_shape and len(input_shape) == 3 and input_shape[0] == input_shape[1] and input_shape[0]:
+            model_registry.confirm_input_size(model_path, int(input_shape[0]))
+        
+        # Cost is the RSS growth while loading, between the real weight bytes and a small
+        # multiple of them: requests served meanwhile allocate too and would inflate it.
+        # Concurrent loads share the RSS growth, so only the weight bytes are attributable.
+        weight_bytes = _model_weight_bytes(model)
+        cost_bytes = weight_bytes
+        if not overlapped:
+            rss_growth = cache_manager.get_process_rss() - rss_before
+            cost_bytes = min(max(rss_growth, weight_bytes), int(weight_bytes * MODEL_COST_MAX_WEIGHT_MULTIPLE))
+        cache_manager.add_to_cache(model_path, model, cost_bytes=cost_bytes, load_duration=load_time)
         
         logger.info(f"Model loaded successfully using {load_method}")
         logger.info(f"Load time: {load_time:.2f} seconds")
@@ -370,25 +1202,14 @@ def _load_model_safe(model_path: str, force_reload: bool = False):
 def _validate_model_functionality(model, model_path: str):
     """Validate that loaded model can perform predictions"""
     try:
-        # Get input shape for the model
-        model_name = os.path.basename(model_path)
-        input_size = get_input_size(model_name)
+        # Get input shape for the model (the path resolves to its registry entry)
+        input_size = get_input_size(model_path)
         
         # Create dummy input
         dummy_input = np.random.random((1, input_size, input_size, 3)).astype(np.float32)
         
         # Test prediction
-        if hasattr(model, 'predict'):
-            # Keras model
-            _ = model.predict(dummy_input, verbose=0)
-        elif hasattr(model, 'signatures'):
-            # SavedModel
-            signature_key = list(model.signatures.keys())[0]
-            signature = model.signatures[signature_key]
-            _ = signature(tf.constant(dummy_input))
-        else:
-            logger.warning(f"Unknown model type for validation: {type(model)}")
-            return True  # Skip validation
+        _ = model.run(dummy_input)
         
         logger.info(f"Model functionality validated: {model_path}")
         return True
@@ -421,7 +1242,7 @@ def load_model_with_retry(model_path: str, max_retries: int = 3, validate: bool
             if attempt < max_retries - 1:
                 # Clear problematic model from cache before retry
                 if model_path in MODEL_CACHE:
-                    del MODEL_CACHE[model_path]
+                    cache_manager.evict(model_path)
                 
                 wait_time = 2 ** attempt  # Exponential backoff
                 logger.info(f"Retrying in {wait_time} seconds...")
@@ -430,89 +1251,82 @@ def load_model_with_retry(model_path: str, max_retries: int = 3, validate: bool
                 logger.error(f"All {max_retries} attempts failed for {model_path}")
                 raise e
 
-def _load_labels():
-    """Load labels with caching"""
-    global LABELS_CACHE
-    if LABELS_CACHE is None:
-        with open('model/labels.json', 'r') as label_file:
-            LABELS_CACHE = json.load(label_file)
+def _load_labels(model_name: str = None):
+    """Load the label set of a model (from the registry) with caching"""
+    entry = model_registry.resolve(model_name) if model_name else None
+    labels_path = entry['labels'] if entry else 'model/labels.json'
+    
+    labels = LABELS_CACHE.get(labels_path)
+    if labels is None:
+        with open(labels_path, 'r') as label_file:
+            labels = LABELS_CACHE[labels_path] = json.load(label_file)
         print("Labels loaded and cached")
-    return LABELS_CACHE
+    return labels
 
-def _preprocess_image_optimized(img_path: str, model_name: str):
-    """Optimized image preprocessing with caching"""
+def _decode_image_bytes(image_bytes):
+    """Decode encoded image bytes (JPEG/PNG/...) into a BGR array without touching disk"""
+    buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+    if buffer.size == 0:
+        raise ValueError("Image data is empty")
+    
+    image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Unable to decode image data")
+    
+    return image
+
+def _preprocess_image_optimized(img_source, model_name: str):
+    """Optimized image preprocessing from a file path, in-memory image bytes or a decoded BGR array"""
     
     # Get preprocessing function
-    preprocess_func = PREPROCESSING_FUNCTIONS.get(model_name, preprocess_input_default)
+    preprocess_func = get_preprocess_function(model_name)
     input_size = get_input_size(model_name)
     
     # Load and preprocess image
-    image = cv2.imread(img_path)
-    if image is None:
-        raise ValueError(f"Unable to load image: {img_path}")
+    if isinstance(img_source, np.ndarray):
+        # Already decoded BGR image (lets callers decode once for several models)
+        image = img_source
+    elif isinstance(img_source, (bytes, bytearray, memoryview)):
+        image = _decode_image_bytes(img_source)
+    else:
+        image = cv2.imread(img_source)
+        if image is None:
+            raise ValueError(f"Unable to load image: {img_source}")
+    
+    # Apply model-specific preprocessing
+    processed_image = preprocess_func(_resize_to_input_array(image, input_size))
+    
+    return processed_image
+
+def _resize_to_input_array(image, input_size: int):
+    """Resize a BGR image to a (1, size, size, 3) float32 RGB array, before model-specific preprocessing"""
     
     # Resize image efficiently
     image = cv2.resize(image, (input_size, input_size), interpolation=cv2.INTER_LANCZOS4)
     image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
     
-    # Convert to array and normalize
+    # Convert to array
     image_array = np.array(image, dtype=np.float32)
-    image_array = np.expand_dims(image_array, axis=0)
-    
-    # Apply model-specific preprocessing
-    processed_image = preprocess_func(image_array)
-    
-    return processed_image
+    return np.expand_dims(image_array, axis=0)
 
-def _run_model_prediction_enhanced(model, processed_img, model_name: str):
-    """Enhanced model prediction with better error handling"""
+def _run_model_prediction_enhanced(model, processed_img, model_name: str, model_path: str = None):
+    """Enhanced model prediction with better error handling (accepts batches of N images).
+    
+    With model_path the call waits for one of the model's call slots.
+    """
     
     try:
-        if hasattr(model, 'predict'):
-            # Keras model
-            logger.debug(f"Using Keras predict method for {model_name}")
-            predictions = model.predict(processed_img, verbose=0)
-            
-        elif hasattr(model, 'signatures'):
-            # SavedModel
-            logger.debug(f"Using SavedModel signature for {model_name}")
-            
-            # Get the serving signature
-            serving_default = model.signatures.get('serving_default')
-            if serving_default is None:
-                # Try to get any available signature
-                signature_keys = list(model.signatures.keys())
-                if signature_keys:
-                    serving_default = model.signatures[signature_keys[0]]
-                    logger.info(f"Using signature: {signature_keys[0]}")
-                else:
-                    raise ValueError("No signatures found in SavedModel")
-            
-            # Convert to tensor and predict
-            input_tensor = tf.constant(processed_img)
-            
-            # Get input name from signature
-            input_names = list(serving_default.structured_input_signature[1].keys())
-            input_name = input_names[0] if input_names else 'input_1'
-            
-            # Run prediction
-            prediction_result = serving_default(**{input_name: input_tensor})
-            
-            # Extract predictions from result
-            if isinstance(prediction_result, dict):
-                # Get the first output
-                output_key = list(prediction_result.keys())[0]
-                predictions = prediction_result[output_key].numpy()
-            else:
-                predictions = prediction_result.numpy()
-                
+        logger.debug(f"Using {model.name} backend for {model_name}")
+        if model_path is not None:
+            with cache_manager.call_slots_for(model_path).slot():
+                predictions = np.asarray(model.run(processed_img))
         else:
-            raise ValueError(f"Unknown model type: {type(model)}")
+            predictions = np.asarray(model.run(processed_img))
         
-        # Validate prediction shape
-        if predictions.ndim == 2 and predictions.shape[0] == 1:
+        # Validate prediction shape (one row per input image)
+        if predictions.ndim == 2 and predictions.shape[0] == processed_img.shape[0]:
             return predictions
-        elif predictions.ndim == 1:
+        elif predictions.ndim == 1 and processed_img.shape[0] == 1:
             return predictions.reshape(1, -1)
         else:
             raise ValueError(f"Unexpected prediction shape: {predictions.shape}")
@@ -525,7 +1339,7 @@ def _process_prediction_results(predictions, model_name: str):
     """Process prediction results into standardized format"""
     
     # Load class names
-    class_names = _load_labels()
+    class_names = _load_labels(model_name)
     
     # Get top 3 predictions
     top_3_indices = np.argsort(predictions[0])[-3:][::-1]
@@ -559,18 +1373,153 @@ def _process_prediction_results(predictions, model_name: str):
 # MODEL PRELOADING
 # ============================================================================
 
-def preload_models_async():
-    """Asynchronous model preloading with priority system"""
-    logger.info("Starting asynchronous model preloading...")
+class PreloadProgress:
+    """Live per-model preload state (queued, loading, warmed/loaded, failed, skipped)"""
     
-    model_mapping = get_model_mapping()
+    # Most severe first, used when combining the states reported by several workers
+    STATE_ORDER = ('failed', 'loading', 'queued', 'skipped', 'loaded', 'warmed')
     
-    # Priority-based model loading
-    priority_models = [
-        ('efficientnetv2b0', 1),  # Highest priority - default model
-        ('mobilenetv3_small', 2), # Medium priority
-        ('resnet50', 3)           # Lower priority
-    ]
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.models = {}
+        self.running = False
+        self.started_at = None
+        self.finished_at = None
+    
+    def start(self, priority_models) -> bool:
+        """Begin a preload run; False (and no change) when one is already running"""
+        with self._lock:
+            if self.running:
+                return False
+            self.models = {
+                model_option: {'state': 'queued', 'priority': priority}
+                for model_option, priority in priority_models
+            }
+            self.running = True
+            self.started_at = time.time()
+            self.finished_at = None
+            return True
+    
+    def update(self, model_option: str, state: str, **details):
+        with self._lock:
+            entry = self.models.setdefault(model_option, {})
+            entry.update(details, state=state)
+    
+    def finish(self):
+        with self._lock:
+            self.running = False
+            self.finished_at = time.time()
+    
+    @property
+    def complete(self) -> bool:
+        return self.started_at is not None and not self.running
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            models = {model_option: dict(entry) for model_option, entry in self.models.items()}
+            started_at, finished_at, running = self.started_at, self.finished_at, self.running
+        
+        counts = {state: 0 for state in self.STATE_ORDER}
+        for entry in models.values():
+            counts[entry['state']] = counts.get(entry['state'], 0) + 1
+        
+        elapsed = None
+        if started_at is not None:
+            elapsed = round((finished_at or time.time()) - started_at, 2)
+        
+        return {
+            'running': running,
+            'complete': started_at is not None and not running,
+            'elapsed_seconds': elapsed,
+            'counts': counts,
+            'models': models
+        }
+
+# Global preload progress instance
+preload_progress = PreloadProgress()
+
+def _merge_worker_preload_results(worker_results):
+    """Combine per-worker preload results into the single-process result format"""
+    merged = {'success': [], 'failed': [], 'skipped': [], 'total_time': "0.00s"}
+    slowest = 0.0
+    model_states = {}
+    
+    for worker in worker_results:
+        worker_id = worker['worker_id']
+        if 'error' in worker:
+            merged['failed'].append(f"worker {worker_id} ({worker['error']})")
+            for model_option, _ in PRELOAD_PRIORITY_MODELS:
+                model_states[model_option] = {'state': 'failed', 'error': f"worker {worker_id}: {worker['error']}"}
+            continue
+        
+        results = worker['result']
+        for model_info in results['success']:
+            merged['success'].append({**model_info, 'name': f"{model_info['name']} [worker {worker_id}]"})
+        merged['failed'].extend(f"{failed} [worker {worker_id}]" for failed in results['failed'])
+        merged['skipped'].extend(f"{skipped} [worker {worker_id}]" for skipped in results['skipped'])
+        slowest = max(slowest, float(results['total_time'].rstrip('s')))
+        
+        # A model is only as far along as its least advanced worker
+        for model_option, entry in results.get('progress', {}).items():
+            current = model_states.get(model_option)
+            if current is None or PreloadProgress.STATE_ORDER.index(entry['state']) < PreloadProgress.STATE_ORDER.index(current['state']):
+                model_states[model_option] = entry
+    
+    for model_option, entry in model_states.items():
+        preload_progress.update(model_option, **entry)
+    
+    merged['total_time'] = f"{slowest:.2f}s"
+    return merged
+
+def _preload_model(model_option: str, model_path: str, display_name: str) -> Tuple[str, float]:
+    """Load a priority model unless it is already cached; returns (outcome, seconds)"""
+    preload_progress.update(model_option, 'loading')
+    model_start = time.time()
+    
+    try:
+        cached_model = MODEL_CACHE.get(model_path)
+        if cached_model is not None:
+            outcome, model = 'cached', cached_model
+        else:
+            model = load_model_single_flight(model_path, validate=True)
+            if model is None:
+                raise RuntimeError("load returned None")
+            outcome = 'loaded'
+    except Exception as e:
+        preload_progress.update(model_option, 'failed', error=str(e))
+        raise
+    
+    model_time = time.time() - model_start
+    preload_progress.update(
+        model_option, 'warmed' if model.warmed else 'loaded',
+        backend=model.name, load_time=f"{model_time:.2f}s"
+    )
+    return outcome, model_time
+
+def preload_models_async(claimed: bool = False):
+    """Preload the priority models in parallel within the cache budget, publishing progress.
+    
+    Blocking: callers on the event loop run it in an executor. claimed=True means the
+    caller already marked the run as started with preload_progress.start().
+    """
+    if not claimed and not preload_progress.start(PRELOAD_PRIORITY_MODELS):
+        logger.info("Model preloading already running, not starting another")
+        return {'success': [], 'failed': [], 'skipped': [], 'total_time': "0.00s"}
+    
+    logger.info("Starting asynchronous model preloading...")
+    try:
+        # In process mode every worker warms its own cache
+        worker_pool = get_worker_pool()
+        if worker_pool is not None:
+            return _merge_worker_preload_results(worker_pool.broadcast("preload"))
+        
+        return _preload_priority_models()
+    finally:
+        preload_progress.finish()
+
+def _preload_priority_models():
+    """Plan the priority models against the cache budget, then load them concurrently"""
+    model_mapping = get_model_mapping()
     
     preload_results = {
         'success': [],
@@ -581,58 +1530,77 @@ def preload_models_async():
     
     start_time = time.time()
     
-    for model_name, priority in priority_models:
+    # Budget is reserved up front: loads run concurrently and preloading never evicts cached models
+    reserved_bytes = cache_manager.used_bytes()
+    budget_full = False
+    planned = []
+    
+    for model_name, priority in PRELOAD_PRIORITY_MODELS:
         if model_name not in model_mapping:
             logger.warning(f"Model {model_name} not found in mapping")
             preload_results['skipped'].append(f"{model_name} (not in mapping)")
+            preload_progress.update(model_name, 'skipped', reason="not in mapping")
             continue
         
-        model_path, display_name = model_mapping[model_name]
+        model_path, display_name = _resolve_model_option(model_name)
+        preload_progress.update(model_name, 'queued', display_name=display_name, path=model_path)
         
-        try:
-            logger.info(f"Preloading priority {priority}: {display_name}")
+        if model_path in MODEL_CACHE:
+            planned.append((model_name, priority, model_path, display_name))
+            continue
+        
+        if not os.path.exists(model_path):
+            logger.error(f"Model file not found: {model_path}")
+            preload_results['failed'].append(f"{display_name} (file not found)")
+            preload_progress.update(model_name, 'failed', error="file not found")
+            continue
+        
+        expected_bytes = cache_manager.expected_cost(model_path)
+        if budget_full or reserved_bytes + expected_bytes > cache_manager.budget_bytes:
+            # Lower priority models are not loaded ahead of one that did not fit
+            budget_full = True
+            logger.warning(f"Cache budget full, skipping {display_name}")
+            preload_results['skipped'].append(f"{display_name} (cache budget)")
+            preload_progress.update(model_name, 'skipped', reason="cache budget")
+            continue
+        
+        reserved_bytes += expected_bytes
+        planned.append((model_name, priority, model_path, display_name))
+    
+    logger.info(f"Preloading {len(planned)} models with up to {PRELOAD_PARALLELISM} in parallel")
+    
+    with ThreadPoolExecutor(max_workers=max(1, PRELOAD_PARALLELISM), thread_name_prefix="preload") as executor:
+        futures = [
+            (model_name, priority, model_path, display_name,
+             executor.submit(_preload_model, model_name, model_path, display_name))
+            for model_name, priority, model_path, display_name in planned
+        ]
+        
+        # Results are collected in priority order, whatever order the loads finish in
+        for model_name, priority, model_path, display_name, future in futures:
+            try:
+                outcome, model_time = future.result()
+            except Exception as e:
+                logger.error(f"Error preloading {display_name}: {str(e)}")
+                preload_results['failed'].append(f"{display_name} ({str(e)})")
+                continue
             
-            # Check if already in cache
-            if model_path in MODEL_CACHE:
+            if outcome == 'cached':
                 logger.info(f"{display_name} already in cache, skipping")
                 preload_results['skipped'].append(f"{display_name} (already cached)")
                 continue
             
-            # Check file existence
-            if not os.path.exists(model_path):
-                logger.error(f"Model file not found: {model_path}")
-                preload_results['failed'].append(f"{display_name} (file not found)")
-                continue
-            
-            # Check memory before loading
-            memory_usage = cache_manager.get_memory_usage()
-            if memory_usage > 0.8:  # 80% memory threshold for preloading
-                logger.warning(f"Memory usage high ({memory_usage:.1%}), skipping {display_name}")
-                preload_results['skipped'].append(f"{display_name} (memory threshold)")
-                break
-            
-            # Load model with validation
-            model_start = time.time()
-            model = load_model_with_retry(model_path, max_retries=2, validate=True)
-            model_time = time.time() - model_start
-            
-            if model is not None:
-                preload_results['success'].append({
-                    'name': display_name,
-                    'path': model_path,
-                    'load_time': f"{model_time:.2f}s",
-                    'priority': priority
-                })
-                logger.info(f"{display_name} preloaded successfully in {model_time:.2f}s")
-            else:
-                preload_results['failed'].append(f"{display_name} (load returned None)")
-                
-        except Exception as e:
-            logger.error(f"Error preloading {display_name}: {str(e)}")
-            preload_results['failed'].append(f"{display_name} ({str(e)})")
+            preload_results['success'].append({
+                'name': display_name,
+                'path': model_path,
+                'load_time': f"{model_time:.2f}s",
+                'priority': priority
+            })
+            logger.info(f"{display_name} preloaded successfully in {model_time:.2f}s")
     
     total_time = time.time() - start_time
     preload_results['total_time'] = f"{total_time:.2f}s"
+    preload_results['progress'] = preload_progress.snapshot()['models']
     
     # Log summary
     success_count = len(preload_results['success'])
@@ -654,87 +1622,1541 @@ def preload_models_async():
     
     return preload_results
 
+# ============================================================================
+# WORKER MEMORY
+# ============================================================================
+
+def _process_memory(process) -> Dict[str, Any]:
+    """Private / shared / proportional memory of one process (uss, pss need Linux smaps)"""
+    info = process.memory_full_info()
+    private = getattr(info, 'uss', 0)
+    return {
+        "pid": process.pid,
+        "rss_mb": round(info.rss / (1024 * 1024), 1),
+        "private_mb": round(private / (1024 * 1024), 1),
+        "shared_mb": round((info.rss - private) / (1024 * 1024), 1),
+        "pss_mb": round(getattr(info, 'pss', info.rss) / (1024 * 1024), 1)
+    }
+
+def get_worker_memory_report() -> Dict[str, Any]:
+    """Shared and private memory of the server master and each of its worker processes.
+
+    The master pid is published by the launcher in WEB_MASTER_PID; without it only
+    the current process is reported.
+    """
+    master_pid = os.getenv("WEB_MASTER_PID")
+    processes = []
+    try:
+        if master_pid:
+            master = psutil.Process(int(master_pid))
+            processes = [("master", master)] + [("worker", child) for child in master.children()]
+        else:
+            processes = [("worker", psutil.Process())]
+    except psutil.Error as e:
+        logger.warning(f"Could not read master process {master_pid}: {e}")
+        processes = [("worker", psutil.Process())]
+
+    report = []
+    for role, process in processes:
+        try:
+            report.append({"role": role, "current": process.pid == os.getpid(), **_process_memory(process)})
+        except psutil.Error as e:
+            report.append({"role": role, "pid": process.pid, "error": str(e)})
+
+    measured = [entry for entry in report if "error" not in entry]
+    return {
+        "processes": report,
+        "total_rss_mb": round(sum(entry["rss_mb"] for entry in measured), 1),
+        "total_private_mb": round(sum(entry["private_mb"] for entry in measured), 1),
+        # PSS splits shared pages between their users, so it sums to real physical usage
+        "total_pss_mb": round(sum(entry["pss_mb"] for entry in measured), 1)
+    }
+
+# ============================================================================
+# INFERENCE BATCHING
+# ============================================================================
+
+class _PendingInference:
+    """Single image waiting to be folded into a batched forward pass"""
+    __slots__ = ('tensor', 'future', 'enqueued_at')
+
+    def __init__(self, tensor):
+        self.tensor = tensor
+        self.future = Future()
+        self.enqueued_at = time.time()
+
+class InferenceBatchScheduler:
+    """Dynamic micro-batching scheduler grouping requests by (model_path, input_size)"""
+    def __init__(self, max_batch_size=8, max_wait_ms=5.0, idle_timeout=60.0):
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.idle_timeout = idle_timeout
+        self._cond = threading.Condition()
+        self._queues = {}
+        self._models = {}
+        self._workers = {}
+        self.stats = {
+            'batches': 0,
+            'images': 0,
+            'max_batch_seen': 0,
+            'total_queue_wait': 0.0,
+            'failed_batches': 0
+        }
+
+    @property
+    def enabled(self):
+        return self.max_batch_size > 1
+
+    def submit(self, model_path: str, input_size: int, model, processed_img, model_name: str):
+        """Queue one preprocessed image and block until its own prediction row is ready.
+
+        Returns (predictions, batch_size) where predictions has shape (1, num_classes).
+        """
+        key = (model_path, input_size)
+        pending = _PendingInference(processed_img)
+
+        with self._cond:
+            self._queues.setdefault(key, deque()).append(pending)
+            # Keep the most recently loaded model object for this key
+            self._models[key] = (model, model_name)
+
+            worker = self._workers.get(key)
+            if worker is None or not worker.is_alive():
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    args=(key,),
+                    name=f"batcher-{os.path.basename(model_path)}-{input_size}",
+                    daemon=True
+                )
+                self._workers[key] = worker
+                worker.start()
+
+            self._cond.notify_all()
+
+        try:
+            return pending.future.result(timeout=BATCH_RESULT_TIMEOUT)
+        except FutureTimeoutError:
+            with self._cond:
+                queue = self._queues.get(key)
+                if queue and pending in queue:
+                    queue.remove(pending)
+            raise TimeoutError(f"No batched prediction for {model_name} within {BATCH_RESULT_TIMEOUT:.0f}s")
+
+    def _collect_batch(self, key):
+        """Wait for a full batch or the max wait deadline, then pop the batch (lock held)"""
+        queue = self._queues[key]
+        if not queue:
+            return []
+        deadline = queue[0].enqueued_at + self.max_wait
+
+        while queue and len(queue) < self.max_batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            self._cond.wait(timeout=remaining)
+
+        size = min(len(queue), self.max_batch_size)
+        return [queue.popleft() for _ in range(size)]
+
+    def _worker_loop(self, key):
+        """Per-key loop draining the queue into batched forward passes"""
+        batch = []
+        try:
+            while True:
+                with self._cond:
+                    queue = self._queues[key]
+                    idle_deadline = time.time() + self.idle_timeout
+                    while not queue and time.time() < idle_deadline:
+                        self._cond.wait(timeout=idle_deadline - time.time())
+                    if not queue:
+                        # Idle for too long, release the thread
+                        del self._workers[key]
+                        self._models.pop(key, None)
+                        return
+                    batch = self._collect_batch(key)
+                    if not batch:
+                        # Every waiter timed out and withdrew while the batch was filling
+                        continue
+                    model, model_name = self._models[key]
+
+                # Wait for a call slot, then let the batch run in it while the next one is collected
+                slots = cache_manager.call_slots_for(key[0])
+                try:
+                    token = slots.acquire()
+                except ModelOverloadedError as e:
+                    self._fail_batch(batch, model_name, e)
+                    batch = []
+                    continue
+
+                if slots.capacity > 1:
+                    threading.Thread(
+                        target=self._run_batch, args=(batch, model, model_name, slots, token),
+                        name=f"batch-{os.path.basename(key[0])}", daemon=True
+                    ).start()
+                else:
+                    self._run_batch(batch, model, model_name, slots, token)
+                batch = []
+        except Exception as e:
+            # Nobody else would answer the callers waiting on this key
+            with self._cond:
+                if self._workers.get(key) is threading.current_thread():
+                    del self._workers[key]
+                queued = list(self._queues.get(key, ()))
+                self._queues.get(key, deque()).clear()
+            self._fail_batch(batch + queued, os.path.basename(key[0]), e)
+
+    def _fail_batch(self, batch, model_name: str, error: Exception):
+        if not batch:
+            return
+        logger.error(f"Batched prediction failed for {model_name} (batch of {len(batch)}): {str(error)}")
+        with self._cond:
+            self.stats['failed_batches'] += 1
+        for item in batch:
+            if not item.future.done():
+                item.future.set_exception(error)
+
+    def _run_batch(self, batch, model, model_name: str, slots: ModelCallSlots, token):
+        """Run one forward pass in an acquired call slot and hand each caller only its own row"""
+        batch_start = time.time()
+        try:
+            batch_tensor = np.concatenate([item.tensor for item in batch], axis=0)
+            predictions = _run_model_prediction_enhanced(model, batch_tensor, model_name)
+        except Exception as e:
+            self._fail_batch(batch, model_name, e)
+            return
+        finally:
+            slots.release(token)
+
+        with self._cond:
+            self.stats['batches'] += 1
+            self.stats['images'] += len(batch)
+            self.stats['max_batch_seen'] = max(self.stats['max_batch_seen'], len(batch))
+            self.stats['total_queue_wait'] += sum(batch_start - item.enqueued_at for item in batch)
+
+        logger.debug(f"Batched forward pass for {model_name}: {len(batch)} images in {time.time() - batch_start:.3f}s")
+
+        for index, item in enumerate(batch):
+            item.future.set_result((predictions[index:index + 1], len(batch)))
+
+    def get_stats(self):
+        """Get batching statistics"""
+        with self._cond:
+            queued = sum(len(queue) for queue in self._queues.values())
+            active_keys = len(self._workers)
+
+        batches = self.stats['batches']
+        images = self.stats['images']
+
+        return {
+            "enabled": self.enabled,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "active_model_queues": active_keys,
+            "queued_images": queued,
+            "batches_run": batches,
+            "images_processed": images,
+            "average_batch_size": f"{images / batches:.2f}" if batches else "0.00",
+            "max_batch_seen": self.stats['max_batch_seen'],
+            "average_queue_wait_ms": f"{self.stats['total_queue_wait'] * 1000 / images:.2f}" if images else "0.00",
+            "failed_batches": self.stats['failed_batches']
+        }
+
+# Global batch scheduler instance
+batch_scheduler = InferenceBatchScheduler(max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS)
+
+# ============================================================================
+# INFERENCE EXECUTOR
+# ============================================================================
+
+class InferenceExecutor:
+    """Dedicated thread pool that keeps blocking inference off the asyncio event loop"""
+    def __init__(self, max_workers=4):
+        self.max_workers = max(1, int(max_workers))
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="inference", initializer=pin_current_thread
+        )
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'total_wait_time': 0.0,
+            'max_wait_time': 0.0,
+            'total_run_time': 0.0,
+            'max_queue_depth': 0
+        }
+
+    def _wrap(self, func, args, kwargs, submitted_at, state):
+        """Wrap a call so queue wait and run time are recorded"""
+        def task():
+            started_at = time.time()
+            wait_time = started_at - submitted_at
+
+            with self._lock:
+                # The caller gave up while the call was queued and already un-counted it
+                if state['abandoned']:
+                    return None
+                state['started'] = True
+                self.queued -= 1
+                self.running += 1
+                self.stats['total_wait_time'] += wait_time
+                self.stats['max_wait_time'] = max(self.stats['max_wait_time'], wait_time)
+
+            outcome = 'failed'
+            try:
+                result = func(*args, **kwargs)
+                outcome = 'completed'
+                return result
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.stats[outcome] += 1
+                    self.stats['total_run_time'] += time.time() - started_at
+
+        return task
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking callable in the inference pool and await its result"""
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            self.queued += 1
+            self.stats['submitted'] += 1
+            self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], self.queued)
+
+        state = {'started': False, 'abandoned': False}
+        task = self._wrap(func, args, kwargs, time.time(), state)
+        try:
+            return await loop.run_in_executor(self.executor, task)
+        except asyncio.CancelledError:
+            with self._lock:
+                if not state['started'] and not state['abandoned']:
+                    state['abandoned'] = True
+                    self.queued -= 1
+            raise
+
+    async def drain(self, timeout: float) -> bool:
+        """Wait until no inference is queued or running; returns False on timeout"""
+        deadline = time.time() + timeout
+        while True:
+            with self._lock:
+                pending = self.queued + self.running
+            if pending == 0:
+                return True
+            if time.time() >= deadline:
+                logger.warning(f"Drain timed out with {pending} inferences still pending")
+                return False
+            await asyncio.sleep(0.1)
+
+    def shutdown(self, wait=True):
+        """Stop accepting work and optionally wait for running inferences"""
+        logger.info(f"Shutting down inference executor (wait={wait})")
+        self.executor.shutdown(wait=wait)
+
+    def get_stats(self):
+        """Get queue depth and wait time metrics"""
+        with self._lock:
+            # Wait and run times cover every call that ran, failed or not
+            finished = self.stats['completed'] + self.stats['failed']
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self.queued,
+                "running": self.running,
+                "submitted": self.stats['submitted'],
+                "completed": self.stats['completed'],
+                "failed": self.stats['failed'],
+                "max_queue_depth": self.stats['max_queue_depth'],
+                "average_wait_ms": f"{self.stats['total_wait_time'] * 1000 / finished:.2f}" if finished else "0.00",
+                "max_wait_ms": f"{self.stats['max_wait_time'] * 1000:.2f}",
+                "average_run_ms": f"{self.stats['total_run_time'] * 1000 / finished:.2f}" if finished else "0.00"
+            }
+
+# Global inference executor instance
+inference_executor = InferenceExecutor(max_workers=INFERENCE_WORKERS)
+
+# ============================================================================
+# PREDICTION RESULT CACHE
+# ============================================================================
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one computation"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.stats = {
+            'leaders': 0,
+            'waiters': 0,
+            'current_waiters': 0,
+            'total_wait_time': 0.0,
+            'max_wait_time': 0.0
+        }
+
+    def do(self, key, func):
+        """Run func() once per key; concurrent callers wait for and share the leader's result.
+
+        Returns (value, shared) where shared is True for callers that waited.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.stats['leaders'] += 1
+            else:
+                self.stats['waiters'] += 1
+                self.stats['current_waiters'] += 1
+
+        if not leader:
+            wait_start = time.time()
+            try:
+                return future.result(), True
+            finally:
+                wait_time = time.time() - wait_start
+                with self._lock:
+                    self.stats['current_waiters'] -= 1
+                    self.stats['total_wait_time'] += wait_time
+                    self.stats['max_wait_time'] = max(self.stats['max_wait_time'], wait_time)
+
+        try:
+            value = func()
+            future.set_result(value)
+            return value, False
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def get_stats(self):
+        """Get single-flight statistics"""
+        with self._lock:
+            waiters = self.stats['waiters']
+            return {
+                "in_flight": len(self._inflight),
+                "leaders": self.stats['leaders'],
+                "waiters": waiters,
+                "current_waiters": self.stats['current_waiters'],
+                "average_wait_ms": f"{self.stats['total_wait_time'] * 1000 / waiters:.2f}" if waiters else "0.00",
+                "max_wait_ms": f"{self.stats['max_wait_time'] * 1000:.2f}",
+                "total_wait_ms": f"{self.stats['total_wait_time'] * 1000:.2f}"
+            }
+
+class PredictionResultCache:
+    """Content-addressed prediction result cache with byte-bounded LRU and optional disk tier"""
+    def __init__(self, max_bytes, disk_dir=None, disk_max_bytes=0):
+        self.max_bytes = int(max_bytes)
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = int(disk_max_bytes)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._current_bytes = 0
+        self._disk_writes = 0
+        self.single_flight = SingleFlight()
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'shared_hits': 0,
+            'misses': 0,
+            'evictions': 0
+        }
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0 or bool(self.disk_dir)
+
+    @staticmethod
+    def make_key(image_bytes, model_option: str, model_version: str) -> str:
+        """Build the cache key from (sha256(image bytes), model option, model version)"""
+        image_hash = hashlib.sha256(image_bytes).hexdigest()
+        return f"{image_hash}:{model_option}:{model_version}"
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, hashlib.sha256(key.encode('utf-8')).hexdigest() + ".json")
+
+    def _store_memory(self, key: str, payload: bytes):
+        """Insert into the in-memory LRU, evicting least recently used entries to fit"""
+        if len(payload) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._current_bytes -= len(self._entries.pop(key))
+            self._entries[key] = payload
+            self._current_bytes += len(payload)
+
+            while self._current_bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._current_bytes -= len(evicted)
+                self.stats['evictions'] += 1
+
+    def _load_disk(self, key: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                return f.read()
+        except (FileNotFoundError, OSError):
+            return None
+
+    def _store_disk(self, key: str, payload: bytes):
+        if not self.disk_dir:
+            return
+        try:
+            # Write then rename so readers never see a partial file
+            path = self._disk_path(key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+
+            self._disk_writes += 1
+            if self._disk_writes % 100 == 0:
+                self._prune_disk()
+        except OSError as e:
+            logger.warning(f"Could not persist prediction result: {str(e)}")
+
+    def _prune_disk(self):
+        """Remove oldest disk entries once the disk tier exceeds its budget"""
+        entries = []
+        total_bytes = 0
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.disk_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_bytes += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+                total_bytes -= size
+            except OSError:
+                pass
+
+    def get(self, key: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Look up a result; returns (result, tier) with tier 'memory', 'disk' or None"""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return json.loads(payload), 'memory'
+
+        payload = self._load_disk(key)
+        if payload is not None:
+            self._store_memory(key, payload)
+            with self._lock:
+                self.stats['disk_hits'] += 1
+            return json.loads(payload), 'disk'
+
+        return None, None
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """Store a result in memory and, if configured, on disk"""
+        payload = json.dumps(convert_numpy_types(result)).encode('utf-8')
+        self._store_memory(key, payload)
+        self._store_disk(key, payload)
+
+    def get_or_compute(self, key: str, compute):
+        """Return a cached result or compute it once, even for concurrent identical requests.
+
+        Returns (result, status) with status 'memory', 'disk', 'shared' or 'miss'.
+        """
+        result, tier = self.get(key)
+        if result is not None:
+            return result, tier
+
+        def compute_and_store():
+            # Re-check: a previous leader may have stored the result meanwhile
+            cached, cached_tier = self.get(key)
+            if cached is not None:
+                return cached, cached_tier
+            with self._lock:
+                self.stats['misses'] += 1
+            value = compute()
+            self.put(key, value)
+            return value, 'miss'
+
+        (value, status), shared = self.single_flight.do(key, compute_and_store)
+        if shared:
+            with self._lock:
+                self.stats['shared_hits'] += 1
+            status = 'shared'
+
+        # Each caller gets its own copy so per-request metrics can be attached safely
+        return json.loads(json.dumps(value)), status
+
+    def clear(self):
+        """Drop all in-memory entries (the disk tier is kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def get_stats(self):
+        """Get hit/miss counters and occupancy"""
+        with self._lock:
+            hits = self.stats['memory_hits'] + self.stats['disk_hits'] + self.stats['shared_hits']
+            lookups = hits + self.stats['misses']
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "memory_bytes": self._current_bytes,
+                "max_memory_bytes": self.max_bytes,
+                "disk_tier": self.disk_dir or None,
+                "hits": hits,
+                "memory_hits": self.stats['memory_hits'],
+                "disk_hits": self.stats['disk_hits'],
+                "shared_hits": self.stats['shared_hits'],
+                "misses": self.stats['misses'],
+                "hit_rate": f"{hits / lookups:.1%}" if lookups else "0.0%",
+                "evictions": self.stats['evictions'],
+                "single_flight": self.single_flight.get_stats()
+            }
+
+# Global prediction result cache instance
+result_cache = PredictionResultCache(
+    max_bytes=RESULT_CACHE_MAX_MB * 1024 * 1024,
+    disk_dir=RESULT_CACHE_DIR,
+    disk_max_bytes=RESULT_CACHE_DISK_MAX_MB * 1024 * 1024
+)
+
+def _get_result_cache_version(model_path: str) -> str:
+    """Registry version plus the artifact fingerprint, so either change invalidates cached results"""
+    entry = model_registry.resolve(model_path)
+    return f"{entry['version'] if entry else '-'}:{_get_model_version(model_path)}"
+
+def _get_model_version(model_path: str) -> str:
+    """Cheap model version fingerprint (size and mtime of the model artifact)"""
+    try:
+        # SavedModel directories change their saved_model.pb when re-exported
+        artifact = os.path.join(model_path, 'saved_model.pb') if os.path.isdir(model_path) else model_path
+        stat = os.stat(artifact)
+        return f"{stat.st_size}-{int(stat.st_mtime)}"
+    except OSError:
+        return "unknown"
+
+# ============================================================================
+# ARCHIVE STREAMING
+# ============================================================================
+
+def _is_archive_image(member_name: str) -> bool:
+    """Check whether an archive member looks like an image (skipping OS metadata files)"""
+    base_name = os.path.basename(member_name)
+    if not base_name or base_name.startswith('.') or member_name.startswith('__MACOSX/'):
+        return False
+    return base_name.lower().endswith(ARCHIVE_IMAGE_EXTENSIONS)
+
+class ArchiveTooLargeError(ValueError):
+    """The archive exceeds ARCHIVE_MAX_BYTES or ARCHIVE_MAX_MEMBERS"""
+
+def copy_archive_upload(source, destination, max_bytes: int = ARCHIVE_MAX_BYTES) -> int:
+    """Copy an uploaded archive, stopping as soon as it exceeds max_bytes; returns the size"""
+    copied = 0
+    for chunk in iter(lambda: source.read(1024 * 1024), b""):
+        copied += len(chunk)
+        if copied > max_bytes:
+            raise ArchiveTooLargeError(f"Archive too large (max {max_bytes // (1024 * 1024)}MB)")
+        destination.write(chunk)
+    destination.seek(0)
+    return copied
+
+def count_zip_images(fileobj) -> Optional[int]:
+    """Image members of a ZIP archive from its central directory, None for other formats"""
+    fileobj.seek(0)
+    if not zipfile.is_zipfile(fileobj):
+        return None
+    fileobj.seek(0)
+    with zipfile.ZipFile(fileobj) as archive:
+        return sum(1 for info in archive.infolist() if not info.is_dir() and _is_archive_image(info.filename))
+
+def _check_member_count(count: int):
+    if count > ARCHIVE_MAX_MEMBERS:
+        raise ArchiveTooLargeError(f"Archive has more than {ARCHIVE_MAX_MEMBERS} images")
+
+def iter_archive_images(fileobj):
+    """Yield (member_name, image_bytes, error) one member at a time from a ZIP or tar archive.
+
+    Members are read individually, so only one encoded image is held in memory.
+    Raises ArchiveTooLargeError once more than ARCHIVE_MAX_MEMBERS images are found.
+    """
+    count = 0
+    if zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not _is_archive_image(info.filename):
+                    continue
+                count += 1
+                _check_member_count(count)
+                if info.file_size > ARCHIVE_MAX_MEMBER_SIZE:
+                    yield info.filename, None, "File too large"
+                    continue
+                with archive.open(info) as member:
+                    yield info.filename, member.read(), None
+        return
+
+    # Streaming tar mode ("r|*") reads members sequentially and handles gz/bz2/xz
+    fileobj.seek(0)
+    try:
+        archive = tarfile.open(fileobj=fileobj, mode='r|*')
+    except tarfile.TarError:
+        raise ValueError("Unsupported archive format (expected ZIP or tar)")
+
+    with archive:
+        for member in archive:
+            if not member.isfile() or not _is_archive_image(member.name):
+                continue
+            count += 1
+            _check_member_count(count)
+            if member.size > ARCHIVE_MAX_MEMBER_SIZE:
+                yield member.name, None, "File too large"
+                continue
+            extracted = archive.extractfile(member)
+            if extracted is None:
+                continue
+            yield member.name, extracted.read(), None
+
+def _predict_archive_batch(model_option: str, model_name: str, pending):
+    """Run one batched inference over preprocessed archive members"""
+    batch_tensor = np.concatenate([tensor for _, tensor in pending], axis=0)
+
+    worker_pool = get_worker_pool()
+    if worker_pool is not None:
+        results, _ = worker_pool.predict_batch(model_option, batch_tensor)
+    else:
+        results, _ = predict_preprocessed_batch(model_option, batch_tensor)
+
+    return [
+        {
+            'file': member_name,
+            'predicted_class': result['predicted_class'],
+            'confidence': result['confidence'],
+            'top_3_predictions': result['top_3_predictions']
+        }
+        for (member_name, _), result in zip(pending, results)
+    ]
+
+def classify_archive_stream(model_option: str, fileobj, batch_size: int = ARCHIVE_BATCH_SIZE):
+    """Classify every image in an archive, yielding a list of results per finished batch.
+
+    Memory stays bounded by batch_size preprocessed tensors regardless of archive size.
+    """
+    _, model_name = _resolve_model_option(model_option)
+    batch_size = max(1, batch_size)
+
+    pending = []
+    errors = []
+    for member_name, image_bytes, error in iter_archive_images(fileobj):
+        if error is None:
+            try:
+                pending.append((member_name, _preprocess_image_optimized(image_bytes, model_name)))
+            except Exception as e:
+                error = str(e)
+        if error is not None:
+            errors.append({'file': member_name, 'error': error})
+
+        if len(pending) >= batch_size:
+            yield errors + _predict_archive_batch(model_option, model_name, pending)
+            pending, errors = [], []
+
+    if pending or errors:
+        yield errors + (_predict_archive_batch(model_option, model_name, pending) if pending else [])
+
+# ============================================================================
+# MODEL INFERENCE
+# ============================================================================
+
+def _resolve_model_option(model_option: str) -> Tuple[str, str]:
+    """Resolve a model option to (model_path, model_name), preferring the configured backend's file"""
+    model_mapping = get_model_mapping()
+
+    if model_option not in model_mapping:
+        available_models = list(model_mapping.keys())
+        raise ValueError(f"Model '{model_option}' is not available. Available models are: {available_models}")
+
+    model_path, model_name = model_mapping[model_option]
+
+    backend = MODEL_BACKENDS.get(model_option, "onnx" if SHARED_WEIGHTS else "keras")
+    if backend != "keras":
+        backend_path = get_backend_path(model_path, backend)
+        if os.path.exists(backend_path):
+            return backend_path, model_name
+        logger.warning(f"{backend} model not found for {model_option} ({backend_path}), using {model_path}")
+
+    return model_path, model_name
+
+# Concurrent misses for the same model wait for one in-progress load
+model_load_flight = SingleFlight()
+
+def load_model_single_flight(model_path: str, validate: bool = False):
+    """Load a model once per path no matter how many callers miss at the same time"""
+    model, shared = model_load_flight.do(
+        model_path, lambda: load_model_with_retry(model_path, max_retries=2, validate=validate)
+    )
+    if shared:
+        logger.info(f"Reused in-progress load of {model_path}")
+        # The leader may have loaded without validation
+        if validate and not _validate_model_functionality(model, model_path):
+            raise RuntimeError(f"Model validation failed: {model_path}")
+    return model
+
+def _get_model(model_path: str, use_cache: bool = True):
+    """Get model from cache or load it from disk"""
+    if use_cache:
+        # Try to get from cache first
+        model = cache_manager.get_from_cache(model_path)
+        if model is None:
+            logger.info(f"Model not in cache, loading: {model_path}")
+            model = load_model_single_flight(model_path)
+        else:
+            logger.info(f"Model retrieved from cache: {model_path}")
+    else:
+        logger.info(f"Cache disabled, loading fresh model: {model_path}")
+        model = load_model_with_retry(model_path, max_retries=2, validate=False)
+
+    if model is None:
+        raise RuntimeError(f"Failed to load model: {model_path}")
+
+    return model
+
+def predict_raw(model_option: str, processed_img, use_cache: bool = True, use_batching: bool = True):
+    """Run model inference and return the raw probability rows plus timing metrics"""
+    model_path, model_name = _resolve_model_option(model_option)
+
+    # Enhanced model loading with caching
+    model_load_start = time.time()
+    model = _get_model(model_path, use_cache=use_cache)
+    model_load_time = time.time() - model_load_start
+    logger.info(f"Model load time: {model_load_time:.3f}s")
+
+    # Model prediction (grouped with concurrent requests for the same model when batching)
+    prediction_start = time.time()
+    if use_batching and batch_scheduler.enabled:
+        predictions, batch_size = batch_scheduler.submit(
+            model_path, get_input_size(model_name), model, processed_img, model_name
+        )
+    else:
+        predictions = _run_model_prediction_enhanced(model, processed_img, model_name, model_path)
+        batch_size = 1
+    prediction_time = time.time() - prediction_start
+    logger.info(f"Model prediction time: {prediction_time:.3f}s")
+
+    # Validate predictions
+    if predictions is None or len(predictions) == 0:
+        raise RuntimeError("Model tidak menghasilkan prediksi yang valid")
+
+    performance_metrics = {
+        'model_load_time': f"{model_load_time:.3f}s",
+        'prediction_time': f"{prediction_time:.3f}s",
+        'cache_hit': model_path in MODEL_CACHE,
+        'backend': model.name,
+        'batch_size': batch_size
+    }
+    return predictions, performance_metrics
+
+def predict_preprocessed(model_option: str, processed_img, use_cache: bool = True, use_batching: bool = True):
+    """Run model inference on an already preprocessed image tensor"""
+    _, model_name = _resolve_model_option(model_option)
+    predictions, performance_metrics = predict_raw(model_option, processed_img, use_cache=use_cache, use_batching=use_batching)
+
+    # Process results
+    result_start = time.time()
+    result = _process_prediction_results(predictions, model_name)
+    result_time = time.time() - result_start
+    logger.info(f"Result processing time: {result_time:.3f}s")
+
+    result['performance_metrics'] = {
+        **performance_metrics,
+        'result_processing_time': f"{result_time:.3f}s"
+    }
+
+    return result
+
+def predict_preprocessed_batch(model_option: str, batch_tensor, use_cache: bool = True):
+    """Run one batched inference over N preprocessed images.
+
+    Returns (results, performance_metrics) with one result per input row.
+    """
+    model_path, model_name = _resolve_model_option(model_option)
+
+    model_load_start = time.time()
+    model = _get_model(model_path, use_cache=use_cache)
+    model_load_time = time.time() - model_load_start
+
+    # Forward passes are capped at BULK_BATCH_SIZE images to bound peak memory
+    prediction_start = time.time()
+    predictions = np.concatenate([
+        _run_model_prediction_enhanced(model, batch_tensor[start:start + BULK_BATCH_SIZE], model_name, model_path)
+        for start in range(0, len(batch_tensor), BULK_BATCH_SIZE)
+    ], axis=0)
+    prediction_time = time.time() - prediction_start
+
+    result_start = time.time()
+    results = [
+        _process_prediction_results(predictions[index:index + 1], model_name)
+        for index in range(len(predictions))
+    ]
+    result_time = time.time() - result_start
+
+    logger.info(f"Batched prediction of {len(results)} images with {model_name} in {prediction_time:.3f}s")
+
+    performance_metrics = {
+        'model_load_time': f"{model_load_time:.3f}s",
+        'prediction_time': f"{prediction_time:.3f}s",
+        'result_processing_time': f"{result_time:.3f}s",
+        'cache_hit': model_path in MODEL_CACHE,
+        'backend': model.name,
+        'batch_size': len(results)
+    }
+    return results, performance_metrics
+
+def predict_img_batch(model_option: str, img_paths, use_cache: bool = True):
+    """Predict many images with one model using batched inference.
+
+    Images that fail validation or decoding get an {'error': ...} entry
+    instead of aborting the whole batch.
+    """
+    batch_start_time = time.time()
+    logger.info(f"Starting batch prediction of {len(img_paths)} images with model: {model_option}")
+
+    model_path, model_name = _resolve_model_option(model_option)
+    worker_pool = get_worker_pool()
+
+    # Preprocess and predict BULK_BATCH_SIZE images at a time, so peak memory is one chunk
+    results = [None] * len(img_paths)
+    preprocess_time = 0.0
+    predicted = 0
+    timings = {'model_load_time': 0.0, 'prediction_time': 0.0, 'result_processing_time': 0.0}
+    performance_metrics = {}
+    for chunk_start in range(0, len(img_paths), BULK_BATCH_SIZE):
+        preprocess_start = time.time()
+        tensors = []
+        for index in range(chunk_start, min(chunk_start + BULK_BATCH_SIZE, len(img_paths))):
+            try:
+                _validate_image_path(img_paths[index])
+                tensors.append((index, _preprocess_image_optimized(img_paths[index], model_name)))
+            except Exception as e:
+                logger.warning(f"Skipping image {img_paths[index]}: {str(e)}")
+                results[index] = {'error': str(e)}
+        preprocess_time += time.time() - preprocess_start
+
+        if not tensors:
+            continue
+
+        batch_tensor = np.concatenate([tensor for _, tensor in tensors], axis=0)
+        if worker_pool is not None:
+            batch_results, performance_metrics = worker_pool.predict_batch(model_option, batch_tensor)
+        else:
+            batch_results, performance_metrics = predict_preprocessed_batch(model_option, batch_tensor, use_cache=use_cache)
+
+        for (index, _), result in zip(tensors, batch_results):
+            results[index] = result
+        predicted += len(tensors)
+
+        # Per-chunk timings are "0.123s" strings
+        for name in timings:
+            timings[name] += float(performance_metrics.get(name, "0s").rstrip('s'))
+
+    if predicted:
+        performance_metrics.update({name: f"{seconds:.3f}s" for name, seconds in timings.items()})
+        performance_metrics['batch_size'] = predicted
+
+    total_time = time.time() - batch_start_time
+    logger.info(f"Batch prediction completed in {total_time:.3f}s ({predicted}/{len(img_paths)} images)")
+
+    return {
+        'results': results,
+        'performance_metrics': {
+            'total_time': f"{total_time:.3f}s",
+            'preprocessing_time': f"{preprocess_time:.3f}s",
+            **performance_metrics,
+            'images_predicted': predicted,
+            'images_failed': len(img_paths) - predicted
+        }
+    }
+
+def _predict_single_model(model_option: str, image, use_cache: bool = True):
+    """Preprocess one image for a model and run inference (worker pool or in-process)"""
+    _, model_name = _resolve_model_option(model_option)
+
+    # Image preprocessing
+    preprocess_start = time.time()
+    processed_img = _preprocess_image_optimized(image, model_name)
+    preprocess_time = time.time() - preprocess_start
+    logger.info(f"Image preprocessing time: {preprocess_time:.3f}s")
+
+    # Inference either in a worker process (tensor via shared memory) or in this process
+    worker_pool = get_worker_pool()
+    if worker_pool is not None:
+        result = worker_pool.predict(model_option, processed_img)
+        inference_mode = "process"
+    else:
+        result = predict_preprocessed(model_option, processed_img, use_cache=use_cache)
+        inference_mode = "thread"
+
+    result['performance_metrics'] = {
+        'preprocessing_time': f"{preprocess_time:.3f}s",
+        **result.get('performance_metrics', {}),
+        'inference_mode': inference_mode
+    }
+    return result
+
+# ============================================================================
+# CASCADED CLASSIFICATION
+# ============================================================================
+
+def _parse_cascade_option(model_option: str) -> Optional[Tuple[str, str]]:
+    """Return (fast_option, heavy_option) for a cascade model option, else None"""
+    if model_option != CASCADE_MODEL_OPTION and not model_option.startswith(CASCADE_MODEL_OPTION + ":"):
+        return None
+
+    heavy_option = model_option.split(":", 1)[1] if ":" in model_option else CASCADE_FALLBACK_MODEL
+
+    # Both stages must exist in the model mapping
+    _resolve_model_option(CASCADE_FAST_MODEL)
+    _resolve_model_option(heavy_option)
+
+    return CASCADE_FAST_MODEL, heavy_option
+
+def _is_confident(result: Dict[str, Any]) -> Tuple[bool, float]:
+    """Check the early-exit rule: high top-1 confidence and a clear top-1/top-2 margin"""
+    top_predictions = result['top_3_predictions']
+    second_confidence = top_predictions[1]['confidence'] if len(top_predictions) > 1 else 0.0
+    margin = result['confidence'] - second_confidence
+
+    confident = result['confidence'] >= CASCADE_CONFIDENCE_THRESHOLD and margin >= CASCADE_MARGIN_THRESHOLD
+    return confident, margin
+
+def _predict_cascade(fast_option: str, heavy_option: str, image_bytes, use_cache: bool = True):
+    """Run the cheap model first and escalate to the heavy model only when it is unsure"""
+    image = _decode_image_bytes(image_bytes)
+
+    # Stage 1: cheap model
+    stage1_start = time.time()
+    fast_result = _predict_single_model(fast_option, image, use_cache=use_cache)
+    stage1_time = time.time() - stage1_start
+    confident, margin = _is_confident(fast_result)
+
+    cascade_info = {
+        'decided_by': fast_option,
+        'decided_stage': 1,
+        'fast_model': fast_option,
+        'fast_prediction': fast_result['predicted_class'],
+        'fast_confidence': fast_result['confidence'],
+        'fast_margin': margin,
+        'heavy_model': heavy_option,
+        'confidence_threshold': CASCADE_CONFIDENCE_THRESHOLD,
+        'margin_threshold': CASCADE_MARGIN_THRESHOLD,
+        'stage1_time': f"{stage1_time:.3f}s"
+    }
+
+    if confident:
+        logger.info(f"Cascade decided at stage 1 by {fast_option} ({fast_result['confidence']:.2%}, margin {margin:.2f})")
+        result = fast_result
+    else:
+        # Stage 2: heavy model on the same decoded image
+        logger.info(f"Cascade escalating to {heavy_option} ({fast_result['confidence']:.2%}, margin {margin:.2f})")
+        stage2_start = time.time()
+        result = _predict_single_model(heavy_option, image, use_cache=use_cache)
+        cascade_info['decided_by'] = heavy_option
+        cascade_info['decided_stage'] = 2
+        cascade_info['stage2_time'] = f"{time.time() - stage2_start:.3f}s"
+
+    result['cascade'] = cascade_info
+    result['performance_metrics']['cascade_stage'] = cascade_info['decided_stage']
+    return result
+
+# ============================================================================
+# ENSEMBLE CLASSIFICATION
+# ============================================================================
+
+# Members run concurrently so latency tracks the slowest member, not the sum
+_ensemble_executor = ThreadPoolExecutor(max_workers=max(1, ENSEMBLE_MAX_PARALLEL), thread_name_prefix="ensemble")
+
+def _parse_ensemble_option(model_option: str) -> Optional[list]:
+    """Return the member model options for an ensemble model option, else None"""
+    if model_option != ENSEMBLE_MODEL_OPTION and not model_option.startswith(ENSEMBLE_MODEL_OPTION + ":"):
+        return None
+
+    if ":" in model_option:
+        members = [m.strip() for m in model_option.split(":", 1)[1].split("+") if m.strip()]
+    else:
+        members = list(ENSEMBLE_MEMBERS)
+
+    if len(members) < 2:
+        raise ValueError("An ensemble needs at least two member models")
+
+    # Probabilities are only comparable between members that share one class order
+    reference_labels = None
+    for member in members:
+        _, model_name = _resolve_model_option(member)
+        labels = _load_labels(model_name)
+        if reference_labels is None:
+            reference_labels = labels
+        elif labels != reference_labels:
+            raise ValueError(f"Ensemble member '{member}' uses a different label set than '{members[0]}'")
+
+    return members
+
+def _infer_probabilities(model_option: str, processed_img, use_cache: bool = True):
+    """Raw probability row for one model (worker pool or in-process)"""
+    worker_pool = get_worker_pool()
+    if worker_pool is not None:
+        return worker_pool.predict_raw(model_option, processed_img)
+    return predict_raw(model_option, processed_img, use_cache=use_cache)
+
+def fuse_probabilities(probabilities, fusion: str = "mean", weights=None):
+    """Fuse an (M, C) stack of member probability vectors into one (1, C) vector"""
+    if fusion == "mean":
+        fused = probabilities.mean(axis=0)
+    elif fusion == "weighted":
+        weights = np.asarray(weights if weights else np.ones(len(probabilities)), dtype=np.float32)
+        if weights.shape[0] != probabilities.shape[0]:
+            raise ValueError(f"Expected {probabilities.shape[0]} ensemble weights, got {weights.shape[0]}")
+        fused = np.average(probabilities, axis=0, weights=weights)
+    elif fusion == "max":
+        fused = probabilities.max(axis=0)
+        fused = fused / fused.sum()
+    else:
+        raise ValueError(f"Unknown ensemble fusion: {fusion}")
+
+    return fused.reshape(1, -1)
+
+def _predict_ensemble(members, image_bytes, use_cache: bool = True, fusion: str = ENSEMBLE_FUSION, weights=None):
+    """Ensemble vote: decode once, one resized tensor per input size, members run concurrently"""
+    ensemble_start = time.time()
+    weights = weights if weights is not None else (ENSEMBLE_WEIGHTS or None)
+
+    # Decode once, and resize once per distinct input size (e.g. 224 and 299)
+    preprocess_start = time.time()
+    image = _decode_image_bytes(image_bytes)
+    member_names = {member: _resolve_model_option(member)[1] for member in members}
+    resized = {}
+    for model_name in member_names.values():
+        input_size = get_input_size(model_name)
+        if input_size not in resized:
+            resized[input_size] = _resize_to_input_array(image, input_size)
+
+    # Model-specific preprocessing (on a copy, some functions normalise in place)
+    member_tensors = {
+        member: get_preprocess_function(model_name)(
+            resized[get_input_size(model_name)].copy()
+        )
+        for member, model_name in member_names.items()
+    }
+    preprocess_time = time.time() - preprocess_start
+
+    def run_member(member):
+        member_start = time.time()
+        predictions, _ = _infer_probabilities(member, member_tensors[member], use_cache=use_cache)
+        return predictions[0], time.time() - member_start
+
+    futures = {member: _ensemble_executor.submit(run_member, member) for member in members}
+    member_outputs = {member: future.result() for member, future in futures.items()}
+
+    # Members share a label set (checked when the ensemble was parsed); their outputs must match it too
+    class_names = _load_labels(member_names[members[0]])
+    widths = {member: len(member_outputs[member][0]) for member in members}
+    if set(widths.values()) != {len(class_names)}:
+        raise ValueError(f"Ensemble members disagree on the number of classes: {widths} (labels: {len(class_names)})")
+
+    probabilities = np.stack([member_outputs[member][0] for member in members]).astype(np.float32)
+    fused = fuse_probabilities(probabilities, fusion=fusion, weights=weights)
+
+    # Per-member top-1 in one vectorized pass
+    member_top = probabilities.argmax(axis=1)
+
+    result = _process_prediction_results(fused, member_names[members[0]])
+    result['model_used'] = f"Ensemble({'+'.join(member_names[m] for m in members)})"
+    result['ensemble'] = {
+        'fusion': fusion,
+        'weights': list(weights) if fusion == "weighted" and weights else None,
+        'members': [
+            {
+                'model': member,
+                'predicted_class': str(class_names[str(int(member_top[index]))]),
+                'confidence': float(probabilities[index, member_top[index]]),
+                'time': f"{member_outputs[member][1]:.3f}s"
+            }
+            for index, member in enumerate(members)
+        ]
+    }
+    result['performance_metrics'] = {
+        'preprocessing_time': f"{preprocess_time:.3f}s",
+        'slowest_member_time': f"{max(output[1] for output in member_outputs.values()):.3f}s",
+        'ensemble_time': f"{time.time() - ensemble_start:.3f}s"
+    }
+    return result
+
+# ============================================================================
+# TILED CLASSIFICATION
+# ============================================================================
+
+# cv2 can decode JPEG/PNG directly at 1/2, 1/4 or 1/8 resolution
+_REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+def _image_header_size(image_bytes) -> Optional[Tuple[int, int]]:
+    """(width, height) as OpenCV decodes the image (EXIF rotation applied), read from the header only"""
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as header:
+            width, height = header.size
+            orientation = header.getexif().get(0x0112, 1)
+    except Exception:
+        return None
+    return (height, width) if orientation in (5, 6, 7, 8) else (width, height)
+
+def _decode_image_scaled(image_bytes, scale: float):
+    """Decode image bytes at the given scale, using reduced-resolution decoding when possible.
+
+    Returns (image, scale_x, scale_y): the decoded size over the original size per axis,
+    which differs slightly from the requested scale because of rounding.
+    """
+    buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+    if buffer.size == 0:
+        raise ValueError("Image data is empty")
+
+    # Pick the largest power-of-two reduction that does not go below the requested scale
+    reduction, flag = 1, cv2.IMREAD_COLOR
+    for factor, reduced_flag in _REDUCED_DECODE_FLAGS:
+        if 1.0 / factor >= scale - 1e-6:
+            reduction, flag = factor, reduced_flag
+            break
+
+    image = cv2.imdecode(buffer, flag)
+    if image is None:
+        raise ValueError("Unable to decode image data")
+
+    # Reduced decoding rounds dimensions up, so the original size comes from the header
+    original_size = (image.shape[1], image.shape[0]) if reduction == 1 else _image_header_size(image_bytes)
+    if original_size is None:
+        original_size = (image.shape[1] * reduction, image.shape[0] * reduction)
+
+    # Finish the remaining (non power-of-two) part of the downscale
+    remaining = scale * reduction
+    if remaining < 0.999:
+        new_size = (max(1, int(round(image.shape[1] * remaining))), max(1, int(round(image.shape[0] * remaining))))
+        image = cv2.resize(image, new_size, interpolation=cv2.INTER_AREA)
+
+    scale_x, scale_y = image.shape[1] / original_size[0], image.shape[0] / original_size[1]
+    logger.info(f"Decoded field at 1/{reduction} resolution, final scale {scale_x:.3f}: {image.shape[1]}x{image.shape[0]}")
+    return image, scale_x, scale_y
+
+def _tile_positions(length: int, tile_size: int, step: int):
+    """Start offsets covering [0, length) with the last tile aligned to the edge"""
+    if length <= tile_size:
+        return [0]
+    positions = list(range(0, length - tile_size + 1, step))
+    if positions[-1] != length - tile_size:
+        positions.append(length - tile_size)
+    return positions
+
+def predict_img_tiled(
+    model_option: str,
+    image_bytes: bytes,
+    tile_scale: float = 1.0,
+    overlap: float = TILE_DEFAULT_OVERLAP,
+    min_confidence: float = TILE_MIN_CONFIDENCE,
+    use_cache: bool = True
+):
+    """Classify a large field image as overlapping tiles at the model's input size.
+
+    tile_scale is the resolution the field is tiled at (0.25 = each tile covers
+    4x the input size of the original). Returns per-tile results and species counts.
+    """
+    tiled_start = time.time()
+
+    if not 0 < tile_scale <= 1.0:
+        raise ValueError("tile_scale must be in (0, 1]")
+    if not 0 <= overlap < 1.0:
+        raise ValueError("overlap must be in [0, 1)")
+
+    _, model_name = _resolve_model_option(model_option)
+    input_size = get_input_size(model_name)
+    preprocess_func = get_preprocess_function(model_name)
+
+    # Decode (reduced resolution when the tile scale allows it)
+    decode_start = time.time()
+    image, scale_x, scale_y = _decode_image_scaled(image_bytes, tile_scale)
+    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    decode_time = time.time() - decode_start
+
+    # Fields smaller than one tile are padded up to the input size
+    height, width = image.shape[:2]
+    if height < input_size or width < input_size:
+        image = cv2.copyMakeBorder(
+            image, 0, max(0, input_size - height), 0, max(0, input_size - width), cv2.BORDER_CONSTANT, value=0
+        )
+
+    step = max(1, int(input_size * (1.0 - overlap)))
+    positions = [
+        (x, y)
+        for y in _tile_positions(image.shape[0], input_size, step)
+        for x in _tile_positions(image.shape[1], input_size, step)
+    ]
+    if len(positions) > TILE_MAX_TILES:
+        raise ValueError(f"Too many tiles ({len(positions)} > {TILE_MAX_TILES}); use a smaller tile_scale")
+
+    worker_pool = get_worker_pool()
+    tiles = []
+    inference_time = 0.0
+
+    # Build and classify tiles in chunks so memory stays bounded
+    for chunk_start in range(0, len(positions), BULK_BATCH_SIZE):
+        chunk = positions[chunk_start:chunk_start + BULK_BATCH_SIZE]
+        batch = np.stack([image[y:y + input_size, x:x + input_size] for x, y in chunk]).astype(np.float32)
+        batch = preprocess_func(batch)
+
+        chunk_inference_start = time.time()
+        if worker_pool is not None:
+            results, _ = worker_pool.predict_batch(model_option, batch)
+        else:
+            results, _ = predict_preprocessed_batch(model_option, batch, use_cache=use_cache)
+        inference_time += time.time() - chunk_inference_start
+
+        for (x, y), result in zip(chunk, results):
+            tiles.append({
+                'tile': len(tiles),
+                # Bounding box in original image pixels
+                'bbox': [int(x / scale_x), int(y / scale_y), int(input_size / scale_x), int(input_size / scale_y)],
+                'predicted_class': result['predicted_class'],
+                'confidence': result['confidence']
+            })
+
+    # Confident tiles per class; overlapping tiles can see the same organism, so these are not organism counts
+    species_tile_counts = {}
+    for tile in tiles:
+        if tile['confidence'] >= min_confidence:
+            species_tile_counts[tile['predicted_class']] = species_tile_counts.get(tile['predicted_class'], 0) + 1
+
+    total_time = time.time() - tiled_start
+    logger.info(f"Tiled prediction: {len(tiles)} tiles with {model_name} in {total_time:.3f}s")
+
+    return {
+        'model_used': model_name,
+        'tile_size': input_size,
+        'tile_scale': round(scale_x, 4),
+        'overlap': overlap,
+        'field_size': [int(round(width / scale_x)), int(round(height / scale_y))],
+        'total_tiles': len(tiles),
+        'min_confidence': min_confidence,
+        'species_tile_counts': dict(sorted(species_tile_counts.items(), key=lambda x: x[1], reverse=True)),
+        'tiles': tiles,
+        'performance_metrics': {
+            'decode_time': f"{decode_time:.3f}s",
+            'inference_time': f"{inference_time:.3f}s",
+            'total_time': f"{total_time:.3f}s"
+        }
+    }
+
+# ============================================================================
+# ORGANISM DETECTION
+# ============================================================================
+
+def detect_organisms(image, min_area: int = DETECTION_MIN_AREA, max_objects: int = DETECTION_MAX_OBJECTS):
+    """Find organisms in a BGR field image with Otsu thresholding and contour extraction.
+
+    Returns padded bounding boxes [x, y, w, h] in image pixels, largest first.
+    """
+    height, width = image.shape[:2]
+
+    # Threshold a downscaled grayscale copy; boxes are scaled back afterwards
+    scale = min(1.0, DETECTION_ANALYSIS_MAX_DIM / max(height, width))
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    if scale < 1.0:
+        gray = cv2.resize(gray, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+    gray = cv2.GaussianBlur(gray, (5, 5), 0)
+
+    # Brightfield frames have dark organisms on a light background, darkfield the opposite
+    threshold_type = cv2.THRESH_BINARY_INV if np.median(gray) > 127 else cv2.THRESH_BINARY
+    _, mask = cv2.threshold(gray, 0, 255, threshold_type + cv2.THRESH_OTSU)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, np.ones((5, 5), np.uint8), iterations=2)
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    min_scaled_area = min_area * scale * scale
+    boxes = []
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True):
+        if cv2.contourArea(contour) < min_scaled_area:
+            break
+        x, y, w, h = [value / scale for value in cv2.boundingRect(contour)]
+
+        # Pad the box so the organism keeps some context
+        pad_x, pad_y = w * DETECTION_PADDING, h * DETECTION_PADDING
+        x0, y0 = max(0, int(x - pad_x)), max(0, int(y - pad_y))
+        x1, y1 = min(width, int(x + w + pad_x)), min(height, int(y + h + pad_y))
+        boxes.append([x0, y0, x1 - x0, y1 - y0])
+
+        if len(boxes) >= max_objects:
+            break
+
+    return boxes
+
+def _summarize_detections(detections):
+    """Field-level summary in the predict_img result format, ranked by organism count"""
+    by_class = {}
+    for detection in detections:
+        by_class.setdefault(detection['predicted_class'], []).append(detection['confidence'])
+
+    ranked = sorted(by_class.items(), key=lambda item: (len(item[1]), max(item[1])), reverse=True)
+    top_3 = [
+        {
+            'class': class_name,
+            'confidence': float(np.mean(confidences)),
+            'percentage': f"{np.mean(confidences):.2%}",
+            'count': len(confidences)
+        }
+        for class_name, confidences in ranked[:3]
+    ]
+    return {
+        'predicted_class': top_3[0]['class'],
+        'confidence': top_3[0]['confidence'],
+        'top_3_predictions': top_3,
+        'species_counts': {class_name: len(confidences) for class_name, confidences in ranked}
+    }
+
+def predict_img_detect(model_option: str, image_bytes: bytes, use_cache: bool = True):
+    """Detect every organism in a field image and classify all crops in one batch.
+
+    Falls back to classifying the whole frame when nothing is detected.
+    """
+    detect_start_time = time.time()
+
+    _, model_name = _resolve_model_option(model_option)
+    preprocess_func = get_preprocess_function(model_name)
+    input_size = get_input_size(model_name)
+
+    image = _decode_image_bytes(image_bytes)
+    height, width = image.shape[:2]
+
+    detection_start = time.time()
+    boxes = detect_organisms(image)
+    if not boxes:
+        logger.info("No organisms detected, classifying the whole frame")
+        boxes = [[0, 0, width, height]]
+    detection_time = time.time() - detection_start
+
+    # Every crop goes through the model as one batch
+    batch_tensor = preprocess_func(np.concatenate([
+        _resize_to_input_array(image[y:y + h, x:x + w], input_size) for x, y, w, h in boxes
+    ], axis=0))
+
+    worker_pool = get_worker_pool()
+    if worker_pool is not None:
+        results, performance_metrics = worker_pool.predict_batch(model_option, batch_tensor)
+    else:
+        results, performance_metrics = predict_preprocessed_batch(model_option, batch_tensor, use_cache=use_cache)
+
+    detections = [
+        {
+            'index': index,
+            'bbox': box,
+            'predicted_class': result['predicted_class'],
+            'confidence': result['confidence'],
+            'top_3_predictions': result['top_3_predictions']
+        }
+        for index, (box, result) in enumerate(zip(boxes, results))
+    ]
+
+    summary = _summarize_detections(detections)
+    total_time = time.time() - detect_start_time
+    logger.info(f"Detected and classified {len(detections)} organisms with {model_name} in {total_time:.3f}s")
+
+    return {
+        **summary,
+        'model_used': model_name,
+        'field_size': [width, height],
+        'detection_count': len(detections),
+        'detections': detections,
+        'response_message': f"Detected {len(detections)} organisms, mostly {summary['predicted_class']}",
+        'performance_metrics': {
+            **performance_metrics,
+            'detection_time': f"{detection_time:.3f}s",
+            'total_time': f"{total_time:.3f}s"
+        }
+    }
+
 # ============================================================================
 # MAIN PREDICTION API
 # ============================================================================
 
-def predict_img(model_option: str, img_path: str, use_cache: bool = True):
-    """Enhanced prediction function with caching and optimization"""
+def predict_img(
+    model_option: str,
+    img_path: Optional[str] = None,
+    use_cache: bool = True,
+    image_bytes: Optional[bytes] = None,
+    use_result_cache: bool = True
+):
+    """Enhanced prediction function with caching and optimization.
+
+    Pass image_bytes to classify an in-memory upload (decoded with cv2.imdecode)
+    without any filesystem access; otherwise img_path is read from disk.
+    Results are cached by image content hash, model option and model version.
+    """
     prediction_start_time = time.time()
     
     try:
         logger.info(f"Starting enhanced prediction with model: {model_option}")
-        logger.info(f"Image path: {img_path}")
+        logger.info(f"Image source: {'in-memory (' + str(len(image_bytes)) + ' bytes)' if image_bytes is not None else img_path}")
         logger.info(f"Use cache: {use_cache}")
         
-        # Validate inputs
-        _validate_image_path(img_path)
-        
-        # Load model mapping
-        model_mapping = get_model_mapping()
+        # Validate inputs (in-memory buffers skip the filesystem checks entirely)
+        if image_bytes is None:
+            _validate_image_path(img_path)
+            # Read once so the same bytes are hashed and decoded
+            with open(img_path, 'rb') as f:
+                image_bytes = f.read()
         
-        if model_option not in model_mapping:
-            available_models = list(model_mapping.keys())
-            raise ValueError(f"Model '{model_option}' is not available. Available models are: {available_models}")
-        
-        model_path, model_name = model_mapping[model_option]
-        
-        # Enhanced model loading with caching
-        model_load_start = time.time()
-        
-        if use_cache:
-            # Try to get from cache first
-            model = cache_manager.get_from_cache(model_path)
-            if model is None:
-                logger.info(f"Model not in cache, loading: {model_path}")
-                model = load_model_with_retry(model_path, max_retries=2, validate=False)
-            else:
-                logger.info(f"Model retrieved from cache: {model_path}")
+        cascade = _parse_cascade_option(model_option)
+        ensemble = _parse_ensemble_option(model_option)
+        if ensemble is not None:
+            # Ensemble: members fused into one probability vector
+            model_version = "+".join(_get_result_cache_version(_resolve_model_option(option)[0]) for option in ensemble)
+            run_prediction = lambda: _predict_ensemble(ensemble, image_bytes, use_cache=use_cache)
+        elif cascade is not None:
+            # Cascade: cheap model first, heavy model only when unsure
+            model_version = "+".join(_get_result_cache_version(_resolve_model_option(option)[0]) for option in cascade)
+            run_prediction = lambda: _predict_cascade(*cascade, image_bytes, use_cache=use_cache)
         else:
-            logger.info(f"Cache disabled, loading fresh model: {model_path}")
-            model = load_model_with_retry(model_path, max_retries=2, validate=False)
-        
-        model_load_time = time.time() - model_load_start
-        logger.info(f"Model load time: {model_load_time:.3f}s")
+            model_path, _ = _resolve_model_option(model_option)
+            model_version = _get_result_cache_version(model_path)
+            run_prediction = lambda: _predict_single_model(model_option, image_bytes, use_cache=use_cache)
         
-        if model is None:
-            raise RuntimeError(f"Failed to load model: {model_path}")
-        
-        # Image preprocessing
-        preprocess_start = time.time()
-        processed_img = _preprocess_image_optimized(img_path, model_name)
-        preprocess_time = time.time() - preprocess_start
-        logger.info(f"Image preprocessing time: {preprocess_time:.3f}s")
-        
-        # Model prediction
-        prediction_start = time.time()
-        predictions = _run_model_prediction_enhanced(model, processed_img, model_name)
-        prediction_time = time.time() - prediction_start
-        logger.info(f"Model prediction time: {prediction_time:.3f}s")
-        
-        # Validate predictions
-        if predictions is None or len(predictions) == 0:
-            raise RuntimeError("Model tidak menghasilkan prediksi yang valid")
-        
-        # Process results
-        result_start = time.time()
-        result = _process_prediction_results(predictions, model_name)
-        result_time = time.time() - result_start
-        logger.info(f"Result processing time: {result_time:.3f}s")
+        # Identical (image, model, version) requests are served from cache or share one computation
+        if use_result_cache and result_cache.enabled:
+            cache_key = result_cache.make_key(image_bytes, model_option, model_version)
+            result, result_cache_status = result_cache.get_or_compute(cache_key, run_prediction)
+        else:
+            result = run_prediction()
+            result_cache_status = "disabled"
         
         total_time = time.time() - prediction_start_time
         
-        # Add timing information to result
+        # Add timing information to result (timings of a cached computation are not this request's)
+        performance_metrics = result.get('performance_metrics', {}) if result_cache_status in ("miss", "disabled") else {}
         result['performance_metrics'] = {
             'total_time': f"{total_time:.3f}s",
-            'model_load_time': f"{model_load_time:.3f}s",
-            'preprocessing_time': f"{preprocess_time:.3f}s",
-            'prediction_time': f"{prediction_time:.3f}s",
-            'result_processing_time': f"{result_time:.3f}s",
-            'cache_hit': model_path in MODEL_CACHE
+            **performance_metrics,
+            'result_cache': result_cache_status
         }
         
-        logger.info(f"Prediction completed successfully in {total_time:.3f}s")
+        logger.info(f"Prediction completed successfully in {total_time:.3f}s (result cache: {result_cache_status})")
         logger.info(f"Result: {result['predicted_class']} ({result['confidence']:.2%})")
         
         return result
@@ -742,4 +3164,4 @@ def predict_img(model_option: str, img_path: str, use_cache: bool = True):
     except Exception as e:
         total_time = time.time() - prediction_start_time
         logger.error(f"Prediction failed after {total_time:.3f}s: {str(e)}")
-        raise e
\ No newline at end of file
+        raise e